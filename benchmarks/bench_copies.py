@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# Yazma ve bildirim yolunda parça başına bellek kopyalarının ölçümü
+#
+# Eski yol: dbus.Byte dizisi -> bytes(value) -> decode() -> json.loads(str),
+# bildirimde list(message.encode()) -> dbus.Array. Yeni yol: byte_arrays=True
+# ile gelen bytes doğrudan çözülür, bildirim dbus.ByteArray olarak gider.
+#
+# tracemalloc ile her parçanın işlenmesi sırasında taban çizgisinin üstüne
+# çıkan en yüksek bellek ölçülür; bunun parça boyutuna oranı aynı anda
+# bellekte bulunan kopya sayısını yaklaşık olarak verir. dbus-python
+# kuruluysa gerçek D-Bus tipleri, değilse eşdeğer list/bytes nesneleri
+# kullanılır.
+#
+#   python3 benchmarks/bench_copies.py --chunk 244
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from chunk_engine import build_binary_frame, parse_binary_frame  # noqa: E402
+
+try:
+    import dbus
+except ImportError:
+    dbus = None
+
+
+def make_frames(chunk_size):
+    text = "print('merhaba dünya')\n" * (chunk_size // 8)
+    data = json.dumps(text)[1:chunk_size + 1]
+    json_frame = json.dumps({"sessionId": "bench123", "chunkIndex": 7,
+                             "totalChunks": 100, "data": data}).encode('utf-8')
+    binary_frame = build_binary_frame(0x1234, 7, 100, text.encode('utf-8')[:chunk_size])
+    return json_frame, binary_frame
+
+
+def as_old_value(frame):
+    # byte_arrays olmadan dbus-python her byte için ayrı bir dbus.Byte üretir
+    if dbus is not None:
+        return dbus.Array([dbus.Byte(b) for b in frame], signature='y')
+    return list(frame)
+
+
+def as_new_value(frame):
+    if dbus is not None:
+        return dbus.ByteArray(frame)
+    return frame
+
+
+def old_notify(message):
+    value = list(message.encode('utf-8'))
+    if dbus is not None:
+        return dbus.Array(value, signature=dbus.Signature('y'))
+    return value
+
+
+def new_notify(message):
+    value = message.encode('utf-8')
+    if dbus is not None:
+        return dbus.ByteArray(value)
+    return value
+
+
+def old_json_path(value):
+    data = bytes(value)
+    data_str = data.decode('utf-8')
+    chunk = json.loads(data_str)
+    return chunk["data"], old_notify(f"OK_{chunk['chunkIndex']}")
+
+
+def new_json_path(value):
+    chunk = json.loads(value)
+    return chunk["data"], new_notify(f"OK_{chunk['chunkIndex']}")
+
+
+def old_binary_path(value):
+    data = bytes(value)
+    _, index, _, _, payload = parse_binary_frame(data)
+    return payload, old_notify(f"OK_{index}")
+
+
+def new_binary_path(value):
+    _, index, _, _, payload = parse_binary_frame(value)
+    return payload, new_notify(f"OK_{index}")
+
+
+def peak_per_chunk(fn, value, repeat):
+    # Her parça için taban çizgisinin üstündeki en yüksek bellek kullanımı
+    tracemalloc.start()
+    peaks = []
+    for _ in range(repeat):
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = fn(value)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - baseline)
+        del result
+    tracemalloc.stop()
+    return min(peaks)
+
+
+def time_per_chunk(fn, value, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(value)
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chunk', type=int, default=244, help='parça başına veri boyutu')
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"D-Bus tipleri: {'dbus-python' if dbus is not None else 'yok (list/bytes eşdeğeri)'}")
+    json_frame, binary_frame = make_frames(args.chunk)
+    for name, frame, old, new in (
+            ("json", json_frame, old_json_path, new_json_path),
+            ("binary", binary_frame, old_binary_path, new_binary_path)):
+        old_value = as_old_value(frame)
+        new_value = as_new_value(frame)
+        # İki yol da aynı parça verisini ve bildirimi üretmeli
+        assert bytes(old(old_value)[1]) == bytes(new(new_value)[1])
+        assert old(old_value)[0] == new(new_value)[0]
+        for label, fn, value in (("eski", old, old_value), ("yeni", new, new_value)):
+            peak = peak_per_chunk(fn, value, 50)
+            elapsed = time_per_chunk(fn, value, args.repeat)
+            print(f"{name:>6} {label}: {len(frame):4d} byte çerçeve, "
+                  f"tepe {peak:6d} byte ({peak / len(frame):4.1f}x çerçeve), "
+                  f"{elapsed * 1e6:7.2f} µs/parça")
+
+
+if __name__ == '__main__':
+    main()
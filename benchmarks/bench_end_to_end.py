@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# Sahte BlueZ üzerinden uçtan uca yükleme ölçümü
+#
+# Her durum için sunucu (raspberry_pi_ble_server.py) özel bir dbus-daemon
+# veriyoluna bağlı ayrı bir süreç olarak başlatılır; main(), find_adapter ve
+# RegisterApplication gerçek akışla çalışır. Sahte istemciler Android
+# istemcisi gibi her parçadan sonra OK_n bildirimini bekler. Bildirimler
+# etiketli modda gönderilir, böylece eşzamanlı istemciler kendi mesajlarını
+# ayırt eder.
+#
+# Raporlanan değerler: parça/sn, byte/sn, parça gecikmesi (yazma -> OK_n)
+# p50/p99 ve session başına sunucu belleği (tepe RSS - başlangıç RSS).
+# dbus-python, PyGObject ve dbus-daemon gerektirir.
+#
+#   python3 benchmarks/bench_end_to_end.py --sizes 1000,10000 --clients 1,4,8
+#   python3 benchmarks/bench_end_to_end.py --binary --acquire
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gi.repository import GLib  # noqa: E402
+
+from chunk_engine import FLAG_TAGGED_NOTIFY, build_binary_frame  # noqa: E402
+from fake_bluez import (FakeAdapter, FakeCentral,  # noqa: E402
+                        NotificationListener, PrivateBus, wait_for)
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                      'raspberry_pi_ble_server.py')
+JSON_CHAR_UUID = 'abcd1234-ab12-cd34-ef56-abcdef123456'
+REGISTER_TIMEOUT = 15
+RSS_SAMPLE_INTERVAL = 20   # ms
+
+
+def make_frames(client, size, chunk_size, binary):
+    code = f"print('istemci {client}')\\n" * (size // 24 + 1)
+    payload = json.dumps({"code": code[:size], "author": f"bench{client}",
+                          "description": "bench"})
+    if binary:
+        raw = payload.encode('utf-8')
+        chunks = [raw[i:i + chunk_size] for i in range(0, len(raw), chunk_size)]
+        return str(client), [build_binary_frame(client, i, len(chunks), c,
+                                                FLAG_TAGGED_NOTIFY)
+                             for i, c in enumerate(chunks)]
+    session_id = f"bench{client}"
+    chunks = [payload[i:i + chunk_size] for i in range(0, len(payload), chunk_size)]
+    return session_id, [json.dumps({"sessionId": session_id, "chunkIndex": i,
+                                    "totalChunks": len(chunks), "data": c,
+                                    "notifyTag": True}).encode('utf-8')
+                        for i, c in enumerate(chunks)]
+
+
+class Upload:
+    """Bir istemcinin dur-bekle yüklemesi (Android istemcisi gibi)"""
+
+    def __init__(self, central, frames):
+        self.central = central
+        self.frames = frames
+        self.next_index = 0
+        self.sent_at = 0.0
+        self.latencies = []
+        self.done = False
+        self.failed = False
+
+    def send_next(self):
+        self.sent_at = time.perf_counter()
+        self.central.write(self.frames[self.next_index])
+
+    def on_message(self, message):
+        if self.done:
+            return
+        if message.startswith('OK_') or message == 'TAMAM':
+            self.latencies.append(time.perf_counter() - self.sent_at)
+            self.next_index += 1
+            if message == 'TAMAM':
+                self.done = True
+            elif self.next_index < len(self.frames):
+                self.send_next()
+        elif message == 'HATA':
+            self.failed = True
+            self.done = True
+
+
+def rss_kb(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[int(round(p * (len(values) - 1)))]
+
+
+def run_case(private, adapter, size, clients, args):
+    adapter.reset()
+    with tempfile.TemporaryDirectory() as cwd:
+        server = subprocess.Popen([sys.executable, SERVER], cwd=cwd, env=private.env(),
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        listener = None
+        centrals = []
+        try:
+            if not wait_for(lambda: (adapter.application is not None
+                                     and adapter.advertisement is not None),
+                            REGISTER_TIMEOUT):
+                raise RuntimeError("Sunucu uygulamayı kaydetmedi")
+            sender, path = adapter.find_characteristic(JSON_CHAR_UUID)
+
+            uploads = {}
+
+            def on_notification(value):
+                tag, _, message = value.decode('utf-8').partition(':')
+                upload = uploads.get(tag)
+                if upload is not None:
+                    upload.on_message(message)
+
+            listener = NotificationListener(private.bus, sender, path, on_notification)
+            if args.acquire:
+                listener.acquire_notify(args.mtu)
+            else:
+                listener.start_notify()
+
+            for i in range(clients):
+                central = FakeCentral(private.bus, sender, path, i, args.mtu)
+                if args.acquire:
+                    central.acquire_write()
+                centrals.append(central)
+                tag, frames = make_frames(i, size, args.chunk, args.binary)
+                uploads[tag] = Upload(central, frames)
+
+            baseline = rss_kb(server.pid)
+            peak = [baseline]
+
+            def sample():
+                peak[0] = max(peak[0], rss_kb(server.pid))
+                return True
+
+            sampler = GLib.timeout_add(RSS_SAMPLE_INTERVAL, sample)
+            started = time.perf_counter()
+            for upload in uploads.values():
+                upload.send_next()
+            finished = wait_for(lambda: all(u.done for u in uploads.values()),
+                                args.timeout)
+            elapsed = time.perf_counter() - started
+            GLib.source_remove(sampler)
+            sample()
+        finally:
+            for central in centrals:
+                central.close()
+            if listener is not None:
+                listener.close()
+            server.terminate()
+            server.wait()
+
+    latencies = [lat for u in uploads.values() for lat in u.latencies]
+    chunks = sum(len(u.latencies) for u in uploads.values())
+    sent_bytes = sum(sum(len(f) for f in u.frames[:len(u.latencies)])
+                     for u in uploads.values())
+    failed = sum(1 for u in uploads.values() if u.failed or not u.done)
+    errors = sum(c.errors for c in centrals)
+    return {
+        "size": size,
+        "clients": clients,
+        "chunks_per_sec": chunks / elapsed,
+        "bytes_per_sec": sent_bytes / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000 if latencies else 0.0,
+        "p99_ms": percentile(latencies, 0.99) * 1000 if latencies else 0.0,
+        "kb_per_session": (peak[0] - baseline) / clients,
+        "failed": failed + errors,
+        "timed_out": not finished,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='1000,10000,50000',
+                        help='program boyutları (karakter, virgülle)')
+    parser.add_argument('--clients', default='1,4,8', help='istemci sayıları (virgülle)')
+    parser.add_argument('--chunk', type=int, default=80, help='parça başına veri boyutu')
+    parser.add_argument('--mtu', type=int, default=247)
+    parser.add_argument('--binary', action='store_true', help='ikili çerçeve kullan')
+    parser.add_argument('--acquire', action='store_true',
+                        help='AcquireWrite/AcquireNotify soketlerini kullan')
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args()
+
+    private = PrivateBus()
+    adapter = FakeAdapter(private.bus)
+    print(f"{'binary' if args.binary else 'json'}, "
+          f"{'acquire' if args.acquire else 'dbus'} yolu, {args.chunk} byte parça")
+    print(f"{'boyut':>7} {'istemci':>7} {'parça/sn':>9} {'byte/sn':>9} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'KB/session':>10} {'hata':>5}")
+    try:
+        for size in map(int, args.sizes.split(',')):
+            for clients in map(int, args.clients.split(',')):
+                r = run_case(private, adapter, size, clients, args)
+                print(f"{r['size']:7d} {r['clients']:7d} {r['chunks_per_sec']:9.0f} "
+                      f"{r['bytes_per_sec']:9.0f} {r['p50_ms']:7.2f} {r['p99_ms']:7.2f} "
+                      f"{r['kb_per_session']:10.1f} {r['failed']:5d}"
+                      + (" (zaman aşımı)" if r['timed_out'] else ""))
+    finally:
+        private.close()
+
+
+if __name__ == '__main__':
+    main()
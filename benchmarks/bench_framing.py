@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# JSON zarflı parçalar ile ikili çerçeveli parçaların karşılaştırması
+#
+# Sunucudaki yazma yolunu (çözme + parça kaydı + birleştirme) donanım
+# olmadan ölçer ve parça başına kablosuz ek yükü raporlar.
+#
+#   python3 benchmarks/bench_framing.py --size 200000 --chunk 80
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from chunk_engine import (ChunkReassembler, build_binary_frame,  # noqa: E402
+                          parse_binary_frame)
+
+
+def make_payload(size):
+    code = "print('merhaba dünya')\n" * (size // 24 + 1)
+    return json.dumps({"code": code[:size], "author": "bench", "description": "bench"})
+
+
+def json_frames(payload, chunk_size):
+    # Android istemcisinin ürettiği biçim: karakter bazlı bölme + JSON zarfı
+    chunks = [payload[i:i + chunk_size] for i in range(0, len(payload), chunk_size)]
+    return [json.dumps({"sessionId": "bench123", "chunkIndex": i,
+                        "totalChunks": len(chunks), "data": c}).encode('utf-8')
+            for i, c in enumerate(chunks)]
+
+
+def binary_frames(payload, chunk_size):
+    raw = payload.encode('utf-8')
+    chunks = [raw[i:i + chunk_size] for i in range(0, len(raw), chunk_size)]
+    return [build_binary_frame(0x1234, i, len(chunks), c)
+            for i, c in enumerate(chunks)]
+
+
+def run_json(frames):
+    reassembler = ChunkReassembler()
+    for frame in frames:
+        chunk = json.loads(frame.decode('utf-8'))
+        session, _ = reassembler.add_chunk(chunk["sessionId"], chunk["chunkIndex"],
+                                           chunk["totalChunks"], chunk["data"])
+    data, _ = reassembler.finish(session.session_id)
+    return json.loads(data)
+
+
+def run_binary(frames):
+    reassembler = ChunkReassembler()
+    for frame in frames:
+        session_id, index, total, _, payload = parse_binary_frame(frame)
+        session, _ = reassembler.add_chunk(session_id, index, total, payload)
+    data, _ = reassembler.finish(session.session_id)
+    return json.loads(data)
+
+
+def measure(fn, frames, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(frames)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=200000, help='yük boyutu (karakter)')
+    parser.add_argument('--chunk', type=int, default=80, help='parça başına veri boyutu')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    payload = make_payload(args.size)
+    results = {}
+    for name, build, run in (("json", json_frames, run_json),
+                             ("binary", binary_frames, run_binary)):
+        frames = build(payload, args.chunk)
+        assert run(frames)["code"]
+        elapsed = measure(run, frames, args.repeat)
+        wire = sum(len(f) for f in frames)
+        results[name] = elapsed
+        print(f"{name:>6}: {len(frames):6d} parça, {wire:8d} byte kablo, "
+              f"ek yük %{100 * (wire - len(payload)) / wire:5.1f}, "
+              f"{len(frames) / elapsed:10.0f} parça/sn, "
+              f"{len(payload) / elapsed / 1e6:7.2f} MB/sn")
+
+    print(f"ikili mod hızlanma: {results['json'] / results['binary']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
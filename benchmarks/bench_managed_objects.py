@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# GetManagedObjects yanıtının önbellekli ve önbelleksiz hesaplanması
+#
+# Yüzlerce characteristic içeren bir GATT ağacı D-Bus'a bağlanmadan kurulur.
+# "önbelleksiz" ölçümde her çağrıdan önce tüm düğümlerin önbelleği
+# sıfırlanır (önceki davranış: ağaç her seferinde baştan dolaşılır).
+# dbus-python ve PyGObject gerektirir.
+#
+#   python3 benchmarks/bench_managed_objects.py --services 10 --chars 50
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from raspberry_pi_ble_server import (Application, Characteristic,  # noqa: E402
+                                     Service)
+
+
+def build_tree(services, chars):
+    # bus=None: nesneler D-Bus'a aktarılmadan oluşturulur
+    app = Application(None)
+    for i in range(services):
+        service = Service(None, i, f'12345678-1234-1234-1234-{i:012x}', True)
+        for j in range(chars):
+            service.add_characteristic(Characteristic(
+                None, j, f'abcd{j:04x}-ab12-cd34-ef56-{i:012x}',
+                ['read', 'write', 'notify'], service))
+        app.add_service(service)
+    return app
+
+
+def invalidate_all(app):
+    for service in app.services:
+        for chrc in service.characteristics:
+            chrc.invalidate()
+
+
+def measure(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--services', type=int, default=10)
+    parser.add_argument('--chars', type=int, default=50, help='servis başına characteristic')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    app = build_tree(args.services, args.chars)
+    print(f"ağaç: {args.services} servis, {args.services * args.chars} characteristic "
+          f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+
+    def uncached():
+        invalidate_all(app)
+        return app.GetManagedObjects()
+
+    objects = uncached()
+    assert len(objects) == args.services * (args.chars + 1)
+    assert app.GetManagedObjects() is app.GetManagedObjects()
+
+    cold = measure(uncached, args.repeat)
+    warm = measure(app.GetManagedObjects, args.repeat)
+    print(f"önbelleksiz: {cold * 1000:8.3f} ms/çağrı")
+    print(f"önbellekli : {warm * 1000:8.3f} ms/çağrı ({cold / warm:.0f}x)")
+
+    # Ağaca yeni characteristic eklenince yalnızca bir sonraki çağrı yeniden hesaplar
+    service = app.services[0]
+    service.add_characteristic(Characteristic(
+        None, args.chars, 'abcdffff-ab12-cd34-ef56-000000000000', ['read'], service))
+    assert len(app.GetManagedObjects()) == len(objects) + 1
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# Çalıştırma isteğinden ilk çıktıya kadar geçen süre: soğuk python3 ile
+# sıcak işçi havuzu (ProgramRunner) karşılaştırması
+#
+# Soğuk yol önceki davranıştır: program için yeni bir python3 süreci açılır.
+# Sıcak yolda program, modülleri önceden içe aktarılmış boştaki bir işçiye
+# verilir. Her tur arasında havuzun yeniden dolması beklenir.
+#
+#   python3 benchmarks/bench_runner.py --runs 10 --preload json,math,random
+#
+# root olarak çalıştırılırken sıcak yol için --run-as nobody gibi ayrıcalıksız
+# bir kullanıcı verilmelidir (ProgramRunner root'la çalışmayı reddeder).
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from program_runner import OUTPUT_FRAME_MAGIC, PRELOAD_MODULES, ProgramRunner  # noqa: E402
+
+PROGRAM = "import json, math, random\nprint('merhaba')\n"
+REFILL_DELAY = 1.0      # saniye, işçilerin açılışı için
+
+
+class FirstOutput:
+    """İlk çıktı çerçevesinin geldiği anı kaydeden taşıma katmanı"""
+
+    def __init__(self):
+        self.finished = threading.Event()
+        self.at = None
+
+    def send(self, device, value):
+        if value[0] == OUTPUT_FRAME_MAGIC and self.at is None:
+            self.at = time.perf_counter()
+        elif value.startswith(b'EXIT_'):
+            self.finished.set()
+
+    def notify_size(self, device):
+        return 244
+
+
+def cold(path):
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-u', path], stdout=subprocess.PIPE)
+    process.stdout.read(1)
+    elapsed = time.perf_counter() - started
+    process.wait()
+    process.stdout.close()
+    return elapsed
+
+
+def warm(runner, path):
+    transport = FirstOutput()
+    started = time.perf_counter()
+    runner.run(path, 'bench', transport)
+    transport.finished.wait(10)
+    return transport.at - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--preload', default=','.join(PRELOAD_MODULES))
+    parser.add_argument('--run-as', help='programların çalışacağı ayrıcalıksız kullanıcı')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'program.py')
+        with open(path, 'w') as f:
+            f.write(PROGRAM)
+        cold_times = [cold(path) for _ in range(args.runs)]
+
+        runner = ProgramRunner(preload=[m for m in args.preload.split(',') if m],
+                               directory=os.path.join(directory, 'runs'),
+                               run_as=args.run_as)
+        runner.start()
+        warm_times = []
+        try:
+            for _ in range(args.runs):
+                time.sleep(REFILL_DELAY)
+                warm_times.append(warm(runner, path))
+        finally:
+            runner.close()
+
+    print(f"{'yol':>8} {'ilk çıktı ms (medyan)':>22} {'en kötü ms':>11}")
+    for name, times in (('soğuk', cold_times), ('sıcak', warm_times)):
+        print(f"{name:>8} {statistics.median(times) * 1000:22.1f} "
+              f"{max(times) * 1000:11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# Soket taşıma katmanı üzerinden eşzamanlı yükleme yük testi
+#
+# Donanım olmadan yükleme motorunu uçtan uca ölçer: sunucu ve istemciler
+# aynı süreçte çalışır, her istemci aynı protokolle (JSON zarfı ya da ikili
+# çerçeve) bir program yükler ve TAMAM bildirimini bekler. Programlar geçici
+# bir dizine kaydedilir; sunucu günlük kaydı yapılandırılmadığı için
+# yalnızca uyarılar görünür.
+#
+#   python3 benchmarks/bench_socket_upload.py --clients 50 --size 20000
+#   python3 benchmarks/bench_socket_upload.py --unix --binary
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from chunk_engine import build_binary_frame  # noqa: E402
+from code_store import ProgramStore  # noqa: E402
+from socket_transport import SocketTransport, encode_frame, read_frame  # noqa: E402
+
+
+def make_frames(client, size, chunk_size, binary):
+    code = f"print('istemci {client}')\\n" * (size // 24 + 1)
+    payload = json.dumps({"code": code[:size], "author": f"bench{client}",
+                          "description": "bench"})
+    if binary:
+        raw = payload.encode('utf-8')
+        chunks = [raw[i:i + chunk_size] for i in range(0, len(raw), chunk_size)]
+        return [encode_frame(build_binary_frame(client, i, len(chunks), c))
+                for i, c in enumerate(chunks)]
+    chunks = [payload[i:i + chunk_size] for i in range(0, len(payload), chunk_size)]
+    return [encode_frame(json.dumps({"sessionId": f"bench{client}", "chunkIndex": i,
+                                     "totalChunks": len(chunks), "data": c}).encode('utf-8'))
+            for i, c in enumerate(chunks)]
+
+
+async def upload(connect, frames):
+    reader, writer = await connect()
+    started = time.perf_counter()
+    writer.write(b"".join(frames))
+    await writer.drain()
+    while True:
+        message = await read_frame(reader)
+        if message in (b"TAMAM", b"HATA"):
+            break
+    elapsed = time.perf_counter() - started
+    writer.close()
+    return message, elapsed
+
+
+async def run(args, root):
+    store = ProgramStore(os.path.join(root, 'programs'),
+                         os.path.join(root, 'received_code.py'))
+    transport = SocketTransport(store)
+    if args.unix:
+        path = os.path.join(root, 'upload.sock')
+        await transport.start(unix=path)
+
+        def connect():
+            return asyncio.open_unix_connection(path)
+    else:
+        await transport.start(tcp='127.0.0.1:0')
+        port = transport.servers[0].sockets[0].getsockname()[1]
+
+        def connect():
+            return asyncio.open_connection('127.0.0.1', port)
+
+    uploads = [make_frames(i, args.size, args.chunk, args.binary)
+               for i in range(args.clients)]
+    started = time.perf_counter()
+    results = await asyncio.gather(*(upload(connect, frames) for frames in uploads))
+    total = time.perf_counter() - started
+    await transport.close()
+    transport.engine.stop()
+    return results, total, sum(len(frames) for frames in uploads)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--size', type=int, default=20000, help='program boyutu (karakter)')
+    parser.add_argument('--chunk', type=int, default=80, help='parça başına veri boyutu')
+    parser.add_argument('--binary', action='store_true', help='ikili çerçeve kullan')
+    parser.add_argument('--unix', action='store_true', help='TCP yerine Unix soket')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        results, total, chunks = asyncio.run(run(args, root))
+
+    latencies = [elapsed for _, elapsed in results]
+    failed = sum(1 for message, _ in results if message != b"TAMAM")
+    print(f"{'unix' if args.unix else 'tcp'}/{'binary' if args.binary else 'json'}: "
+          f"{args.clients} istemci, {chunks} parça, {total:.2f} sn, "
+          f"{chunks / total:.0f} parça/sn, "
+          f"{args.clients * args.size / total / 1e6:.2f} MB/sn")
+    print(f"yükleme süresi: medyan {statistics.median(latencies) * 1000:.0f} ms, "
+          f"en uzun {max(latencies) * 1000:.0f} ms, hatalı {failed}")
+
+
+if __name__ == '__main__':
+    main()
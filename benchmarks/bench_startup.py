@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# Sunucunun başlatılmasından keşfedilebilir olmasına kadar geçen süre
+#
+# Sunucu sahte BlueZ veriyoluna bağlı olarak tekrar tekrar başlatılır ve
+# süreç oluşturulduğu andan itibaren advertisement'ın (keşfedilebilir) ve
+# GATT uygulamasının kaydedilme anları ölçülür. Normal başlatma ile
+# --fast-start (önbellekteki adapter yolu) karşılaştırılır; ilk hızlı
+# başlatma önbelleği oluşturduğu için ısınma turu olarak sayılmaz.
+# dbus-python, PyGObject ve dbus-daemon gerektirir.
+#
+#   python3 benchmarks/bench_startup.py --runs 10
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fake_bluez import FakeAdapter, PrivateBus, wait_for  # noqa: E402
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                      'raspberry_pi_ble_server.py')
+REGISTER_TIMEOUT = 15
+
+
+def start_once(private, adapter, cwd, extra_args):
+    adapter.reset()
+    times = {}
+
+    def registered():
+        now = time.perf_counter() - started
+        if adapter.advertisement is not None:
+            times.setdefault('advertisement', now)
+        if adapter.application is not None:
+            times.setdefault('app', now)
+        return len(times) == 2
+
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, SERVER] + extra_args, cwd=cwd,
+                              env=private.env(), stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL)
+    try:
+        if not wait_for(registered, REGISTER_TIMEOUT):
+            raise RuntimeError("Sunucu kayıt yapmadı")
+    finally:
+        server.terminate()
+        server.wait()
+    return times['advertisement'], times['app']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    private = PrivateBus()
+    adapter = FakeAdapter(private.bus)
+    print(f"{'mod':>10} {'keşfedilebilir ms':>18} {'GATT hazır ms':>14}")
+    try:
+        with tempfile.TemporaryDirectory() as cwd:
+            # Önbelleği oluşturur
+            start_once(private, adapter, cwd, ['--fast-start'])
+            for name, extra in (('normal', []), ('fast-start', ['--fast-start'])):
+                runs = [start_once(private, adapter, cwd, extra) for _ in range(args.runs)]
+                print(f"{name:>10} "
+                      f"{statistics.median(r[0] for r in runs) * 1000:18.0f} "
+                      f"{statistics.median(r[1] for r in runs) * 1000:14.0f}")
+    finally:
+        private.close()
+
+
+if __name__ == '__main__':
+    main()
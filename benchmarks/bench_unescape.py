@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# Eski str.replace zinciri ile tek geçişli unescape_code karşılaştırması
+#
+#   python3 benchmarks/bench_unescape.py
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from code_store import unescape_code  # noqa: E402
+
+SAMPLE = (
+    "from machine import Pin\\nimport time\\n\\n"
+    "led = Pin(2, Pin.OUT)\\n"
+    "for i in range(10):\\n\\tled.on()\\n\\ttime.sleep(0.5)\\n"
+    "\\tprint(f\\\"LED {i+1}. kez yanıp söndü\\\")\\n"
+)
+# Düzenli ifade içeren kod: her "\\d" için kaçış sayısı ayrıca kontrol edilir
+REGEX_SAMPLE = SAMPLE + "pattern = \\'\\\\d+\\'\\n"
+
+
+def replace_chain(code):
+    # process_json_data'nın önceki sürümü
+    code = code.replace("\\n", "\n")
+    code = code.replace("\\t", "\t")
+    code = code.replace("\\r", "\r")
+    code = code.replace("\\'", "'")
+    code = code.replace('\\"', '"')
+    return code
+
+
+def measure(fn, text, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # Zincir "\\\\n" dizisini ters bölü + yeni satıra çevirir; doğrusu "\\n"
+    sample = r'print("a\\nb")'
+    print(f"zincir   : {replace_chain(sample)!r}")
+    print(f"tek geçiş: {unescape_code(sample)!r}")
+
+    for name, sample in (("düz kod", SAMPLE), ("regex'li kod", REGEX_SAMPLE)):
+        for size in (100 * 1024, 256 * 1024, 1024 * 1024):
+            text = (sample * (size // len(sample) + 1))[:size]
+            chain = measure(replace_chain, text, args.repeat)
+            single = measure(unescape_code, text, args.repeat)
+            print(f"{name:>12} {size // 1024:5d} KB: zincir {chain * 1000:7.2f} ms, "
+                  f"tek geçiş {single * 1000:7.2f} ms, "
+                  f"oran {chain / single:4.2f}x")
+
+
+if __name__ == '__main__':
+    main()
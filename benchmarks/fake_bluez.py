@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# Donanımsız BlueZ taklidi
+#
+# Özel bir dbus-daemon oturum veriyolu başlatır ve üzerinde org.bluez adını
+# alarak GattManager1 ile LEAdvertisingManager1 arayüzlerini sağlayan sahte
+# bir adapter yayınlar. Sunucu DBUS_SYSTEM_BUS_ADDRESS ile bu veriyoluna
+# yönlendirilir; böylece main(), find_adapter ve RegisterApplication gerçek
+# bir adapter olmadan çalışır. FakeCentral, bağlanan bir telefonun yaptığı
+# gibi WriteValue/StartNotify (ya da AcquireWrite/AcquireNotify) çağırır.
+#
+# dbus-python, PyGObject ve dbus-daemon gerektirir. Elle deneme:
+#
+#   python3 benchmarks/fake_bluez.py
+#   DBUS_SYSTEM_BUS_ADDRESS=<yazılan adres> python3 raspberry_pi_ble_server.py
+
+import os
+import socket
+import subprocess
+import time
+
+import dbus
+import dbus.mainloop.glib
+import dbus.service
+from gi.repository import GLib
+
+dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
+
+BLUEZ_SERVICE_NAME = 'org.bluez'
+ADAPTER_PATH = '/org/bluez/hci0'
+ADAPTER_IFACE = 'org.bluez.Adapter1'
+GATT_MANAGER_IFACE = 'org.bluez.GattManager1'
+LE_ADVERTISING_MANAGER_IFACE = 'org.bluez.LEAdvertisingManager1'
+DBUS_OM_IFACE = 'org.freedesktop.DBus.ObjectManager'
+DBUS_PROP_IFACE = 'org.freedesktop.DBus.Properties'
+GATT_CHRC_IFACE = 'org.bluez.GattCharacteristic1'
+LE_ADVERTISEMENT_IFACE = 'org.bluez.LEAdvertisement1'
+
+
+class PrivateBus:
+    """Ayrı bir dbus-daemon süreci; sistem veriyolunun yerine kullanılır"""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            ['dbus-daemon', '--session', '--nofork', '--print-address'],
+            stdout=subprocess.PIPE, text=True)
+        self.address = self.process.stdout.readline().strip()
+        self.bus = dbus.bus.BusConnection(self.address)
+
+    def env(self):
+        """Sunucu sürecinin dbus.SystemBus() ile bu veriyoluna bağlanması için"""
+        env = dict(os.environ)
+        env['DBUS_SYSTEM_BUS_ADDRESS'] = self.address
+        return env
+
+    def close(self):
+        self.bus.close()
+        self.process.terminate()
+        self.process.wait()
+
+
+class FakeAdapter(dbus.service.Object):
+    def __init__(self, bus):
+        self.bus = bus
+        self.name = dbus.service.BusName(BLUEZ_SERVICE_NAME, bus)
+        self.application = None
+        self.characteristics = {}
+        self.advertisement = None
+        dbus.service.Object.__init__(self, bus, ADAPTER_PATH)
+        self.root = FakeObjectManager(bus)
+
+    def reset(self):
+        self.application = None
+        self.characteristics = {}
+        self.advertisement = None
+
+    @dbus.service.method(GATT_MANAGER_IFACE, in_signature='oa{sv}',
+                         sender_keyword='sender',
+                         async_callbacks=('reply', 'error'))
+    def RegisterApplication(self, path, options, sender, reply, error):
+        # Gerçek BlueZ gibi uygulamanın nesne ağacını okur
+        app = self.bus.get_object(sender, path)
+
+        def on_objects(objects):
+            self.characteristics = {
+                str(obj_path): (sender, props[GATT_CHRC_IFACE])
+                for obj_path, props in objects.items()
+                if GATT_CHRC_IFACE in props}
+            self.application = (sender, str(path))
+            reply()
+
+        app.GetManagedObjects(dbus_interface=DBUS_OM_IFACE,
+                              reply_handler=on_objects, error_handler=error)
+
+    @dbus.service.method(GATT_MANAGER_IFACE, in_signature='o')
+    def UnregisterApplication(self, path):
+        self.reset()
+
+    @dbus.service.method(LE_ADVERTISING_MANAGER_IFACE, in_signature='oa{sv}',
+                         sender_keyword='sender',
+                         async_callbacks=('reply', 'error'))
+    def RegisterAdvertisement(self, path, options, sender, reply, error):
+        adv = self.bus.get_object(sender, path)
+
+        def on_properties(props):
+            self.advertisement = dict(props)
+            reply()
+
+        adv.GetAll(LE_ADVERTISEMENT_IFACE, dbus_interface=DBUS_PROP_IFACE,
+                   reply_handler=on_properties, error_handler=error)
+
+    @dbus.service.method(LE_ADVERTISING_MANAGER_IFACE, in_signature='o')
+    def UnregisterAdvertisement(self, path):
+        self.advertisement = None
+
+    def find_characteristic(self, uuid):
+        """UUID'si verilen characteristic'in (bus adı, yol) çiftini döner"""
+        for path, (sender, props) in self.characteristics.items():
+            if str(props['UUID']) == uuid:
+                return sender, path
+        return None
+
+
+class FakeObjectManager(dbus.service.Object):
+    def __init__(self, bus):
+        dbus.service.Object.__init__(self, bus, '/')
+
+    @dbus.service.method(DBUS_OM_IFACE, out_signature='a{oa{sa{sv}}}')
+    def GetManagedObjects(self):
+        return {
+            dbus.ObjectPath(ADAPTER_PATH): {
+                ADAPTER_IFACE: {'Address': '00:00:00:00:00:00',
+                                'Powered': dbus.Boolean(True)},
+                GATT_MANAGER_IFACE: {},
+                LE_ADVERTISING_MANAGER_IFACE: {},
+            }
+        }
+
+
+class FakeCentral:
+    """Bağlı bir telefonu taklit eder: yazar ve bildirimleri dinler"""
+
+    def __init__(self, bus, sender, chrc_path, index, mtu=247):
+        self.bus = bus
+        self.chrc = dbus.Interface(bus.get_object(sender, chrc_path), GATT_CHRC_IFACE)
+        self.device = dbus.ObjectPath(
+            f'{ADAPTER_PATH}/dev_00_00_00_00_{index // 256:02X}_{index % 256:02X}')
+        self.mtu = mtu
+        self.options = {'device': self.device, 'mtu': dbus.UInt16(mtu),
+                        'type': 'request'}
+        self.write_socket = None
+        self.errors = 0
+
+    def write(self, value):
+        """Değeri yazar; AcquireWrite yapıldıysa soket üzerinden gönderir"""
+        if self.write_socket is not None:
+            self.write_socket.send(value)
+            return
+        self.chrc.WriteValue(dbus.ByteArray(value), self.options,
+                             reply_handler=self.on_reply,
+                             error_handler=self.on_error)
+
+    def on_reply(self, *args):
+        pass
+
+    def on_error(self, e):
+        self.errors += 1
+
+    def acquire_write(self):
+        fd, mtu = self.chrc.AcquireWrite(
+            {'device': self.device, 'mtu': dbus.UInt16(self.mtu), 'link': 'LE'})
+        self.write_socket = socket.socket(fileno=fd.take())
+        self.options['type'] = 'command'
+        return int(mtu)
+
+    def close(self):
+        if self.write_socket is not None:
+            self.write_socket.close()
+            self.write_socket = None
+
+
+class NotificationListener:
+    """Characteristic bildirimlerini (sinyal ya da AcquireNotify soketi) toplar"""
+
+    def __init__(self, bus, sender, chrc_path, callback):
+        self.bus = bus
+        self.chrc = dbus.Interface(bus.get_object(sender, chrc_path), GATT_CHRC_IFACE)
+        self.callback = callback
+        self.notify_socket = None
+        self.watch = None
+        self.match = bus.add_signal_receiver(
+            self.on_properties_changed, 'PropertiesChanged', DBUS_PROP_IFACE,
+            sender, chrc_path, byte_arrays=True)
+
+    def start_notify(self):
+        self.chrc.StartNotify()
+
+    def acquire_notify(self, mtu=247):
+        fd, mtu = self.chrc.AcquireNotify({'mtu': dbus.UInt16(mtu), 'link': 'LE'})
+        self.notify_socket = socket.socket(fileno=fd.take())
+        self.notify_socket.setblocking(False)
+        self.watch = GLib.io_add_watch(self.notify_socket.fileno(), GLib.PRIORITY_DEFAULT,
+                                       GLib.IO_IN, self.on_socket)
+
+    def on_properties_changed(self, interface, changed, invalidated):
+        if 'Value' in changed:
+            self.callback(bytes(changed['Value']))
+
+    def on_socket(self, fd, condition):
+        while True:
+            try:
+                value = self.notify_socket.recv(512)
+            except BlockingIOError:
+                return True
+            if not value:
+                return False
+            self.callback(value)
+
+    def close(self):
+        self.match.remove()
+        if self.watch is not None:
+            GLib.source_remove(self.watch)
+        if self.notify_socket is not None:
+            self.notify_socket.close()
+
+
+def wait_for(condition, timeout=10.0):
+    """GLib döngüsünü koşul sağlanana kadar döndürür"""
+    context = GLib.MainContext.default()
+    deadline = time.monotonic() + timeout
+    # Olay gelmese de zaman aşımı kontrol edilebilsin diye
+    timer = GLib.timeout_add(20, lambda: True)
+    try:
+        while not condition():
+            if time.monotonic() > deadline:
+                return False
+            context.iteration(True)
+        return True
+    finally:
+        GLib.source_remove(timer)
+
+
+def main():
+    private = PrivateBus()
+    adapter = FakeAdapter(private.bus)
+    print(f"🧪 Sahte BlueZ hazır: DBUS_SYSTEM_BUS_ADDRESS={private.address}")
+    try:
+        wait_for(lambda: adapter.application is not None, timeout=3600)
+        print(f"✅ Uygulama kaydedildi: {adapter.application}")
+        for path, (_, props) in adapter.characteristics.items():
+            print(f"   {path}: {props['UUID']} {list(map(str, props['Flags']))}")
+        GLib.MainLoop().run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        private.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,731 @@
+# Parçalı veri birleştirme motoru
+#
+# Parçalar her session için önceden ayrılmış, index ile adreslenen bir
+# listede tutulur ve tüm parçalar geldiğinde tek seferde birleştirilir.
+# Böylece binlerce parçalık yüklemelerde `+=` ile oluşan karesel maliyet
+# ortadan kalkar.
+#
+# Akış modunda session'a bir tüketici (consumer) verilir: sıradaki parçalar
+# geldikçe tüketiciye aktarılır ve hemen bellekten bırakılır; yalnızca sıra
+# dışı gelen parçalar boşluk dolana kadar tutulur. Tüketici feed(data),
+# close() ve abort() metotlarını sağlar; close() sonucu finish() ile döner.
+#
+# İkili çerçeve formatı (JSON zarfı yerine, aynı characteristic üzerinde):
+#
+#   magic (1) | flags (1) | sessionId (4) | chunkIndex (2) | totalChunks (2) | veri
+#
+# Tüm alanlar big-endian. İlk byte 0xB1 geçerli bir UTF-8 başlangıç byte'ı
+# olmadığı için JSON parçalarıyla karışmaz ve mod ilk byte'tan anlaşılır.
+#
+# Pencereli onay modu (JSON'da "ackMode": "window", ikili modda
+# FLAG_WINDOWED_ACK): her parça için OK_n yerine birkaç parçada bir
+#
+#   ACK_<sıradaki>[_<hex>]   <sıradaki>'ye kadar tüm parçalar alındı; hex bit
+#                            haritasında k. bit <sıradaki>+k parçasının eksik
+#                            olduğunu gösterir
+#   NACK_<i>,<j>,...         boşluk uzun süre dolmadı, bu parçaları tekrar gönder
+#
+# bildirimi gönderilir; istemci onay beklemeden parçaları art arda yazabilir.
+#
+# Birden fazla istemci aynı anda bağlıyken bildirimler tüm abonelere gider.
+# Etiketli bildirim modunda (JSON'da "notifyTag": true, ikili modda
+# FLAG_TAGGED_NOTIFY) mesajlar "<sessionId>:" önekiyle gönderilir, böylece
+# her istemci kendi session'ına ait bildirimleri ayırt edebilir.
+#
+# Sıkıştırılmış yükleme (JSON'da "compression": "zlib" ya da "deflate",
+# ikili modda FLAG_COMPRESSED = zlib, FLAG_COMPRESSED | FLAG_RAW_DEFLATE =
+# deflate): yük sıkıştırılıp parçalara bölünür.
+# JSON modunda her parçanın "data" alanı o parçanın base64 kodlanmış
+# byte'larıdır. Parçalar sırayla geldikçe zlib.decompressobj ile açılır;
+# açılan veri MAX_DECOMPRESSED_BYTES sınırını aşarsa session iptal edilir.
+#
+# Yüklemeye devam (bağlantı koptuktan sonra): istemci aynı sessionId ile
+# devam sorgusu gönderir (JSON'da {"sessionId": ..., "resume": true}, ikili
+# modda FLAG_RESUME_QUERY bayraklı, verisiz çerçeve). Sunucu
+#
+#   HAVE_<sıradaki>[_<hex>]  <sıradaki>'ye kadar tüm parçalar sunucuda; hex bit
+#                            haritasında k. bit <sıradaki>+k parçasının sunucuda
+#                            olduğunu gösterir (işaretsiz parçalar gönderilir)
+#   TAMAM                    session zaten tamamlandı
+#
+# ile yanıt verir (bilinmeyen session için HAVE_0); istemci yalnızca eksik
+# parçaları gönderir.
+#
+# Bütünlük kontrolü (isteğe bağlı):
+#
+#   CRC32     JSON'da "crc32": <sayı>, ikili modda FLAG_CHECKSUM ile verinin
+#             sonuna eklenen 4 byte (big-endian). Parçanın verisini (JSON
+#             modunda UTF-8 byte'ları, sıkıştırılmışsa base64 çözülmüş hali)
+#             kapsar. Uymayan parça saklanmaz, hemen NACK_<index> gönderilir.
+#   SHA-256   JSON'da "sha256": "<hex>", ikili modda FLAG_DIGEST ile verinin
+#             başına eklenen 32 byte. İlk parçayla gönderilir ve tüm parça
+#             verilerinin sırayla birleşimini kapsar. Özet, parçalar sırayla
+#             tüketiciye aktarılırken hesaplanır, ikinci bir geçiş gerekmez.
+#             Uymazsa program kaydedilmez, HATA gönderilir.
+#
+# Parça boyutu bağlantının MTU'suna göre seçilir: ATT yazma yükü MTU - 3
+# byte'tır. İkili modda bundan çerçeve başlığı, JSON modunda zarf düşülür;
+# JSON modunda "data" alanı yeniden kaçışlandığı için karakter sayısı
+# ayrıca yarıya indirilir.
+
+import hashlib
+import logging
+import struct
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+BINARY_FRAME_MAGIC = 0xB1
+BINARY_HEADER = struct.Struct('>BBIHH')
+
+# Yarım kalan yüklemeler için bellek sınırları
+SESSION_TTL = 60                       # saniye, son parçadan sonra
+MAX_BUFFERED_BYTES = 4 * 1024 * 1024   # tüm session'lar için toplam
+MAX_SESSIONS = 32
+MAX_TOTAL_CHUNKS = 65535
+
+FLAG_WINDOWED_ACK = 0x01
+FLAG_COMPRESSED = 0x02
+FLAG_TAGGED_NOTIFY = 0x04
+FLAG_RESUME_QUERY = 0x08
+FLAG_CHECKSUM = 0x10
+FLAG_DIGEST = 0x20
+FLAG_RAW_DEFLATE = 0x40       # FLAG_COMPRESSED ile: zlib başlığı olmayan deflate
+CRC_SIZE = 4
+DIGEST_SIZE = 32
+
+# Sıkıştırma adı -> zlib wbits
+COMPRESSION_WBITS = {"zlib": zlib.MAX_WBITS, "deflate": -zlib.MAX_WBITS}
+# Sıkıştırma bombalarına karşı açılan veri sınırı
+MAX_DECOMPRESSED_BYTES = 8 * 1024 * 1024
+DECOMPRESS_STEP = 64 * 1024
+
+# Pencereli onay ayarları
+ACK_EVERY = 8                 # bu kadar parçada bir ACK
+ACK_INTERVAL = 0.05           # saniye, bekleyen onaylar en geç bu sürede gider
+RETRANSMIT_TIMEOUT = 0.3      # saniye, boşluk bu kadar dolmazsa NACK
+MAX_NACK_RETRIES = 5          # yeni parça gelmezse en fazla bu kadar NACK
+ACK_BITMAP_BITS = 32
+MAX_NOTIFY_LEN = 20           # varsayılan ATT MTU (23) - 3
+MAX_NACK_MESSAGES = 4         # bir turda gönderilecek en fazla NACK bildirimi
+
+# MTU'ya göre parça boyutu
+DEFAULT_MTU = 23
+MAX_MTU = 517
+ATT_HEADER_SIZE = 3
+JSON_ENVELOPE_OVERHEAD = 80   # sessionId/chunkIndex/totalChunks alanları
+# Zarf tek pakete sığmıyorsa istemcinin varsayılanı (uzun yazma ile gider)
+DEFAULT_JSON_CHUNK = 80
+MAX_TRACKED_DEVICES = 16
+
+# Tüketiciye aktarılıp bellekten bırakılan parçaların yer tutucusu
+_CONSUMED = object()
+
+
+class ChunkError(Exception):
+    pass
+
+
+class DecompressingConsumer:
+    """Sıradaki sıkıştırılmış parçaları açıp asıl tüketiciye aktarır"""
+
+    def __init__(self, consumer=None, compression="zlib",
+                 max_output=MAX_DECOMPRESSED_BYTES):
+        wbits = COMPRESSION_WBITS.get(compression)
+        if wbits is None:
+            raise ChunkError(f"Desteklenmeyen sıkıştırma: {compression}")
+        self.consumer = consumer
+        self.decompressor = zlib.decompressobj(wbits)
+        self.max_output = max_output
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.parts = []
+        self.parts_size = 0
+
+    @property
+    def buffered_bytes(self):
+        if self.consumer is not None:
+            return getattr(self.consumer, 'buffered_bytes', 0)
+        return self.parts_size
+
+    def feed(self, data):
+        self.input_bytes += len(data)
+        decompressor = self.decompressor
+        if decompressor.eof:
+            raise ValueError("Sıkıştırılmış akış sonrasında fazladan veri")
+        # Çıktı adım adım üretilir, sınır aşılırsa tamamı hiç açılmaz
+        data = decompressor.decompress(data, DECOMPRESS_STEP)
+        while True:
+            self._emit(data)
+            if not decompressor.unconsumed_tail:
+                break
+            data = decompressor.decompress(decompressor.unconsumed_tail,
+                                           DECOMPRESS_STEP)
+        if decompressor.unused_data:
+            raise ValueError("Sıkıştırılmış akış sonrasında fazladan veri")
+
+    def _emit(self, data):
+        if not data:
+            return
+        self.output_bytes += len(data)
+        if self.output_bytes > self.max_output:
+            raise ValueError(
+                f"Açılan veri sınırı aşıldı ({self.max_output} byte)")
+        if self.consumer is not None:
+            self.consumer.feed(data)
+        else:
+            self.parts.append(data)
+            self.parts_size += len(data)
+
+    def close(self):
+        self._emit(self.decompressor.flush())
+        if not self.decompressor.eof:
+            raise ValueError("Sıkıştırılmış akış eksik")
+        if self.consumer is not None:
+            return self.consumer.close()
+        return b"".join(self.parts)
+
+    def abort(self):
+        self.parts = []
+        if self.consumer is not None:
+            self.consumer.abort()
+
+
+def fit_bitmap(message, bitmap, limit):
+    """Mesaja _<hex> bit haritasını ekler; limit byte'ı aşan yüksek bitler atılır"""
+    digits = limit - len(message) - 1
+    if digits > 0:
+        bitmap &= (1 << 4 * digits) - 1
+    else:
+        bitmap = 0
+    if bitmap:
+        return f"{message}_{bitmap:x}"
+    return message
+
+
+class ReassemblySession:
+    def __init__(self, session_id, total_chunks, consumer=None):
+        if not 0 < total_chunks <= MAX_TOTAL_CHUNKS:
+            raise ChunkError(f"Geçersiz parça sayısı: {total_chunks}")
+        self.session_id = session_id
+        self.total_chunks = total_chunks
+        self.chunks = [None] * total_chunks
+        # Parçaların CRC32'leri: tamamlandıktan sonra gelen tekrar parçalar
+        # yeni bir yüklemeden ayırt edilir
+        self.crcs = array('I', bytes(4 * total_chunks))
+        self.received_count = 0
+        self.received_bytes = 0
+        # Bekleyen parçalar + tüketicinin bellekte tuttuğu veri
+        self.buffered_bytes = 0
+        self.consumer_bytes = 0
+        # Reassembler toplamına en son eklenen değer
+        self.accounted_bytes = 0
+        # Parça ekleme ve tüketiciye aktarma bu kilitle sıralanır
+        self.lock = threading.Lock()
+        self.discarded = False
+        self.consumer = consumer
+        self.next_index = 0
+        self.highest_index = -1
+        self.started_at = time.monotonic()
+        self.last_chunk_at = self.started_at
+        # Önceki parçadan bu yana geçen süre (ilk parçada 0)
+        self.last_gap = 0.0
+        self.windowed = False
+        # Bildirimlere eklenecek önek (etiketli bildirim modu)
+        self.tag = None
+        self.unacked = 0
+        self.last_ack_at = self.started_at
+        self.last_nack_at = self.started_at
+        self.nack_count = 0
+        # SHA-256 özeti bildirildiyse parçalar sırayla eklenir
+        self.expected_digest = None
+        self.hasher = None
+
+    def expect_digest(self, digest):
+        if self.expected_digest is not None:
+            if digest != self.expected_digest:
+                raise ChunkError("SHA-256 özeti session içinde değişti")
+            return
+        if self.next_index > 0:
+            raise ChunkError("SHA-256 özeti ilk parçayla gönderilmeli")
+        self.expected_digest = digest
+        self.hasher = hashlib.sha256()
+
+    def add_chunk(self, chunk_index, data):
+        """Parçayı kaydeder; parça daha önce geldiyse False döner"""
+        if not 0 <= chunk_index < self.total_chunks:
+            raise ChunkError(
+                f"Geçersiz parça indeksi: {chunk_index}/{self.total_chunks}")
+        if self.chunks[chunk_index] is not None:
+            return False
+        self.chunks[chunk_index] = data
+        self.crcs[chunk_index] = chunk_crc(data)
+        self.received_count += 1
+        self.received_bytes += len(data)
+        self.buffered_bytes += len(data)
+        now = time.monotonic()
+        self.last_gap = now - self.last_chunk_at
+        self.last_chunk_at = now
+        self.nack_count = 0
+        if chunk_index > self.highest_index:
+            self.highest_index = chunk_index
+        if self.consumer is not None:
+            self.drain()
+        else:
+            while (self.next_index < self.total_chunks
+                   and self.chunks[self.next_index] is not None):
+                if self.hasher is not None:
+                    self.hasher.update(as_bytes(self.chunks[self.next_index]))
+                self.next_index += 1
+        return True
+
+    def drain(self):
+        # Sıradaki kesintisiz parçaları tüketiciye aktar ve bellekten bırak
+        chunks = self.chunks
+        while self.next_index < self.total_chunks:
+            data = chunks[self.next_index]
+            if data is None:
+                break
+            if self.hasher is not None:
+                self.hasher.update(as_bytes(data))
+            self.consumer.feed(data)
+            self.buffered_bytes -= len(data)
+            chunks[self.next_index] = _CONSUMED
+            self.next_index += 1
+        # Tüketicide biriken veri (açılmış metin, bellekteki kod) de sayılır
+        held = getattr(self.consumer, 'buffered_bytes', 0)
+        self.buffered_bytes += held - self.consumer_bytes
+        self.consumer_bytes = held
+
+    def is_complete(self):
+        return self.received_count == self.total_chunks
+
+    def missing_indices(self):
+        # Alınan en yüksek parçanın altında kalan boşluklar
+        return (i for i in range(self.next_index, self.highest_index)
+                if self.chunks[i] is None)
+
+    def ack_message(self, limit=MAX_NOTIFY_LEN):
+        """Kümülatif onay ve eksik parça bit haritası: ACK_<sıradaki>[_<hex>]
+
+        Mesaj limit byte'a sığmazsa bit haritasının yüksek bitleri atılır;
+        o eksikler sonraki onayda ya da NACK ile istenir.
+        """
+        self.unacked = 0
+        self.last_ack_at = time.monotonic()
+        bitmap = 0
+        for i in self.missing_indices():
+            if i - self.next_index >= ACK_BITMAP_BITS:
+                break
+            bitmap |= 1 << (i - self.next_index)
+        return fit_bitmap(f"ACK_{self.next_index}", bitmap, limit)
+
+    def resume_message(self, limit=MAX_NOTIFY_LEN):
+        """Devam sorgusu yanıtı: HAVE_<sıradaki>[_<hex>], bitler sunucudaki parçalar
+
+        Mesaj limit byte'a sığmazsa bit haritasının yüksek bitleri atılır;
+        istemci o parçaları eksik sayıp tekrar gönderir.
+        """
+        bitmap = 0
+        end = min(self.highest_index + 1, self.next_index + ACK_BITMAP_BITS)
+        for i in range(self.next_index + 1, end):
+            if self.chunks[i] is not None:
+                bitmap |= 1 << (i - self.next_index)
+        return fit_bitmap(f"HAVE_{self.next_index}", bitmap, limit)
+
+    def nack_messages(self, limit=MAX_NOTIFY_LEN, max_messages=MAX_NACK_MESSAGES):
+        """Eksik parçaların tekrar istenmesi: NACK_<i>,<j>,...
+
+        Her mesaj limit byte'a sığar; eksikler sığmazsa en fazla
+        max_messages mesaja bölünür, kalanlar sonraki turda istenir.
+        """
+        messages = []
+        message = ""
+        for i in self.missing_indices():
+            if message and len(message) + len(f",{i}") <= limit:
+                message += f",{i}"
+                continue
+            if message:
+                messages.append(message)
+                message = ""
+                if len(messages) >= max_messages:
+                    break
+            message = f"NACK_{i}"
+            if len(message) > limit:
+                # Tek indeks bile sığmıyor (çok uzun etiket)
+                message = ""
+                break
+        if message:
+            messages.append(message)
+        self.last_nack_at = time.monotonic()
+        self.nack_count += 1
+        return messages
+
+    def close(self):
+        if (self.hasher is not None
+                and self.hasher.digest() != self.expected_digest):
+            raise ChunkError("SHA-256 özeti uyuşmuyor")
+        # Akış modunda birleştirme yok, tüketici sonucu döner
+        if self.consumer is not None:
+            return self.consumer.close()
+        return self.join()
+
+    def abort(self):
+        if self.consumer is not None:
+            self.consumer.abort()
+
+    def join(self):
+        # str parçalar (JSON modu) ya da bytes/memoryview parçalar (ikili mod)
+        # tek seferde birleştirilir
+        if isinstance(self.chunks[0], str):
+            return "".join(self.chunks)
+        return b"".join(self.chunks)
+
+
+class ChunkReassembler:
+    def __init__(self, session_ttl=SESSION_TTL,
+                 max_buffered_bytes=MAX_BUFFERED_BYTES,
+                 max_sessions=MAX_SESSIONS, consumer_factory=None):
+        # En eski kullanılan session başta olacak şekilde LRU sırası
+        self.sessions = OrderedDict()
+        self.session_ttl = session_ttl
+        self.max_buffered_bytes = max_buffered_bytes
+        self.max_sessions = max_sessions
+        # Verilirse her yeni session için consumer_factory(session_id) çağrılır
+        self.consumer_factory = consumer_factory
+        self.buffered_bytes = 0
+        self.started_count = 0
+        self.evicted_count = 0
+        self.expired_count = 0
+        self.ack_count = 0
+        self.nack_count = 0
+        self.last_stats = None
+        # İş hattı işçileri ve ana döngüdeki temizlik zamanlayıcısı aynı
+        # session tablosuna eriştiği için
+        self.lock = threading.RLock()
+
+    def add_chunk(self, session_id, chunk_index, total_chunks, data,
+                  compression=None, digest=None):
+        """Parçayı ilgili session'a ekler, (session, yeni_mi) döner
+
+        compression verilirse ("zlib"/"deflate") session'ın parçaları
+        sırayla açılarak tüketiciye aktarılır. digest (SHA-256, 32 byte)
+        verilirse session tamamlanırken tüm veriyle karşılaştırılır.
+        """
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                consumer = None
+                if self.consumer_factory is not None:
+                    consumer = self.consumer_factory(session_id)
+                try:
+                    if compression is not None:
+                        consumer = DecompressingConsumer(consumer, compression)
+                    session = ReassemblySession(session_id, total_chunks, consumer)
+                except ChunkError:
+                    if consumer is not None:
+                        consumer.abort()
+                    raise
+                self.sessions[session_id] = session
+                self.started_count += 1
+            elif session.total_chunks != total_chunks:
+                raise ChunkError(
+                    f"Parça sayısı uyuşmuyor: {total_chunks} != {session.total_chunks}")
+            else:
+                self.sessions.move_to_end(session_id)
+
+        # Açma, JSON çözümü ve dosyaya yazma session kilidiyle yapılır; ana
+        # döngüdeki zamanlayıcılar ve diğer cihazların session'ları beklemez
+        with session.lock:
+            if session.discarded:
+                raise ChunkError(f"Session bellekten atıldı: {session_id}")
+            error = None
+            if digest is not None:
+                try:
+                    session.expect_digest(digest)
+                except ChunkError as e:
+                    # Geç gelen ya da değişen özet session'ı geçersiz kılar
+                    error = e
+            if error is None:
+                if len(data) > self.max_buffered_bytes - session.buffered_bytes:
+                    error = ChunkError(f"Session bellek sınırını aşıyor: {session_id}")
+                else:
+                    try:
+                        is_new = session.add_chunk(chunk_index, data)
+                    except ChunkError:
+                        raise
+                    except Exception as e:
+                        # Tüketici hatası (ör. bozuk JSON) session'ı geçersiz kılar
+                        error = e
+                    else:
+                        if session.buffered_bytes > self.max_buffered_bytes:
+                            error = ChunkError(
+                                f"Session bellek sınırını aşıyor: {session_id}")
+
+        if error is not None:
+            self.discard(session_id, session)
+            raise error
+
+        with self.lock:
+            evicted = []
+            if self.sessions.get(session_id) is session:
+                self.account(session)
+                evicted = self.enforce_limits()
+        self.abort_sessions(evicted)
+        if session.discarded:
+            raise ChunkError(f"Session bellekten atıldı: {session_id}")
+        return session, is_new
+
+    def account(self, session):
+        # Toplam, session'ın en son sayılan boyutuyla güncellenir (self.lock altında)
+        self.buffered_bytes += session.buffered_bytes - session.accounted_bytes
+        session.accounted_bytes = session.buffered_bytes
+
+    def note_unacked(self, session, limit=MAX_NOTIFY_LEN):
+        """Pencereli session'da onaylanmamış parçayı sayar; ACK zamanı geldiyse mesajı döner"""
+        with self.lock:
+            session.unacked += 1
+            if session.unacked >= ACK_EVERY:
+                self.ack_count += 1
+                return session.ack_message(limit)
+            return None
+
+    def due_acks(self, now=None, notify_limit=None):
+        """Zamanı gelen ACK/NACK mesajlarını (session, mesaj) çiftleri olarak döner
+
+        notify_limit(session) verilirse mesajlar session'ın bildirimine
+        sığacak byte sayısına göre (etiket öneki hariç) oluşturulur.
+        """
+        if now is None:
+            now = time.monotonic()
+        messages = []
+        with self.lock:
+            for session in self.sessions.values():
+                if not session.windowed:
+                    continue
+                limit = (notify_limit(session) if notify_limit is not None
+                         else MAX_NOTIFY_LEN)
+                if session.unacked and now - session.last_ack_at >= ACK_INTERVAL:
+                    self.ack_count += 1
+                    messages.append((session, session.ack_message(limit)))
+                elif (session.nack_count < MAX_NACK_RETRIES
+                      and now - session.last_chunk_at >= RETRANSMIT_TIMEOUT
+                      and now - session.last_nack_at >= RETRANSMIT_TIMEOUT):
+                    for message in session.nack_messages(limit):
+                        self.nack_count += 1
+                        messages.append((session, message))
+        return messages
+
+    def resume_message(self, session_id, limit=MAX_NOTIFY_LEN):
+        """Devam sorgusu yanıtı (HAVE_...); session bellekte yoksa None"""
+        with self.lock:
+            session = self.sessions.get(session_id)
+            return session.resume_message(limit) if session is not None else None
+
+    def rebind(self, old_id, new_id):
+        """Session'ı yeni anahtarla sürdürür (ör. istemci yeniden bağlandı)"""
+        with self.lock:
+            session = self.sessions.pop(old_id)
+            session.session_id = new_id
+            self.sessions[new_id] = session
+
+    def has_windowed_sessions(self):
+        with self.lock:
+            return any(session.windowed for session in self.sessions.values())
+
+    def enforce_limits(self):
+        # Sınır aşılırsa en uzun süredir parça gelmeyen session'lar atılır;
+        # en son kullanılan session (sondaki) her zaman korunur. self.lock
+        # altında çağrılır, atılanlar kilit dışında abort_sessions'a verilir.
+        evicted = []
+        while len(self.sessions) > 1 and (
+                self.buffered_bytes > self.max_buffered_bytes
+                or len(self.sessions) > self.max_sessions):
+            session_id = next(iter(self.sessions))
+            log.info("🧹 Session bellekten atıldı (LRU): %s", session_id)
+            evicted.append(self.pop(session_id))
+            self.evicted_count += 1
+        return evicted
+
+    def expire_sessions(self, now=None):
+        """TTL süresini aşan yarım session'ları siler, silinen sayısını döner"""
+        with self.lock:
+            if now is None:
+                now = time.monotonic()
+            expired = [session_id for session_id, session in self.sessions.items()
+                       if now - session.last_chunk_at > self.session_ttl]
+            sessions = []
+            for session_id in expired:
+                log.info("⌛ Session zaman aşımına uğradı: %s", session_id)
+                sessions.append(self.pop(session_id))
+            self.expired_count += len(expired)
+        self.abort_sessions(sessions)
+        return len(expired)
+
+    def finish(self, session_id):
+        """Tamamlanan session'ı birleştirir ve siler, (veri, istatistik) döner
+
+        Akış modunda veri yerine tüketicinin close() sonucu döner.
+        """
+        with self.lock:
+            session = self.pop(session_id)
+
+        join_started = time.monotonic()
+        with session.lock:
+            try:
+                data = session.close()
+            except Exception:
+                session.abort()
+                raise
+        finished_at = time.monotonic()
+
+        transfer_time = session.last_chunk_at - session.started_at
+        self.last_stats = {
+            "session_id": session_id,
+            "total_chunks": session.total_chunks,
+            "total_bytes": session.received_bytes,
+            "transfer_time": transfer_time,
+            "bytes_per_sec": (session.received_bytes / transfer_time
+                              if transfer_time > 0 else 0.0),
+            "reassembly_latency": finished_at - join_started,
+        }
+        if isinstance(session.consumer, DecompressingConsumer):
+            self.last_stats["decompressed_bytes"] = session.consumer.output_bytes
+        return data, self.last_stats
+
+    def pop(self, session_id):
+        # self.lock altında çağrılır; tüketici kilit dışında kapatılmalı
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self.buffered_bytes -= session.accounted_bytes
+            session.discarded = True
+        return session
+
+    def abort_sessions(self, sessions):
+        # Parça işleyen bir işçi varsa onun bitmesi beklenir (self.lock dışında)
+        for session in sessions:
+            with session.lock:
+                session.abort()
+
+    def discard(self, session_id, session=None):
+        """Session'ı siler; session verilirse yalnızca tablodaki o nesneyse"""
+        with self.lock:
+            if session is None or self.sessions.get(session_id) is session:
+                session = self.pop(session_id)
+            else:
+                # Başka bir iş parçacığı zaten sildi ve kapatıyor
+                session = None
+        if session is not None:
+            self.abort_sessions([session])
+
+    def counters(self):
+        with self.lock:
+            return {
+                "live_sessions": len(self.sessions),
+                "buffered_bytes": self.buffered_bytes,
+                "started_sessions": self.started_count,
+                "evicted_sessions": self.evicted_count,
+                "expired_sessions": self.expired_count,
+                "acks_sent": self.ack_count,
+                "nacks_sent": self.nack_count,
+            }
+
+
+class MtuTracker:
+    """Bağlı cihazların pazarlık edilen MTU'larını tutar (LRU, sınırlı)"""
+
+    def __init__(self, max_devices=MAX_TRACKED_DEVICES):
+        self.devices = OrderedDict()
+        self.max_devices = max_devices
+
+    def update(self, device, mtu):
+        """BlueZ'in options['mtu'] değerini kaydeder; MTU değiştiyse True döner"""
+        mtu = max(DEFAULT_MTU, min(int(mtu), MAX_MTU))
+        previous = self.devices.pop(device, None)
+        self.devices[device] = mtu
+        while len(self.devices) > self.max_devices:
+            self.devices.popitem(last=False)
+        return previous != mtu
+
+    def mtu(self, device):
+        return self.devices.get(device, DEFAULT_MTU)
+
+    def forget(self, device):
+        self.devices.pop(device, None)
+
+    def chunk_sizes(self, device):
+        """Cihaz için en uygun parça boyutlarını döner"""
+        mtu = self.mtu(device)
+        payload = mtu - ATT_HEADER_SIZE
+        return {
+            "mtu": mtu,
+            "binaryChunk": payload - BINARY_HEADER.size,
+            "jsonChunk": max(DEFAULT_JSON_CHUNK,
+                             (payload - JSON_ENVELOPE_OVERHEAD) // 2),
+        }
+
+
+def as_bytes(data):
+    # JSON modunda parçalar str'dir; özet ve CRC UTF-8 byte'ları üzerinden
+    return data.encode('utf-8') if isinstance(data, str) else data
+
+
+def chunk_crc(data):
+    return zlib.crc32(as_bytes(data))
+
+
+def split_integrity(payload, flags):
+    """İkili çerçeve verisinden özet ve CRC'yi ayırır, (veri, özet, crc) döner"""
+    digest = crc = None
+    if flags & FLAG_DIGEST:
+        if len(payload) < DIGEST_SIZE:
+            raise ChunkError("Çerçevede SHA-256 özeti eksik")
+        digest = bytes(payload[:DIGEST_SIZE])
+        payload = payload[DIGEST_SIZE:]
+    if flags & FLAG_CHECKSUM:
+        if len(payload) < CRC_SIZE:
+            raise ChunkError("Çerçevede CRC eksik")
+        crc = int.from_bytes(payload[-CRC_SIZE:], 'big')
+        payload = payload[:-CRC_SIZE]
+    return payload, digest, crc
+
+
+def frame_compression(flags):
+    """Çerçeve bayraklarından sıkıştırma adı ("zlib"/"deflate") ya da None"""
+    if not flags & FLAG_COMPRESSED:
+        return None
+    return "deflate" if flags & FLAG_RAW_DEFLATE else "zlib"
+
+
+def is_binary_frame(data):
+    return len(data) > 0 and data[0] == BINARY_FRAME_MAGIC
+
+
+def parse_binary_frame(data):
+    """İkili çerçeveyi çözer, (session_id, index, toplam, flags, veri) döner"""
+    if len(data) < BINARY_HEADER.size:
+        raise ChunkError(f"Çerçeve çok kısa: {len(data)} byte")
+    magic, flags, session_id, chunk_index, total_chunks = \
+        BINARY_HEADER.unpack_from(data)
+    if magic != BINARY_FRAME_MAGIC:
+        raise ChunkError(f"Geçersiz çerçeve başlangıcı: {magic:#04x}")
+    payload = memoryview(data)[BINARY_HEADER.size:]
+    return session_id, chunk_index, total_chunks, flags, payload
+
+
+def build_binary_frame(session_id, chunk_index, total_chunks, payload, flags=0):
+    return BINARY_HEADER.pack(BINARY_FRAME_MAGIC, flags, session_id,
+                              chunk_index, total_chunks) + bytes(payload)
+
+
+def format_stats(stats):
+    text = (f"{stats['total_chunks']} parça, {stats['total_bytes']} byte, "
+            f"{stats['bytes_per_sec']:.0f} byte/sn, "
+            f"birleştirme {stats['reassembly_latency'] * 1000:.2f} ms")
+    if "decompressed_bytes" in stats:
+        text += f", açılan {stats['decompressed_bytes']} byte"
+    return text
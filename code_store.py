@@ -0,0 +1,375 @@
+# Alınan programların içerik adresli olarak saklanması
+#
+# Her program içeriğinin SHA-256 özetiyle programs/<özet>.py olarak bir kez
+# yazılır; aynı kod tekrar yüklendiğinde diske hiç yazılmaz. received_code.py
+# son yüklenen programa işaret eden bir sembolik bağdır ve atomik olarak
+# değiştirilir. Session/yazar/açıklama bilgileri programs/index.jsonl
+# dosyasına toplu (batch) halde eklenir.
+#
+# Programların derlenmiş hali programs/__pycache__ altında tutulur
+# (compile_cache.py); compile() aynı programı ikinci kez derlemez.
+#
+# fsync politikası (SD kart gecikmesi için ayarlanabilir):
+#   "always" - her program, dizin ve index kaydı hemen diske zorlanır
+#   "batch"  - program verisi yayınlanmadan (os.replace) önce diske zorlanır;
+#              dizin ve index kayıtları toplu olarak zorlanır
+#   "never"  - fsync yapılmaz, işletim sistemine bırakılır
+#
+# Program dosyası yayınlanmadan önce fsync edildiği için çökmede yarım bir
+# programs/<özet>.py kalmaz. Yine de "never" politikası ya da eski sürümlerden
+# kalan bozuk dosyalar için: açılışta özete uymadığı kesin olan (boş) dosyalar
+# ve yarım kalmış geçici dosyalar silinir, aynı program tekrar yüklendiğinde
+# mevcut dosyanın özeti doğrulanır, bozuksa yeniden yazılır.
+
+import atexit
+import codecs
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from compile_cache import CompileCache
+
+log = logging.getLogger(__name__)
+
+EMPTY_DIGEST = hashlib.sha256(b"").hexdigest()
+DIGEST_NAME_RE = re.compile(r'[0-9a-f]{64}\.py')
+
+CODE_FILE = "received_code.py"
+STORE_DIR = "programs"
+FSYNC_POLICY = "batch"
+INDEX_BATCH_SIZE = 16
+# Bu boyuta kadar olan programlar özet belli olana kadar bellekte tutulur,
+# böylece tekrar yüklenen küçük programlar diske hiç dokunmaz
+SPOOL_LIMIT = 256 * 1024
+
+FSYNC_POLICIES = ("always", "batch", "never")
+
+# Blockly'den kaçışlı olarak gelen kod tek geçişte çözülür. Desteklenen
+# kaçışlar: \\ \' \" \b \f \n \r \t. "\\n" gibi diziler doğru şekilde ters
+# bölü + n olarak kalır; bilinmeyen kaçışlar (ör. düzenli ifadelerdeki \d)
+# olduğu gibi bırakılır.
+_CODE_ESCAPES = {
+    'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f',
+    "'": "'", '"': '"', '\\': '\\',
+}
+_CODE_ESCAPE_RE = re.compile(r'\\(.)', re.DOTALL)
+# codecs.escape_decode bu kümeyle aynı sonucu verir; metinde başka bir
+# kaçış (ya da sonda tek ters bölü) varsa tablo tabanlı yola düşülür
+_NON_TABLE_ESCAPE_RE = re.compile(r'\\(?:[^\\\'"bfnrt]|$)', re.DOTALL)
+
+
+def _replace_escape(match):
+    return _CODE_ESCAPES.get(match.group(1), match.group())
+
+
+def _has_non_table_escape(text):
+    match = _NON_TABLE_ESCAPE_RE.search(text)
+    while match is not None:
+        # "\\d" gibi eşleşmeler aslında "\\" kaçışından sonra gelen bir harftir
+        i = match.start()
+        run_start = i
+        while run_start > 0 and text[run_start - 1] == '\\':
+            run_start -= 1
+        if (i - run_start) % 2 == 0:
+            return True
+        match = _NON_TABLE_ESCAPE_RE.search(text, i + 1)
+    return False
+
+
+def unescape_code(text):
+    """Kaçış dizilerini tek geçişte, doğrusal sürede çözer"""
+    if '\\' not in text:
+        return text
+    if not _has_non_table_escape(text):
+        # Sık durum: C seviyesinde tek geçiş
+        return codecs.escape_decode(text.encode('utf-8'))[0].decode('utf-8')
+    return _CODE_ESCAPE_RE.sub(_replace_escape, text)
+
+
+def _ends_with_escape_start(text):
+    # Sondaki ters bölü, önünde çift sayıda ters bölü varsa yeni bir kaçış başlatır
+    run = len(text) - len(text.rstrip('\\'))
+    return run % 2 == 1
+
+
+class CodeUnescaper:
+    """Kaçış dizilerini parça sınırlarını gözeterek akış halinde çözer"""
+
+    def __init__(self):
+        self.pending = ""
+
+    def feed(self, text):
+        if self.pending:
+            text = self.pending + text
+        # Sonda yarım kalan kaçış bir sonraki parçanın ilk karakteriyle çözülür
+        if _ends_with_escape_start(text):
+            self.pending = '\\'
+            text = text[:-1]
+        else:
+            self.pending = ""
+        return unescape_code(text)
+
+    def flush(self):
+        pending, self.pending = self.pending, ""
+        return pending
+
+
+class ProgramWriter:
+    """Kodu özetini hesaplayarak toplar; close() ile depoya kaydeder"""
+
+    def __init__(self, store, unescape=True):
+        self.store = store
+        self.unescaper = CodeUnescaper() if unescape else None
+        self.hasher = hashlib.sha256()
+        self.parts = []
+        self.size = 0
+        self.file = None
+        self.tmp_path = None
+
+    def write(self, text):
+        if self.unescaper is not None:
+            text = self.unescaper.feed(text)
+        if text:
+            self._write(text.encode('utf-8'))
+
+    def _write(self, data):
+        self.hasher.update(data)
+        self.size += len(data)
+        if self.file is not None:
+            self.file.write(data)
+            return
+        self.parts.append(data)
+        if self.size > SPOOL_LIMIT:
+            # Bellek sınırı aşıldı, geçici dosyaya devam et
+            self.open_temp()
+            self.file.write(b"".join(self.parts))
+            self.parts = []
+
+    @property
+    def buffered_bytes(self):
+        # Geçici dosyaya geçildiyse bellekte veri kalmaz
+        return self.size if self.file is None else 0
+
+    def open_temp(self):
+        fd, self.tmp_path = tempfile.mkstemp(prefix='.', suffix='.part',
+                                             dir=self.store.root)
+        self.file = os.fdopen(fd, "wb")
+
+    def close(self):
+        """Programı depoya kaydeder, içerik özetini döner"""
+        if self.unescaper is not None:
+            tail = self.unescaper.flush()
+            if tail:
+                self._write(tail.encode('utf-8'))
+        return self.store.commit(self)
+
+    def abort(self):
+        self.parts = []
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            try:
+                os.remove(self.tmp_path)
+            except OSError:
+                pass
+
+
+class ProgramStore:
+    def __init__(self, root=STORE_DIR, current_path=CODE_FILE,
+                 fsync_policy=FSYNC_POLICY, index_batch_size=INDEX_BATCH_SIZE):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Geçersiz fsync politikası: {fsync_policy}")
+        self.root = root
+        self.current_path = current_path
+        self.index_path = os.path.join(root, "index.jsonl")
+        self.fsync_policy = fsync_policy
+        self.index_batch_size = index_batch_size
+        self.lock = threading.Lock()
+        self.pending_index = []
+        self.pending_sync = []
+        self.stored_count = 0
+        self.dedup_count = 0
+
+        os.makedirs(root, exist_ok=True)
+        self.digests = self.scan()
+        self.compiled = CompileCache(os.path.join(root, "__pycache__"))
+        atexit.register(self.flush_index)
+
+    def scan(self):
+        digests = set()
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith('.') and name.endswith('.part'):
+                # Kaydedilirken yarım kalmış geçici dosya
+                os.remove(path)
+            elif DIGEST_NAME_RE.fullmatch(name):
+                if os.path.getsize(path) == 0 and name[:-3] != EMPTY_DIGEST:
+                    log.warning("⚠️ Bozuk program dosyası silindi: %s", name)
+                    os.remove(path)
+                else:
+                    digests.add(name[:-3])
+        return digests
+
+    def blob_intact(self, digest, size):
+        """Kayıtlı program dosyası beklenen boyutta ve özette mi"""
+        path = self.blob_path(digest)
+        try:
+            if os.path.getsize(path) != size:
+                return False
+            hasher = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(65536), b''):
+                    hasher.update(block)
+        except OSError:
+            return False
+        return hasher.hexdigest() == digest
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, digest + '.py')
+
+    def compile(self, digest):
+        """Programın derleme sonucu (CompiledProgram); önbellekten gelebilir"""
+        return self.compiled.get(digest, self.blob_path(digest))
+
+    def current_digest(self):
+        """received_code.py'nin işaret ettiği programın özeti (yoksa None)"""
+        try:
+            target = os.readlink(self.current_path)
+        except OSError:
+            return None
+        return os.path.basename(target)[:-3]
+
+    def open_writer(self):
+        return ProgramWriter(self)
+
+    def save(self, code):
+        """Hazır kod metnini kaydeder, içerik özetini döner"""
+        writer = ProgramWriter(self, unescape=False)
+        writer.write(code)
+        return writer.close()
+
+    def commit(self, writer):
+        digest = writer.hasher.hexdigest()
+        with self.lock:
+            if digest in self.digests and not self.blob_intact(digest, writer.size):
+                log.warning("⚠️ Kayıtlı program bozuk, yeniden yazılıyor: %s", digest[:12])
+                self.digests.discard(digest)
+            if digest in self.digests:
+                # Aynı program zaten kayıtlı: diske yazma yok
+                writer.abort()
+                self.dedup_count += 1
+                log.info("♻️ Kod değişmemiş, yeniden yazılmadı: %s", digest[:12])
+            else:
+                self.write_blob(writer, digest)
+                self.digests.add(digest)
+                self.stored_count += 1
+                log.info("✅ Kod kaydedildi: %s (%d byte)", self.blob_path(digest), writer.size)
+            self.set_current(digest)
+        return digest
+
+    def write_blob(self, writer, digest):
+        if writer.file is None:
+            writer.open_temp()
+            writer.file.write(b"".join(writer.parts))
+            writer.parts = []
+        writer.file.flush()
+        # Veri diske inmeden dosya yayınlanırsa çökmede boş/yarım kalabilir
+        if self.fsync_policy != "never":
+            os.fsync(writer.file.fileno())
+        writer.file.close()
+        writer.file = None
+        os.chmod(writer.tmp_path, 0o444)
+
+        path = self.blob_path(digest)
+        os.replace(writer.tmp_path, path)
+        if self.fsync_policy == "always":
+            self.fsync_dir()
+        elif self.fsync_policy == "batch":
+            self.pending_sync.append(path)
+
+    def set_current(self, digest):
+        # received_code.py -> programs/<özet>.py (atomik değişim)
+        target = os.path.relpath(self.blob_path(digest),
+                                 os.path.dirname(os.path.abspath(self.current_path)))
+        try:
+            if os.readlink(self.current_path) == target:
+                return
+        except OSError:
+            pass
+        tmp_link = self.current_path + '.tmp'
+        try:
+            os.remove(tmp_link)
+        except OSError:
+            pass
+        os.symlink(target, tmp_link)
+        os.replace(tmp_link, self.current_path)
+
+    def record(self, digest, session_id=None, author=None, description=None):
+        """Programı index'e ekler; kayıtlar toplu halde dosyaya yazılır"""
+        entry = {
+            "digest": digest,
+            "session": session_id,
+            "author": author,
+            "description": description,
+            "time": time.time(),
+        }
+        with self.lock:
+            self.pending_index.append(entry)
+            flush = (self.fsync_policy == "always"
+                     or len(self.pending_index) >= self.index_batch_size)
+        if flush:
+            self.flush_index()
+
+    def has_pending(self):
+        return bool(self.pending_index or self.pending_sync)
+
+    def flush_index(self):
+        with self.lock:
+            entries, self.pending_index = self.pending_index, []
+            paths, self.pending_sync = self.pending_sync, []
+            if not entries and not paths:
+                return
+
+            if entries:
+                with open(self.index_path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(e, ensure_ascii=False) + "\n"
+                                    for e in entries))
+                    f.flush()
+                    if self.fsync_policy != "never":
+                        os.fsync(f.fileno())
+            # "batch": yeni programların dizin kayıtları tek seferde zorlanır
+            if paths and self.fsync_policy != "never":
+                self.fsync_dir()
+
+    def fsync_dir(self):
+        fd = os.open(self.root, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def lookup(self, **filters):
+        """index'te verilen alanlarla eşleşen kayıtları döner (ör. author="Ali")"""
+        self.flush_index()
+        entries = []
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if all(entry.get(k) == v for k, v in filters.items()):
+                        entries.append(entry)
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def counters(self):
+        return {
+            "stored_programs": self.stored_count,
+            "deduplicated_programs": self.dedup_count,
+            "pending_index": len(self.pending_index),
+        }
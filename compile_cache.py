@@ -0,0 +1,124 @@
+# Yüklenen programlar için bayt kodu önbelleği
+#
+# Programlar içerik özetiyle saklandığı için (code_store.py) özet aynı
+# zamanda derleme anahtarıdır: programs/__pycache__/<özet>.<cache_tag>.bin
+# dosyası programın compile() sonucunun marshal edilmiş halidir. Program
+# yüklendiği anda derlenir; sözdizimi hatası yükleme bildirimiyle birlikte
+# istemciye gönderilir. Aynı program tekrar yüklendiğinde ya da
+# çalıştırıldığında derleme yapılmaz: işçi yorumlayıcı (runner_worker.py)
+# kodu marshal ile doğrudan yükler.
+#
+# Bellekteki LRU son programların derleme sonucunu (marshal dosyası ya da
+# sözdizimi hatası) tutar; böylece bozuk bir program tekrar tekrar
+# yüklendiğinde de derlenmez. Kod nesneleri sunucu sürecinde tutulmaz, her
+# çalıştırma ayrı bir işçide olur. cache_tag (ör. cpython-311) marshal
+# biçimi yorumlayıcı sürümüne bağlı olduğu için dosya adına eklenir.
+
+import logging
+import marshal
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import REGISTRY
+
+log = logging.getLogger(__name__)
+
+MAX_MEMORY_ENTRIES = 64
+
+CACHE_HITS = REGISTRY.counter(
+    'compile_cache_hits_total', 'Bellekteki LRU\'dan karşılanan derlemeler')
+CACHE_DISK_HITS = REGISTRY.counter(
+    'compile_cache_disk_hits_total', 'Diskteki marshal dosyasından karşılanan derlemeler')
+COMPILES = REGISTRY.counter(
+    'compile_cache_compiles_total', 'Yapılan derlemeler')
+SYNTAX_ERRORS = REGISTRY.counter(
+    'compile_syntax_errors_total', 'Sözdizimi hatalı programlar')
+COMPILE_SECONDS = REGISTRY.histogram(
+    'compile_seconds', 'Bir programın derlenip diske yazılma süresi')
+
+
+class CompiledProgram:
+    def __init__(self, path=None, error=None):
+        # path: marshal dosyası; error: SyntaxError (path None olur)
+        self.path = path
+        self.error = error
+
+
+def syntax_message(error, limit):
+    """SyntaxError'ı en fazla limit byte'lık bildirim metnine çevirir:
+    SYNTAX_<satır>_<mesaj> (mesaj sığdığı kadar)"""
+    message = f"SYNTAX_{error.lineno or 0}_{error.msg}".encode('utf-8')[:limit]
+    # Kesilen çok byte'lı karakterin yarısı atılır
+    return message.decode('utf-8', 'ignore')
+
+
+class CompileCache:
+    def __init__(self, directory, max_entries=MAX_MEMORY_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        # özet -> CompiledProgram, en eski kullanılan başta (LRU)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, digest):
+        return os.path.join(self.directory,
+                            f'{digest}.{sys.implementation.cache_tag}.bin')
+
+    def get(self, digest, source_path):
+        """Programın derleme sonucunu döner; gerekirse derleyip diske yazar"""
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is not None:
+                self.entries.move_to_end(digest)
+                CACHE_HITS.inc()
+                return entry
+
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            CACHE_DISK_HITS.inc()
+            entry = CompiledProgram(path)
+        else:
+            entry = self.compile(source_path, path)
+
+        with self.lock:
+            self.entries[digest] = entry
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
+
+    def compile(self, source_path, path):
+        started = time.perf_counter()
+        # Hata ayıklama çıktısında dosya adı çalışma dizininden bağımsız olsun
+        source_path = os.path.abspath(source_path)
+        with open(source_path, 'rb') as f:
+            source = f.read()
+        COMPILES.inc()
+        try:
+            code = compile(source, source_path, 'exec')
+        except (SyntaxError, ValueError, MemoryError, RecursionError) as e:
+            if isinstance(e, (MemoryError, RecursionError)):
+                # Çok derin iç içe ifadeler derleyicinin sınırlarını aşar;
+                # sonuç önbelleğe alınır, tekrar yüklemede yeniden denenmez
+                e = SyntaxError("program derlenemeyecek kadar karmaşık")
+            elif not isinstance(e, SyntaxError):
+                # Eski sürümlerde boş byte ValueError verir
+                e = SyntaxError(str(e))
+            SYNTAX_ERRORS.inc()
+            log.info("⚠️ Sözdizimi hatası: %s (satır %s)", e.msg, e.lineno)
+            return CompiledProgram(error=e)
+
+        # Yarım yazılmış dosya okunmasın diye geçici dosya + os.replace
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            marshal.dump(code, f)
+        # İşçiler ayrıcalıksız kullanıcıyla okur (mkstemp 0600 açar)
+        os.chmod(tmp_path, 0o444)
+        os.replace(tmp_path, path)
+        COMPILE_SECONDS.observe(time.perf_counter() - started)
+        log.debug("🧩 Program derlendi: %s", os.path.basename(path))
+        return CompiledProgram(path)
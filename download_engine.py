@@ -0,0 +1,313 @@
+# Sunucudan istemciye toplu veri aktarımı (indirme)
+#
+# İstemci aynı characteristic'e bir indirme isteği yazar, sunucu kaynağı
+# MTU'ya göre bölünmüş, sıralı ikili bildirimler halinde gönderir:
+#
+#   {"download": "<kaynak>", "offset": 0, "window": 8}
+#
+#   magic (1) | id (2) | offset (4) | veri     0xB2, big-endian veri çerçevesi
+#   magic (1) | id (2) | 0xFFFFFFFF | boyut (4) | etiket (8)
+#                              akış başladı; etiket kaynağın sürümüdür
+#   DLEND_<id>                 son çerçeve gönderildi
+#   DLERR_<sebep>              NOTFOUND, CHANGED (etiket uymadı), UNKNOWN,
+#                              INVALID
+#
+# Başlangıç çerçevesi ve metin mesajları varsayılan 20 byte'lık bildirime
+# sığar. Etiket 16 hex karakterdir (program özetinin başı ya da dosyanın
+# mtime'ı); istemci devam isteğinde "etag" olarak aynı metni gönderir.
+#
+# Kaynaklar: "program" (son yüklenen program), "program:<özet>" ve "index"
+# (programs/index.jsonl). register() ile yeni kaynak türleri eklenebilir.
+#
+# Akış kontrolü: sunucu onaylanmamış en fazla "window" çerçeve gönderir.
+# İstemci aldığı kesintisiz byte sayısını onaylar, pencere ilerledikçe yeni
+# çerçeveler gönderilir:
+#
+#   {"downloadId": <id>, "ack": <offset>}                   onay
+#   {"downloadId": <id>, "ack": <offset>, "resend": true}   offset'ten tekrar
+#   {"downloadId": <id>, "cancel": true}                    iptal
+#
+# Bağlantı koptuğunda istemci isteği "offset" (ve "etag") ile tekrarlar;
+# kaynak baştan okunmaz, üreteç offset'ten başlar. Veri diskten parça parça
+# okunur, kaynak hiçbir zaman bütünüyle belleğe alınmaz.
+#
+# Taşıma katmanı UploadEngine'deki send/schedule metotlarına ek olarak
+# notify_size(device) (bir bildirimin taşıyabileceği byte sayısı) sağlar.
+
+import logging
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from log_setup import RATE_LIMITED
+from metrics import REGISTRY
+
+log = logging.getLogger(__name__)
+
+DOWNLOAD_FRAME_MAGIC = 0xB2
+DOWNLOAD_HEADER = struct.Struct('>BHI')
+# Başlangıç çerçevesi: offset alanı START_OFFSET, ardından boyut ve etiket
+START_OFFSET = 0xFFFFFFFF
+START_PAYLOAD = struct.Struct('>I8s')
+ETAG_SIZE = 8
+DEFAULT_WINDOW = 8
+MAX_WINDOW = 64
+MAX_STREAMS = 8
+STREAM_TTL = 60                 # saniye, son onaydan sonra
+READ_SIZE = 64 * 1024
+
+DOWNLOADS_STARTED = REGISTRY.counter(
+    'download_streams_started_total', 'Başlayan indirme akışları')
+DOWNLOADS_COMPLETED = REGISTRY.counter(
+    'download_streams_completed_total', 'Tamamı onaylanan indirme akışları')
+DOWNLOADS_ABANDONED = REGISTRY.counter(
+    'download_streams_abandoned_total', 'İptal edilen, atılan ya da zaman aşımına uğrayan akışlar')
+DOWNLOAD_BYTES = REGISTRY.counter(
+    'download_bytes_sent_total', 'İndirme çerçeveleriyle gönderilen veri (byte)')
+LIVE_DOWNLOADS = REGISTRY.gauge(
+    'download_live_streams', 'Açık indirme akışları')
+
+
+class DownloadError(Exception):
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class Resource:
+    """İndirilebilir kaynak: boyut, sürüm etiketi ve offset'ten okuyan üreteç"""
+
+    def __init__(self, size, etag, reader):
+        self.size = size
+        # En fazla 16 hex karakter (başlangıç çerçevesinde 8 byte)
+        self.etag = etag
+        # reader(offset, chunk_size) -> parça üreteci
+        self.reader = reader
+
+
+def read_file(path, offset, chunk_size):
+    """Dosyayı offset'ten itibaren chunk_size'lık parçalar halinde üretir"""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        buffer = b''
+        while True:
+            data = f.read(READ_SIZE)
+            if not data:
+                break
+            buffer += data
+            while len(buffer) >= chunk_size:
+                yield buffer[:chunk_size]
+                buffer = buffer[chunk_size:]
+        if buffer:
+            yield buffer
+
+
+def file_resource(path, etag=None):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise DownloadError('NOTFOUND')
+    if etag is None:
+        etag = f'{stat.st_mtime_ns & 0xFFFFFFFFFFFFFFFF:016x}'
+    path = os.path.realpath(path)
+    return Resource(stat.st_size, etag,
+                    lambda offset, chunk_size: read_file(path, offset, chunk_size))
+
+
+def is_download_frame(data):
+    return len(data) > 0 and data[0] == DOWNLOAD_FRAME_MAGIC
+
+
+def is_download_request(json_data):
+    return "download" in json_data or "downloadId" in json_data
+
+
+class DownloadStream:
+    def __init__(self, stream_id, device, resource, offset, window, chunk_size):
+        self.stream_id = stream_id
+        self.device = device
+        self.resource = resource
+        self.window = window
+        self.chunk_size = chunk_size
+        self.acked = offset
+        self.sent = offset
+        self.chunks = resource.reader(offset, chunk_size)
+        self.finished = False
+        self.touched_at = time.monotonic()
+        # Onaylar farklı işçilerden gelebilir (cihaz adı değişince); üreteç
+        # aynı anda yalnızca bir iş parçacığında ilerletilir
+        self.lock = threading.RLock()
+
+    def rewind(self, offset):
+        # Kayıp bildirimler: üreteç onaylanan offset'ten yeniden başlar
+        self.chunks.close()
+        self.chunks = self.resource.reader(offset, self.chunk_size)
+        self.sent = offset
+        self.finished = False
+
+    def close(self):
+        with self.lock:
+            self.chunks.close()
+
+
+class DownloadEngine:
+    def __init__(self, transport, program_store):
+        self.transport = transport
+        self.program_store = program_store
+        self.resources = {
+            "program": self.open_program,
+            "index": self.open_index,
+        }
+        # id -> DownloadStream, en eski kullanılan başta (LRU)
+        self.streams = OrderedDict()
+        self.next_id = 1
+        self.lock = threading.Lock()
+        LIVE_DOWNLOADS.track(lambda: len(self.streams))
+
+    def register(self, kind, opener):
+        """opener(argüman) -> Resource; "kind:argüman" isteklerinde çağrılır"""
+        self.resources[kind] = opener
+
+    def open_program(self, digest):
+        if not digest:
+            digest = self.program_store.current_digest()
+        if digest is None or not all(c in '0123456789abcdef' for c in digest):
+            raise DownloadError('NOTFOUND')
+        return file_resource(self.program_store.blob_path(digest),
+                             digest[:ETAG_SIZE * 2])
+
+    def open_index(self, _):
+        self.program_store.flush_index()
+        return file_resource(self.program_store.index_path)
+
+    def open_resource(self, name):
+        kind, _, argument = str(name).partition(':')
+        opener = self.resources.get(kind)
+        if opener is None:
+            raise DownloadError('NOTFOUND')
+        return opener(argument)
+
+    def handle_request(self, request, device=''):
+        try:
+            if "download" in request:
+                self.start_stream(request, device)
+            else:
+                self.handle_ack(request, device)
+        except DownloadError as e:
+            log.warning("⚠️ İndirme reddedildi: %s (%s)", e.reason,
+                        request.get("download", request.get("downloadId")),
+                        extra=RATE_LIMITED)
+            self.send_message(f"DLERR_{e.reason}", device)
+        except (TypeError, ValueError) as e:
+            log.warning("⚠️ Geçersiz indirme isteği: %s", e, extra=RATE_LIMITED)
+            self.send_message("DLERR_INVALID", device)
+
+    def start_stream(self, request, device):
+        resource = self.open_resource(request["download"])
+        etag = request.get("etag")
+        if etag is not None and str(etag).lower() != resource.etag:
+            raise DownloadError('CHANGED')
+        offset = min(max(int(request.get("offset", 0)), 0), resource.size)
+        window = min(max(int(request.get("window", DEFAULT_WINDOW)), 1), MAX_WINDOW)
+        chunk_size = self.transport.notify_size(device) - DOWNLOAD_HEADER.size
+        with self.lock:
+            stream_id = self.next_id
+            self.next_id = self.next_id % 0xFFFF + 1
+            old = self.streams.pop(stream_id, None)
+            if old is not None:
+                old.close()
+            stream = DownloadStream(stream_id, device, resource, offset, window,
+                                    chunk_size)
+            self.streams[stream_id] = stream
+            while len(self.streams) > MAX_STREAMS:
+                _, oldest = self.streams.popitem(last=False)
+                oldest.close()
+                DOWNLOADS_ABANDONED.inc()
+                log.info("🗑️ En eski indirme akışı atıldı: %d", oldest.stream_id)
+        DOWNLOADS_STARTED.inc()
+        log.info("📤 İndirme başladı: %s (%d byte, offset %d, id %d)",
+                 request["download"], resource.size, offset, stream_id)
+        self.send_start(stream, device)
+        with stream.lock:
+            self.pump(stream)
+
+    def handle_ack(self, request, device):
+        stream_id = int(request["downloadId"])
+        with self.lock:
+            stream = self.streams.get(stream_id)
+            if stream is None:
+                raise DownloadError('UNKNOWN')
+            self.streams.move_to_end(stream_id)
+            if request.get("cancel"):
+                del self.streams[stream_id]
+        if request.get("cancel"):
+            stream.close()
+            DOWNLOADS_ABANDONED.inc()
+            log.info("🛑 İndirme iptal edildi: %d", stream_id)
+            return
+        with stream.lock:
+            # Yeniden bağlanan istemcinin cihaz adı değişmiş olabilir
+            stream.device = device
+            stream.touched_at = time.monotonic()
+            ack = min(max(int(request.get("ack", stream.acked)), 0), stream.resource.size)
+            if request.get("resend"):
+                stream.acked = ack
+                stream.rewind(ack)
+            elif ack > stream.acked:
+                stream.acked = min(ack, stream.sent)
+            if stream.acked < stream.resource.size:
+                self.pump(stream)
+                return
+        with self.lock:
+            self.streams.pop(stream_id, None)
+        stream.close()
+        DOWNLOADS_COMPLETED.inc()
+        log.info("✅ İndirme tamamlandı: %d", stream_id)
+
+    def pump(self, stream):
+        # Pencere dolana ya da kaynak bitene kadar çerçeve gönderilir
+        limit = stream.acked + stream.window * stream.chunk_size
+        while not stream.finished and stream.sent < limit:
+            chunk = next(stream.chunks, None)
+            if chunk is None:
+                # Dosya akış sırasında kısaldı
+                stream.finished = True
+                self.send_message(f"DLEND_{stream.stream_id}", stream.device)
+                break
+            header = DOWNLOAD_HEADER.pack(DOWNLOAD_FRAME_MAGIC, stream.stream_id,
+                                          stream.sent)
+            self.transport.send(stream.device, header + chunk)
+            log.debug("📤 İndirme çerçevesi: %d @%d (%d byte)",
+                      stream.stream_id, stream.sent, len(chunk))
+            stream.sent += len(chunk)
+            DOWNLOAD_BYTES.inc(len(chunk))
+            if stream.sent >= stream.resource.size:
+                stream.finished = True
+                self.send_message(f"DLEND_{stream.stream_id}", stream.device)
+
+    def expire_streams(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            expired = [stream for stream in self.streams.values()
+                       if now - stream.touched_at > STREAM_TTL]
+            for stream in expired:
+                del self.streams[stream.stream_id]
+        for stream in expired:
+            stream.close()
+            DOWNLOADS_ABANDONED.inc()
+            log.info("⏰ İndirme akışı zaman aşımına uğradı: %d", stream.stream_id)
+        return len(expired)
+
+    def send_start(self, stream, device):
+        # Boyut ve etiket ikili gönderilir: metin hali bildirime sığmaz
+        header = DOWNLOAD_HEADER.pack(DOWNLOAD_FRAME_MAGIC, stream.stream_id,
+                                      START_OFFSET)
+        payload = START_PAYLOAD.pack(stream.resource.size,
+                                     bytes.fromhex(stream.resource.etag))
+        self.transport.send(device, header + payload)
+
+    def send_message(self, message, device):
+        self.transport.send(device, message.encode('utf-8'))
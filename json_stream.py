@@ -0,0 +1,278 @@
+# Artımlı (akış halinde) JSON çözücü
+#
+# Parçalar sırayla geldikçe UTF-8 çözümü ve JSON ayrıştırması yapılır.
+# Üst seviye nesnenin seçilen string alanları (ör. "code") bellekte
+# biriktirilmeden doğrudan bir hedefe (dosyaya) akıtılır; diğer alanlar
+# küçük olduğu için toplanıp normal şekilde çözülür. Son parçadan sonra
+# yalnızca belgenin kapandığı kontrol edilir, tüm belge yeniden
+# ayrıştırılmaz.
+#
+# Hedef (sink) nesneleri write(text), close() ve abort() metotlarını
+# sağlamalıdır. close() yalnızca belge eksiksiz çözüldüğünde çağrılır ve
+# dönüş değeri çözülen nesnede ilgili alanın değeri olur. Hedefin
+# buffered_bytes özelliği varsa bellekte tuttuğu veri çözücünün
+# buffered_bytes değerine eklenir (session bellek bütçesine sayılır).
+#
+# Hedefe akıtılmayan alanlar (anahtarlar dahil) en fazla MAX_FIELD_SIZE
+# karakter olabilir; daha uzunu JSONDecodeError ile reddedilir. Hedefe
+# akıtılan alanın değeri string değilse de JSONDecodeError verilir.
+
+import codecs
+import json
+import re
+
+MAX_FIELD_SIZE = 4096
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRING_TEXT = re.compile(r'[^"\\]+')
+_RAW_SPECIAL = re.compile(r'["{}\[\],]')
+_RAW_STRING_SPECIAL = re.compile(r'["\\]')
+
+_ESCAPES = {
+    '"': '"', '\\': '\\', '/': '/',
+    'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t',
+}
+
+# Ayrıştırıcı durumları
+(_OBJECT_START, _KEY_OR_END, _KEY, _KEY_STRING, _COLON, _VALUE,
+ _STRING_VALUE, _RAW_VALUE, _COMMA_OR_END, _DONE) = range(10)
+
+
+class StreamingJSONDecoder:
+    def __init__(self, field_sinks=None):
+        # alan adı -> hedef fabrikası (parametresiz çağrılır)
+        self.field_sinks = field_sinks or {}
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ""
+        self.state = _OBJECT_START
+        self.fields = {}
+        self.key = None
+        self.parts = []
+        # Hedefsiz alan için toplanan metin uzunluğu
+        self.field_size = 0
+        self.sink = None
+        self.sinks = {}
+        self.raw_depth = 0
+        self.raw_in_string = False
+
+    def feed(self, data):
+        """Sıradaki parçayı (bytes ya da str) ayrıştırıcıya verir"""
+        if not isinstance(data, str):
+            data = self.decoder.decode(data)
+        buf = self.buf + data if self.buf else data
+        pos = self._parse(buf, 0)
+        self.buf = buf[pos:]
+
+    def close(self):
+        """Belgenin tamamlandığını doğrular, çözülen alanları döner"""
+        tail = self.decoder.decode(b"", final=True)
+        if tail:
+            self.feed(tail)
+        if self.state != _DONE or self.buf.strip():
+            raise json.JSONDecodeError("Eksik JSON belgesi", self.buf, len(self.buf))
+        for key, sink in self.sinks.items():
+            self.fields[key] = sink.close()
+        return self.fields
+
+    def abort(self):
+        for sink in self.sinks.values():
+            sink.abort()
+        self.sinks = {}
+
+    @property
+    def buffered_bytes(self):
+        """Çözücünün ve hedeflerin bellekte tuttuğu yaklaşık veri miktarı"""
+        held = len(self.buf) + self.field_size
+        for sink in self.sinks.values():
+            held += getattr(sink, 'buffered_bytes', 0)
+        return held
+
+    def _error(self, message, buf, pos):
+        raise json.JSONDecodeError(message, buf, pos)
+
+    def _parse(self, buf, pos):
+        n = len(buf)
+        while pos < n:
+            state = self.state
+
+            if state == _KEY_STRING or state == _STRING_VALUE:
+                start = pos
+                pos, done = self._scan_string(buf, pos)
+                if self.sink is None:
+                    self._hold(pos - start, buf, pos)
+                elif self.parts:
+                    self.sink.write("".join(self.parts))
+                    self.parts.clear()
+                if not done:
+                    break
+                self._end_string()
+                continue
+
+            if state == _RAW_VALUE:
+                start = pos
+                pos, done = self._scan_raw(buf, pos)
+                self._hold(pos - start, buf, pos)
+                if not done:
+                    break
+                self.fields[self.key] = json.loads("".join(self.parts))
+                self.parts.clear()
+                self.field_size = 0
+                self.state = _COMMA_OR_END
+                continue
+
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos >= n:
+                break
+            c = buf[pos]
+
+            if state == _OBJECT_START:
+                if c != '{':
+                    self._error("JSON nesnesi bekleniyordu", buf, pos)
+                self.state = _KEY_OR_END
+            elif state == _KEY_OR_END or state == _KEY:
+                if c == '"':
+                    self.state = _KEY_STRING
+                elif c == '}' and state == _KEY_OR_END:
+                    self.state = _DONE
+                else:
+                    self._error("Alan adı bekleniyordu", buf, pos)
+            elif state == _COLON:
+                if c != ':':
+                    self._error("':' bekleniyordu", buf, pos)
+                self.state = _VALUE
+            elif state == _VALUE:
+                if c == '"':
+                    self._start_string_value()
+                elif self.key in self.field_sinks:
+                    # Hedefe akıtılan alanlar yalnızca string olabilir
+                    self._error(f"'{self.key}' alanı string olmalı", buf, pos)
+                else:
+                    # Sayı, true/false/null, nesne ya da dizi: ham metin toplanır
+                    self.state = _RAW_VALUE
+                    self.raw_depth = 0
+                    self.raw_in_string = False
+                    continue
+            elif state == _COMMA_OR_END:
+                if c == ',':
+                    self.state = _KEY
+                elif c == '}':
+                    self.state = _DONE
+                else:
+                    self._error("',' ya da '}' bekleniyordu", buf, pos)
+            else:
+                self._error("Belge sonunda fazladan veri", buf, pos)
+            pos += 1
+        return pos
+
+    def _start_string_value(self):
+        self.state = _STRING_VALUE
+        factory = self.field_sinks.get(self.key)
+        if factory is not None:
+            if self.key in self.sinks:
+                raise json.JSONDecodeError(f"Tekrarlanan alan: {self.key}", "", 0)
+            self.sink = factory()
+            self.sinks[self.key] = self.sink
+
+    def _hold(self, size, buf, pos):
+        self.field_size += size
+        if self.field_size > MAX_FIELD_SIZE:
+            self._error(f"Alan çok uzun (en fazla {MAX_FIELD_SIZE} karakter)",
+                        buf, pos)
+
+    def _end_string(self):
+        text = "".join(self.parts)
+        self.parts.clear()
+        self.field_size = 0
+        if self.state == _KEY_STRING:
+            self.key = text
+            self.state = _COLON
+        else:
+            if self.sink is None:
+                self.fields[self.key] = text
+            self.sink = None
+            self.state = _COMMA_OR_END
+
+    def _scan_string(self, buf, pos):
+        # Kaçış dizisi parça sınırında bölünmüşse kalan kısım bir sonraki
+        # parçayı bekler
+        n = len(buf)
+        parts = self.parts
+        while pos < n:
+            m = _STRING_TEXT.match(buf, pos)
+            if m is not None:
+                parts.append(m.group())
+                pos = m.end()
+                continue
+            if buf[pos] == '"':
+                return pos + 1, True
+            if pos + 1 >= n:
+                break
+            escape = buf[pos + 1]
+            if escape != 'u':
+                char = _ESCAPES.get(escape)
+                if char is None:
+                    self._error(f"Geçersiz kaçış dizisi: \\{escape}", buf, pos)
+                parts.append(char)
+                pos += 2
+                continue
+            if pos + 6 > n:
+                break
+            code = self._hex(buf, pos)
+            if 0xD800 <= code < 0xDC00:
+                # Yüksek vekil: ardından düşük vekil gelebilir
+                if pos + 12 > n and buf.startswith('\\u'[:n - pos - 6], pos + 6):
+                    break
+                if buf.startswith('\\u', pos + 6):
+                    low = self._hex(buf, pos + 6)
+                    if 0xDC00 <= low < 0xE000:
+                        parts.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                        pos += 12
+                        continue
+            parts.append(chr(code))
+            pos += 6
+        return pos, False
+
+    def _hex(self, buf, pos):
+        try:
+            return int(buf[pos + 2:pos + 6], 16)
+        except ValueError:
+            self._error("Geçersiz \\u kaçış dizisi", buf, pos)
+
+    def _scan_raw(self, buf, pos):
+        # Değerin sonu: derinlik 0'da gelen ',' ya da '}' (tüketilmez)
+        n = len(buf)
+        start = pos
+        done = False
+        while pos < n:
+            if self.raw_in_string:
+                m = _RAW_STRING_SPECIAL.search(buf, pos)
+                if m is None:
+                    pos = n
+                    break
+                pos = m.start()
+                if buf[pos] == '\\':
+                    if pos + 1 >= n:
+                        break
+                    pos += 2
+                    continue
+                self.raw_in_string = False
+                pos += 1
+                continue
+            m = _RAW_SPECIAL.search(buf, pos)
+            if m is None:
+                pos = n
+                break
+            pos = m.start()
+            c = buf[pos]
+            if c == '"':
+                self.raw_in_string = True
+            elif c == '{' or c == '[':
+                self.raw_depth += 1
+            elif self.raw_depth == 0:
+                done = True
+                break
+            elif c != ',':
+                self.raw_depth -= 1
+            pos += 1
+        self.parts.append(buf[start:pos])
+        return pos, done
@@ -0,0 +1,146 @@
+# Sunucu günlük kaydı
+#
+# Modüller kayıtlarını logging.getLogger(__name__) ile üretir. setup_logging()
+# kök logger'a kayıtları yalnızca bir kuyruğa koyan bir handler bağlar;
+# biçimlendirme ve konsola yazma ayrı bir iş parçacığındaki QueueListener'da
+# yapılır. Böylece yavaş bir konsol (SSH, journald) parça işlemeyi
+# yavaşlatmaz. Kuyruk doluysa kayıt beklenmeden atılır ve sayılır.
+#
+# Parça başına kayıtlar DEBUG seviyesindedir ve %-argümanlarıyla yazılır:
+# seviye kapalıyken maliyet tek bir seviye kontrolüdür, mesaj hiç
+# biçimlendirilmez. Her parçada tekrarlanabilecek uyarılar extra=RATE_LIMITED
+# ile işaretlenir; aynı mesaj şablonu saniyede RATE_LIMIT kezden fazla
+# yazılmaz, bastırılan kayıtların sayısı bir sonraki kayda eklenir.
+#
+# İki çıktı biçimi vardır: okunabilir metin ve satır başına bir JSON nesnesi
+# (extra ile verilen alanlar JSON'a ayrı anahtarlar olarak eklenir).
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+
+RATE_LIMITED = {"rate_limited": True}
+RATE_LIMIT = 10             # aralık başına aynı şablondan en fazla kayıt
+RATE_INTERVAL = 1.0         # saniye
+LOG_QUEUE_SIZE = 10000
+TEXT_FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+
+_listener = None
+
+# LogRecord'un kendi alanları; JSON çıktısında bunların dışındakiler extra'dır
+RECORD_FIELDS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'rate_limited', 'suppressed'}
+
+
+class RateLimitFilter(logging.Filter):
+    """extra=RATE_LIMITED ile işaretli kayıtları şablon başına sınırlar"""
+
+    def __init__(self, rate=RATE_LIMIT, interval=RATE_INTERVAL):
+        super().__init__()
+        self.rate = rate
+        self.interval = interval
+        # (logger, şablon) -> [pencere başlangıcı, yazılan, bastırılan]
+        self.windows = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if not getattr(record, 'rate_limited', False):
+            return True
+        key = (record.name, record.msg)
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or record.created - window[0] >= self.interval:
+                if window is not None and window[2]:
+                    record.suppressed = window[2]
+                self.windows[key] = [record.created, 1, 0]
+                return True
+            if window[1] < self.rate:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Kuyruk doluysa beklemeden kaydı atar"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Aynı süreç içinde kalan kuyruk: biçimlendirme dinleyici iş
+        # parçacığına bırakılır
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record):
+        text = super().format(record)
+        if getattr(record, 'suppressed', 0):
+            text += f" ({record.suppressed} benzer kayıt bastırıldı)"
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_FIELDS:
+                entry[key] = value
+        if getattr(record, 'suppressed', 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level=logging.INFO, fmt='text', stream=None):
+    """Kök logger'ı kuyruk tabanlı handler ile kurar"""
+    global _listener
+    stop_logging()
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+
+    handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    # Sınırlama çağıran iş parçacığında yapılır, bastırılan kayıt kuyruğa girmez
+    handler.addFilter(RateLimitFilter())
+
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(handler.queue, output)
+    _listener.start()
+
+
+def stop_logging():
+    """Kuyrukta kalan kayıtları yazar ve dinleyiciyi durdurur"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# Çıkışta kuyrukta kalan kayıtlar yazılır
+atexit.register(stop_logging)
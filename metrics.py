@@ -0,0 +1,125 @@
+# Prometheus metin biçiminde ölçümler
+#
+# Sayaçlar, göstergeler ve histogramlar süreç genelindeki REGISTRY'de
+# tutulur; render() tümünü Prometheus'un metin biçiminde (0.0.4) döner.
+# Dış bağımlılık yoktur. Sıcak yolda bir ölçüm, kilit altında bir toplama
+# (histogramda ayrıca bisect) kadar tutar; göstergeler ve motorların kendi
+# tuttuğu sayaçlar track() ile verilen fonksiyonlarla yalnızca okuma
+# (scrape) anında hesaplanır.
+#
+# Uç nokta (HTTP, GLib döngüsü üzerinde) metrics_endpoint.py içindedir.
+
+import bisect
+import threading
+
+# Saniye cinsinden histogram sınırları
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SLOW_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+        # track() ile eklenen, değeri okuma anında veren fonksiyonlar
+        self.sources = []
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def track(self, func):
+        self.sources.append(func)
+
+    def get(self):
+        return self.value + sum(func() for func in self.sources)
+
+    def samples(self):
+        yield self.name, self.get()
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value):
+        with self.lock:
+            self.value = value
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=FAST_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        # Son eleman +Inf kovası
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def samples(self):
+        with self.lock:
+            counts = list(self.counts)
+            total = self.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            yield f'{self.name}_bucket{{le="{format_value(float(bound))}"}}', cumulative
+        yield f'{self.name}_sum', total
+        yield f'{self.name}_count', cumulative
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        # Aynı isimle ikinci kayıt ilkini döner (birden fazla motor aynı
+        # ölçümleri paylaşır)
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text):
+        return self.register(Counter(name, help_text))
+
+    def gauge(self, name, help_text):
+        return self.register(Gauge(name, help_text))
+
+    def histogram(self, name, help_text, buckets=FAST_BUCKETS):
+        return self.register(Histogram(name, help_text, buckets))
+
+    def render(self):
+        lines = []
+        with self.lock:
+            metrics = list(self.metrics.values())
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, value in metric.samples():
+                lines.append(f'{name} {format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
@@ -0,0 +1,134 @@
+# Ölçümler için GLib döngüsü üzerinde çalışan küçük HTTP uç noktası
+#
+# Ayrı iş parçacığı açmaz: dinleyen soket ve istemci bağlantıları
+# GLib.io_add_watch ile ana döngüye bağlanır. Her istek için REGISTRY'nin
+# Prometheus metin çıktısı döner ve bağlantı kapatılır. Yanıt engellemeyen
+# soketle, soket yazılabilir oldukça gönderilir; yavaş okuyan bir istemci
+# döngüyü (BLE işlemlerini) bekletmez, SEND_TIMEOUT sonunda bırakılır.
+# Adres "host:port" (varsayılan 127.0.0.1) ya da bir Unix soket dosyası
+# olabilir:
+#
+#   python3 raspberry_pi_ble_server.py --metrics 127.0.0.1:9105
+#   curl http://127.0.0.1:9105/metrics
+#   curl --unix-socket /tmp/ble_metrics.sock http://localhost/metrics
+
+import logging
+import os
+import socket
+
+from gi.repository import GLib
+
+from metrics import REGISTRY
+
+log = logging.getLogger(__name__)
+
+DEFAULT_METRICS_PORT = 9105
+MAX_REQUEST_SIZE = 4096
+SEND_TIMEOUT = 5        # saniye, yanıtın tamamı bu sürede gönderilmeli
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def open_listener(address):
+    """Adres '/' içeriyorsa Unix soket, değilse TCP (host:port) dinler"""
+    if '/' in address:
+        # Önceki çalıştırmadan kalan soket dosyası
+        if os.path.exists(address):
+            os.remove(address)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(address)
+    else:
+        host, _, port = address.rpartition(':')
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host or '127.0.0.1', int(port or DEFAULT_METRICS_PORT)))
+    sock.listen(8)
+    sock.setblocking(False)
+    return sock
+
+
+class ResponseWriter:
+    """Yanıtı soket yazılabilir oldukça gönderir, bitince bağlantıyı kapatır"""
+
+    def __init__(self, client, data):
+        self.client = client
+        self.data = memoryview(data)
+        self.watch = GLib.io_add_watch(client.fileno(), GLib.PRIORITY_LOW,
+                                       GLib.IO_OUT | GLib.IO_HUP | GLib.IO_ERR,
+                                       self.on_writable)
+        self.timer = GLib.timeout_add_seconds(SEND_TIMEOUT, self.on_timeout)
+
+    def on_writable(self, fd, condition):
+        if not condition & (GLib.IO_HUP | GLib.IO_ERR):
+            try:
+                sent = self.client.send(self.data)
+            except BlockingIOError:
+                return True
+            except OSError as e:
+                log.warning("⚠️ Ölçüm yanıtı gönderilemedi: %s", e)
+            else:
+                self.data = self.data[sent:]
+                if self.data:
+                    return True
+        GLib.source_remove(self.timer)
+        self.client.close()
+        return False
+
+    def on_timeout(self):
+        log.warning("⚠️ Ölçüm yanıtı %d saniyede gönderilemedi", SEND_TIMEOUT)
+        GLib.source_remove(self.watch)
+        self.client.close()
+        return False
+
+
+class MetricsEndpoint:
+    def __init__(self, address, registry=REGISTRY):
+        self.registry = registry
+        self.sock = open_listener(address)
+        self.watch = GLib.io_add_watch(self.sock.fileno(), GLib.PRIORITY_LOW,
+                                       GLib.IO_IN, self.on_accept)
+        log.info("📈 Ölçüm uç noktası: %s", address)
+
+    def on_accept(self, fd, condition):
+        try:
+            client, _ = self.sock.accept()
+        except BlockingIOError:
+            return True
+        client.setblocking(False)
+        GLib.io_add_watch(client.fileno(), GLib.PRIORITY_LOW,
+                          GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR,
+                          self.on_request, client, bytearray())
+        return True
+
+    def on_request(self, fd, condition, client, request):
+        try:
+            data = client.recv(MAX_REQUEST_SIZE)
+        except BlockingIOError:
+            return True
+        except OSError:
+            data = b''
+        request += data
+        if data and b'\r\n\r\n' not in request and len(request) < MAX_REQUEST_SIZE:
+            # İstek başlıkları henüz tamamlanmadı
+            return True
+        if data:
+            self.respond(client, bytes(request))
+        else:
+            client.close()
+        return False
+
+    def respond(self, client, request):
+        method, _, rest = request.partition(b' ')
+        path = rest.split(b' ', 1)[0].split(b'?', 1)[0]
+        if method != b'GET':
+            status, body = '405 Method Not Allowed', b''
+        elif path not in (b'/', b'/metrics'):
+            status, body = '404 Not Found', b''
+        else:
+            status, body = '200 OK', self.registry.render().encode('utf-8')
+        header = (f'HTTP/1.0 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n'
+                  f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n')
+        ResponseWriter(client, header.encode('ascii') + body)
+
+    def close(self):
+        GLib.source_remove(self.watch)
+        self.sock.close()
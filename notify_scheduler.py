@@ -0,0 +1,128 @@
+# Bildirim zamanlayıcısı: abonelik kontrolü, birleştirme ve hız sınırı
+#
+# BLE bağlantısı bağlantı aralığı başına ancak birkaç bildirim taşıyabilir;
+# fazlası BlueZ'de kuyruğa girer ya da düşer. Zamanlayıcı bildirimleri bir
+# jeton kovasıyla (NOTIFY_RATE/sn, en fazla NOTIFY_BURST art arda) gönderir.
+# Kova doluyken gelen bildirim beklemeden gider; taşan bildirimler sıraya
+# girer ve COALESCE_WINDOW aralıklarla boşaltılır (rate=0: hız sınırı yok).
+# Sırada beklerken aynı akıştaki (cihaz + etiket) mesajlar anlamı
+# bozulmadan birleştirilir:
+#
+#   ACK_... ve HAVE_...    kümülatiftir, bekleyen eskisinin yerine geçer
+#   TAMAM / HATA           bekleyen OK_/ACK_ mesajlarını gereksiz kılar
+#   aynı mesaj             (ör. tekrar gelen parçanın OK_n'i) bir kez gider
+#
+# OK_n ve ikili çerçeveler (indirme, program çıktısı) birleştirilmez: her
+# biri ayrı bir parçadır.
+# Abone yoksa (StartNotify/AcquireNotify yapılmamış) bildirim hiç
+# gönderilmeden atılır.
+
+import time
+
+from metrics import REGISTRY
+
+NOTIFY_RATE = 100               # bildirim/sn (~15 ms bağlantı aralığında 1-2 paket)
+NOTIFY_BURST = 8
+COALESCE_WINDOW = 0.01          # saniye
+PROGRESS_PREFIXES = ('ACK_', 'HAVE_')
+FINAL_MESSAGES = ('TAMAM', 'HATA')
+
+NOTIFICATIONS_SENT = REGISTRY.counter(
+    'ble_notifications_sent_total', 'Bağlantıya gönderilen bildirimler')
+NOTIFICATIONS_COALESCED = REGISTRY.counter(
+    'ble_notifications_coalesced_total', 'Sırada birleştirilen (gönderilmeyen) bildirimler')
+NOTIFICATIONS_DROPPED = REGISTRY.counter(
+    'ble_notifications_dropped_total', 'Abone olmadığı için atılan bildirimler')
+
+
+class PendingNotification:
+    def __init__(self, stream, message, value):
+        self.stream = stream
+        self.message = message
+        self.value = value
+
+
+class NotificationScheduler:
+    """Tek bir ana döngüden (GLib) kullanılır; kilit gerekmez"""
+
+    def __init__(self, emit, schedule, is_subscribed, rate=NOTIFY_RATE,
+                 burst=NOTIFY_BURST, window=COALESCE_WINDOW):
+        # emit(value) bildirimi gönderir, schedule(interval, callback)
+        # taşıma katmanının zamanlayıcısıdır, is_subscribed() abone var mı
+        self.emit = emit
+        self.schedule = schedule
+        self.is_subscribed = is_subscribed
+        self.rate = rate
+        self.burst = burst
+        self.window = window
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.pending = []
+        self.timer = False
+
+    def submit(self, device, value):
+        if not self.is_subscribed():
+            NOTIFICATIONS_DROPPED.inc()
+            return
+        if not self.pending and self.take_token():
+            self.send(value)
+            return
+        self.enqueue(device, value)
+        if not self.timer:
+            self.timer = True
+            self.schedule(self.window, self.flush)
+
+    def enqueue(self, device, value):
+        if not value or value[0] >= 0x80:
+            # İkili çerçeve (0xB2, 0xB3); protokol mesajları ASCII'dir
+            self.pending.append(PendingNotification(None, None, value))
+            return
+        # Etiketli mesajlarda "<etiket>:" öneki akışı belirler; mesajın
+        # kendisi ':' içerebilir (ör. SYNTAX_), önek ilk ':'e kadardır
+        text = bytes(value).decode('utf-8', 'replace')
+        tag, separator, message = text.partition(':')
+        if not separator:
+            tag, message = '', text
+        stream = (device, tag)
+        if message in FINAL_MESSAGES:
+            # Session bitti: bekleyen ara onaylar artık gereksiz
+            self.drop_pending(stream, lambda m: m.startswith(('OK_', 'ACK_')))
+        elif message.startswith(PROGRESS_PREFIXES):
+            kind = message.split('_', 1)[0] + '_'
+            self.drop_pending(stream, lambda m: m.startswith(kind))
+        else:
+            self.drop_pending(stream, lambda m: m == message)
+        self.pending.append(PendingNotification(stream, message, value))
+
+    def drop_pending(self, stream, matches):
+        kept = [p for p in self.pending
+                if p.stream != stream or not matches(p.message)]
+        if len(kept) != len(self.pending):
+            NOTIFICATIONS_COALESCED.inc(len(self.pending) - len(kept))
+            self.pending = kept
+
+    def take_token(self):
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def flush(self):
+        if not self.is_subscribed():
+            NOTIFICATIONS_DROPPED.inc(len(self.pending))
+            self.pending = []
+        while self.pending and self.take_token():
+            self.send(self.pending.pop(0).value)
+        if not self.pending:
+            self.timer = False
+            return False
+        return True
+
+    def send(self, value):
+        self.emit(value)
+        NOTIFICATIONS_SENT.inc()
@@ -0,0 +1,353 @@
+# Alınan programların yalıtılmış çalıştırılması (sıcak yorumlayıcı havuzu)
+#
+# Yüklemede "run": true verilirse program TAMAM bildiriminden hemen sonra
+# çalıştırılır. Her program ayrı bir işçi süreçte (runner_worker.py) çalışır.
+# POOL_SIZE kadar işçi önceden başlatılır ve PRELOAD_MODULES'u içe aktarıp
+# bekler; program geldiğinde yorumlayıcı açılışı beklenmez, iş satırı boştaki
+# işçiye yazılır ve havuz arkadan yeniden doldurulur. Boşta işçi yoksa
+# (ör. art arda çalıştırmalar) soğuk başlatılır.
+#
+# Çalıştırıcı isteğe bağlıdır (sunucuda --runner-pool) ve kimliği
+# doğrulanmamış BLE istemcilerinin kod çalıştırmasına izin verir; bu yüzden
+# programlar ayrılmış, ayrıcalıksız bir kullanıcıyla (run_as, ör. "blerun")
+# çalışır. Sunucu root ise run_as verilmeden havuz başlatılmaz.
+#
+# Sınırlar: CPU süresi ve bellek (RLIMIT_CPU, RLIMIT_AS), yazılabilecek
+# dosya boyutu (RLIMIT_FSIZE), süreç sayısı (RLIMIT_NPROC; varsayılan 0,
+# program yeni süreç ya da iş parçacığı açamaz) ve duvar saati (süre dolunca
+# süreç grubu öldürülür). Program her çalıştırmada kendisine ait yeni bir
+# geçici dizinde çalışır, stdin'i kapalıdır; dosya sistemine run_as
+# kullanıcısının izinleri kadar erişir.
+#
+# Bildirimler (yükleme session'ı etiketliyse "<etiket>:" önekiyle; önekle
+# bildirime sığmayan mesaj etiketsiz gönderilir, durum metni kesilmez):
+#
+#   RUN_<id>                çalıştırma başladı
+#   magic (1) | id (2) | offset (4) | veri   0xB3, stdout/stderr çerçevesi
+#   OUTFULL_<id>            canlı çıktı sınırı aşıldı; kalan çıktı yalnızca
+#                           dosyaya yazılır ("output:<id>" olarak indirilir)
+#   EXIT_<id>_<durum>       çıkış kodu ya da TIMEOUT, CPU, MEMORY, OUTPUT,
+#                           STOPPED, SIG<n>
+#   RUNERR_<sebep>          DISABLED, NOCODE, BUSY, UNKNOWN, FAILED
+#
+# Derlenmiş kod (compile_cache.py) verilirse işçi programı derlemez, kod
+# nesnesini marshal ile yükler.
+#
+# Çalışan program {"runStop": <id>} ile durdurulur.
+
+import json
+import logging
+import os
+import pwd
+import shutil
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from download_engine import DownloadError, file_resource
+from metrics import REGISTRY, SLOW_BUCKETS
+
+log = logging.getLogger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'runner_worker.py')
+RUN_DIR = "runs"
+POOL_SIZE = 2
+MAX_RUNNING = 2
+CPU_SECONDS = 10
+MEMORY_BYTES = 256 * 1024 * 1024
+FILE_SIZE_BYTES = 16 * 1024 * 1024
+WALL_SECONDS = 30
+MAX_TASKS = 0                       # run_as kullanıcısının ek süreç/iş parçacığı sınırı
+PRELOAD_MODULES = ('json', 'math', 'random', 'time')
+LIVE_OUTPUT_LIMIT = 32 * 1024       # bildirimlerle gönderilen çıktı
+MAX_OUTPUT_BYTES = 1024 * 1024      # dosyaya yazılan çıktı; aşılırsa öldürülür
+MAX_KEPT_OUTPUTS = 16
+READ_SIZE = 4096
+OUTPUT_FRAME_MAGIC = 0xB3
+OUTPUT_HEADER = struct.Struct('>BHI')
+EXIT_MEMORY = 3                     # runner_worker.py ile aynı
+
+RUNS_STARTED = REGISTRY.counter(
+    'runner_runs_started_total', 'Başlatılan programlar')
+COLD_STARTS = REGISTRY.counter(
+    'runner_cold_starts_total', 'Boşta işçi olmadığı için soğuk başlatılan programlar')
+RUNS_KILLED = REGISTRY.counter(
+    'runner_runs_killed_total', 'Sınır aşımı ya da istekle durdurulan programlar')
+FIRST_OUTPUT_SECONDS = REGISTRY.histogram(
+    'runner_first_output_seconds', 'Çalıştırma isteğinden ilk çıktıya kadar geçen süre')
+RUN_SECONDS = REGISTRY.histogram(
+    'runner_run_seconds', 'Programın çalışma süresi', SLOW_BUCKETS)
+IDLE_WORKERS = REGISTRY.gauge(
+    'runner_idle_workers', 'Hazır bekleyen işçi yorumlayıcılar')
+RUNNING = REGISTRY.gauge(
+    'runner_running', 'Çalışan programlar')
+
+
+class Run:
+    def __init__(self, run_id, device, tag, transport, process, workdir, output_path):
+        self.run_id = run_id
+        self.device = device
+        self.tag = tag
+        self.transport = transport
+        self.process = process
+        self.workdir = workdir
+        self.output_path = output_path
+        self.streamed = 0
+        self.written = 0
+        # Süreci sunucu öldürdüyse sebebi (çıkış kodu yerine bildirilir)
+        self.reason = None
+        self.started_at = time.perf_counter()
+
+
+def message_tag(message, tag, size):
+    """Mesaj "<etiket>:" önekiyle size byte'a sığıyorsa etiketi, yoksa None döner
+
+    Etiketsiz RUN_/EXIT_/OUTFULL_/RUNERR_ mesajları en küçük bildirime
+    (20 byte) de sığar; çalıştırma id'si istemcinin mesajı eşlemesine yeter.
+    """
+    if tag is not None and len(f"{tag}:{message}".encode('utf-8')) > size:
+        return None
+    return tag
+
+
+def exit_status(returncode):
+    if returncode == EXIT_MEMORY:
+        return 'MEMORY'
+    if returncode == -signal.SIGXCPU:
+        return 'CPU'
+    if returncode < 0:
+        return f'SIG{-returncode}'
+    return str(returncode)
+
+
+class ProgramRunner:
+    def __init__(self, pool_size=POOL_SIZE, preload=PRELOAD_MODULES,
+                 directory=RUN_DIR, cpu_seconds=CPU_SECONDS,
+                 memory_bytes=MEMORY_BYTES, wall_seconds=WALL_SECONDS,
+                 max_running=MAX_RUNNING, run_as=None, max_tasks=MAX_TASKS):
+        self.uid = self.gid = None
+        if run_as is not None:
+            entry = pwd.getpwnam(run_as)
+            if entry.pw_uid == 0:
+                raise PermissionError("Programlar root olarak çalıştırılamaz")
+            self.uid, self.gid = entry.pw_uid, entry.pw_gid
+        elif os.geteuid() == 0:
+            raise PermissionError("Sunucu root olarak çalışıyor; çalıştırıcı için "
+                                  "ayrıcalıksız bir kullanıcı (run_as) gerekli")
+        self.max_tasks = max_tasks
+        self.pool_size = pool_size
+        self.preload = list(preload)
+        self.directory = os.path.abspath(directory)
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.wall_seconds = wall_seconds
+        self.max_running = max_running
+        self.idle = []
+        # id -> Run (çalışanlar)
+        self.runs = {}
+        # id -> çıktı dosyası, en eskisi başta
+        self.outputs = OrderedDict()
+        self.next_id = 1
+        self.closed = False
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        IDLE_WORKERS.track(lambda: len(self.idle))
+        RUNNING.track(lambda: len(self.runs))
+
+    def start(self):
+        """Havuzu doldurur (sunucu açılışını geciktirmemek için ayrı çağrılır)"""
+        with self.lock:
+            self.fill()
+        log.info("🐍 Program çalıştırıcı hazır: %d işçi", self.pool_size)
+
+    def spawn(self):
+        # Yeni süreç grubu: süre dolunca programın alt süreçleri de öldürülür
+        return subprocess.Popen([sys.executable, '-u', WORKER_SCRIPT] + self.preload,
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, start_new_session=True)
+
+    def fill(self):
+        # self.lock altında çağrılır; Popen yorumlayıcının açılmasını beklemez
+        self.idle = [p for p in self.idle if p.poll() is None]
+        while not self.closed and len(self.idle) < self.pool_size:
+            self.idle.append(self.spawn())
+
+    def take_idle(self):
+        # self.lock altında çağrılır; ölmüş işçiler atlanır
+        while self.idle:
+            process = self.idle.pop(0)
+            if process.poll() is None:
+                return process
+        COLD_STARTS.inc()
+        return self.spawn()
+
+    def run(self, path, device, transport, tag=None, compiled=None):
+        """Programı boştaki bir işçide başlatır; çalıştırma no'sunu döner"""
+        requested_at = time.perf_counter()
+        with self.lock:
+            busy = self.closed or len(self.runs) >= self.max_running
+            if not busy:
+                process = self.take_idle()
+                run_id = self.next_id
+                self.next_id = self.next_id % 0xFFFF + 1
+        if busy:
+            log.warning("⚠️ Çalıştırma reddedildi: çalışan program sınırı (%d)",
+                        self.max_running)
+            self.send_message(transport, device, tag, "RUNERR_BUSY")
+            return None
+
+        workdir = tempfile.mkdtemp(prefix=f'{run_id}-', dir=self.directory)
+        if self.uid is not None:
+            # Program yalnızca kendi dizinine yazabilir
+            os.chown(workdir, self.uid, self.gid)
+        job = {"path": os.path.abspath(path), "cwd": workdir,
+               "cpu": self.cpu_seconds, "memory": self.memory_bytes,
+               "fsize": FILE_SIZE_BYTES, "nproc": self.max_tasks,
+               "uid": self.uid, "gid": self.gid,
+               "compiled": compiled and os.path.abspath(compiled)}
+        try:
+            process.stdin.write(json.dumps(job).encode('utf-8') + b'\n')
+            process.stdin.close()
+        except OSError as e:
+            log.error("❌ İşçiye iş gönderilemedi: %s", e)
+            process.kill()
+            process.wait()
+            shutil.rmtree(workdir, ignore_errors=True)
+            self.send_message(transport, device, tag, "RUNERR_FAILED")
+            return None
+
+        run = Run(run_id, device, tag, transport, process, workdir,
+                  os.path.join(self.directory, f'{run_id}.out'))
+        with self.lock:
+            self.runs[run_id] = run
+            # Kullanılan işçinin yerine yenisi açılır
+            self.fill()
+        RUNS_STARTED.inc()
+        log.info("▶️ Program çalıştırılıyor: %s (id %d, pid %d)",
+                 os.path.basename(path), run_id, process.pid)
+        self.send_message(transport, device, tag, f"RUN_{run_id}")
+        threading.Thread(target=self.watch, args=(run, requested_at),
+                         name=f'run-{run_id}', daemon=True).start()
+        return run_id
+
+    def watch(self, run, requested_at):
+        timer = threading.Timer(self.wall_seconds, self.kill, (run, 'TIMEOUT'))
+        timer.daemon = True
+        timer.start()
+        fd = run.process.stdout.fileno()
+        with open(run.output_path, 'wb') as out:
+            while True:
+                try:
+                    data = os.read(fd, READ_SIZE)
+                except OSError:
+                    data = b''
+                if not data:
+                    break
+                if run.written == 0:
+                    FIRST_OUTPUT_SECONDS.observe(time.perf_counter() - requested_at)
+                if run.written < MAX_OUTPUT_BYTES:
+                    out.write(data[:MAX_OUTPUT_BYTES - run.written])
+                    out.flush()
+                run.written += len(data)
+                if run.written > MAX_OUTPUT_BYTES:
+                    self.kill(run, 'OUTPUT')
+                self.stream(run, data)
+        returncode = run.process.wait()
+        timer.cancel()
+        run.process.stdout.close()
+        shutil.rmtree(run.workdir, ignore_errors=True)
+        RUN_SECONDS.observe(time.perf_counter() - run.started_at)
+
+        with self.lock:
+            self.runs.pop(run.run_id, None)
+            self.outputs.pop(run.run_id, None)
+            self.outputs[run.run_id] = run.output_path
+            while len(self.outputs) > MAX_KEPT_OUTPUTS:
+                _, old_path = self.outputs.popitem(last=False)
+                try:
+                    os.remove(old_path)
+                except FileNotFoundError:
+                    pass
+        status = run.reason or exit_status(returncode)
+        log.info("⏹️ Program bitti: id %d, durum %s, %d byte çıktı",
+                 run.run_id, status, run.written)
+        self.send_message(run.transport, run.device, run.tag,
+                          f"EXIT_{run.run_id}_{status}")
+
+    def stream(self, run, data):
+        # Çıktı canlı olarak bildirim boyutunda çerçevelerle gönderilir
+        if run.streamed >= LIVE_OUTPUT_LIMIT:
+            return
+        data = data[:LIVE_OUTPUT_LIMIT - run.streamed]
+        size = run.transport.notify_size(run.device) - OUTPUT_HEADER.size
+        for start in range(0, len(data), size):
+            piece = data[start:start + size]
+            header = OUTPUT_HEADER.pack(OUTPUT_FRAME_MAGIC, run.run_id, run.streamed)
+            run.transport.send(run.device, header + piece)
+            run.streamed += len(piece)
+        if run.streamed >= LIVE_OUTPUT_LIMIT:
+            self.send_message(run.transport, run.device, run.tag,
+                              f"OUTFULL_{run.run_id}")
+
+    def kill(self, run, reason):
+        if run.process.poll() is not None:
+            return
+        run.reason = run.reason or reason
+        RUNS_KILLED.inc()
+        log.warning("⚠️ Program durduruldu: id %d (%s)", run.run_id, reason)
+        try:
+            os.killpg(run.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def stop(self, run_id):
+        """Çalışan programı durdurur; böyle bir program yoksa False döner"""
+        with self.lock:
+            run = self.runs.get(run_id)
+        if run is None:
+            return False
+        self.kill(run, 'STOPPED')
+        return True
+
+    def open_output(self, argument):
+        # İndirme kaynağı "output:<id>": çalışan ya da son bitmiş programların çıktısı
+        try:
+            run_id = int(argument)
+        except ValueError:
+            raise DownloadError('NOTFOUND')
+        with self.lock:
+            run = self.runs.get(run_id)
+            path = run.output_path if run is not None else self.outputs.get(run_id)
+        if path is None:
+            raise DownloadError('NOTFOUND')
+        return file_resource(path)
+
+    def send_message(self, transport, device, tag, message):
+        tag = message_tag(message, tag, transport.notify_size(device))
+        if tag is not None:
+            message = f"{tag}:{message}"
+        transport.send(device, message.encode('utf-8'))
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            runs = list(self.runs.values())
+        for process in idle:
+            # stdin kapanınca boştaki işçi iş beklemeden çıkar
+            process.stdin.close()
+        for run in runs:
+            self.kill(run, 'STOPPED')
+        for process in idle:
+            try:
+                process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+            process.stdout.close()
@@ -5,11 +5,31 @@ import dbus.exceptions
 import dbus.mainloop.glib
 import dbus.service
 import array
+import argparse
+import functools
 import json
+import logging
+import os
+import socket
+import sys
 import threading
 import time
+from collections import OrderedDict
 from gi.repository import GLib
 
+from chunk_engine import (ATT_HEADER_SIZE, COMPRESSION_WBITS, DEFAULT_MTU,
+                          MAX_TOTAL_CHUNKS, MAX_TRACKED_DEVICES, MtuTracker)
+from code_store import ProgramStore
+from log_setup import RATE_LIMITED, setup_logging
+from metrics import REGISTRY
+from notify_scheduler import NOTIFY_RATE, NotificationScheduler
+from upload_engine import UploadEngine
+
+log = logging.getLogger('ble_server')
+
+WRITE_VALUE_SECONDS = REGISTRY.histogram(
+    'ble_write_value_seconds', 'WriteValue (ya da AcquireWrite paketi) işleme süresi')
+
 # D-Bus ana döngüsünü ayarla
 dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
 
@@ -24,6 +44,35 @@ GATT_DESC_IFACE = 'org.bluez.GattDescriptor1'
 LE_ADVERTISING_MANAGER_IFACE = 'org.bluez.LEAdvertisingManager1'
 LE_ADVERTISEMENT_IFACE = 'org.bluez.LEAdvertisement1'
 
+# Hızlı başlatmada adapter yolu buradan okunur
+ADAPTER_CACHE = '.ble_adapter'
+
+def check_bluetooth_status():
+    """Bluetooth durumunu kontrol et (--debug ile çalışır)"""
+    log.info("🔍 Bluetooth durum kontrolü")
+    try:
+        import subprocess
+
+        # Bluetooth servis durumu
+        result = subprocess.run(['systemctl', 'is-active', 'bluetooth'],
+                                capture_output=True, text=True)
+        log.info("📡 Bluetooth servisi: %s", result.stdout.strip())
+
+        # HCI durumu
+        result = subprocess.run(['hciconfig'], capture_output=True, text=True)
+        if 'UP RUNNING' in result.stdout:
+            log.info("✅ Bluetooth adapter: Aktif")
+        else:
+            log.warning("❌ Bluetooth adapter: Pasif, etkinleştiriliyor...")
+            subprocess.run(['sudo', 'hciconfig', 'hci0', 'up'])
+
+        # Discoverable yap
+        subprocess.run(['sudo', 'hciconfig', 'hci0', 'piscan'])
+        log.info("🔍 Bluetooth keşfedilebilir yapıldı")
+
+    except Exception as e:
+        log.warning("⚠️ Durum kontrolü hatası: %s", e)
+
 class InvalidArgsException(dbus.exceptions.DBusException):
     _dbus_error_name = 'org.freedesktop.DBus.Error.InvalidArgs'
 
@@ -43,6 +92,8 @@ class Application(dbus.service.Object):
     def __init__(self, bus):
         self.path = '/'
         self.services = []
+        # GetManagedObjects yanıtı; ağaç değişince sıfırlanır
+        self.managed_objects = None
         dbus.service.Object.__init__(self, bus, self.path)
 
     def get_path(self):
@@ -50,9 +101,16 @@ class Application(dbus.service.Object):
 
     def add_service(self, service):
         self.services.append(service)
+        service.application = self
+        self.invalidate()
+
+    def invalidate(self):
+        self.managed_objects = None
 
     @dbus.service.method(DBUS_OM_IFACE, out_signature='a{oa{sa{sv}}}')
     def GetManagedObjects(self):
+        if self.managed_objects is not None:
+            return self.managed_objects
         response = {}
         for service in self.services:
             response[service.get_path()] = service.get_properties()
@@ -62,6 +120,7 @@ class Application(dbus.service.Object):
                 descs = chrc.get_descriptors()
                 for desc in descs:
                     response[desc.get_path()] = desc.get_properties()
+        self.managed_objects = response
         return response
 
 class Service(dbus.service.Object):
@@ -73,9 +132,16 @@ class Service(dbus.service.Object):
         self.uuid = uuid
         self.primary = primary
         self.characteristics = []
+        self.application = None
+        self.properties = None
         dbus.service.Object.__init__(self, bus, self.path)
 
     def get_properties(self):
+        if self.properties is None:
+            self.properties = self.build_properties()
+        return self.properties
+
+    def build_properties(self):
         return {
             GATT_SERVICE_IFACE: {
                 'UUID': self.uuid,
@@ -91,6 +157,13 @@ class Service(dbus.service.Object):
 
     def add_characteristic(self, characteristic):
         self.characteristics.append(characteristic)
+        self.invalidate()
+
+    def invalidate(self):
+        # Özellikler bir sonraki istekte yeniden hesaplanır
+        self.properties = None
+        if self.application is not None:
+            self.application.invalidate()
 
     def get_characteristic_paths(self):
         result = []
@@ -102,6 +175,9 @@ class Service(dbus.service.Object):
         return self.characteristics
 
 class Characteristic(dbus.service.Object):
+    # AcquireWrite/AcquireNotify desteği (alt sınıflarda açılır)
+    ACQUIRE = False
+
     def __init__(self, bus, index, uuid, flags, service):
         self.path = service.path + '/char' + str(index)
         self.bus = bus
@@ -109,26 +185,47 @@ class Characteristic(dbus.service.Object):
         self.service = service
         self.flags = flags
         self.descriptors = []
-        self.value = []
+        self.value = b''
+        self.write_sockets = {}
+        self.notify_socket = None
+        self.notify_watch = None
+        # BlueZ, ilk istemci abone olunca StartNotify, son istemci ayrılınca
+        # StopNotify çağırır (hangi cihaz olduğu bildirilmez)
+        self.notifying = False
+        self.properties = None
         dbus.service.Object.__init__(self, bus, self.path)
 
     def get_properties(self):
-        return {
-            GATT_CHRC_IFACE: {
-                'Service': self.service.get_path(),
-                'UUID': self.uuid,
-                'Flags': self.flags,
-                'Descriptors': dbus.Array(
-                    self.get_descriptor_paths(),
-                    signature='o')
-            }
+        if self.properties is None:
+            self.properties = self.build_properties()
+        return self.properties
+
+    def build_properties(self):
+        properties = {
+            'Service': self.service.get_path(),
+            'UUID': self.uuid,
+            'Flags': self.flags,
+            'Descriptors': dbus.Array(
+                self.get_descriptor_paths(),
+                signature='o')
         }
+        # Özellik varsa BlueZ yazma/bildirim için soket fd'si ister
+        if self.ACQUIRE:
+            properties['WriteAcquired'] = dbus.Boolean(bool(self.write_sockets))
+            properties['NotifyAcquired'] = dbus.Boolean(self.notify_socket is not None)
+        return {GATT_CHRC_IFACE: properties}
 
     def get_path(self):
         return dbus.ObjectPath(self.path)
 
     def add_descriptor(self, descriptor):
         self.descriptors.append(descriptor)
+        self.invalidate()
+
+    def invalidate(self):
+        # Özellikleri değişen tanımlayıcılar da bunu çağırmalıdır
+        self.properties = None
+        self.service.invalidate()
 
     def get_descriptor_paths(self):
         result = []
@@ -141,29 +238,150 @@ class Characteristic(dbus.service.Object):
 
     @dbus.service.method(GATT_CHRC_IFACE,
                         in_signature='a{sv}',
-                        out_signature='ay')
+                        out_signature='ay',
+                        byte_arrays=True)
     def ReadValue(self, options):
-        print('📥 Characteristic okundu')
-        return dbus.Array(self.value, signature=dbus.Signature('y'))
+        log.debug('📥 Characteristic okundu')
+        return dbus.ByteArray(self.read_value(options))
 
-    @dbus.service.method(GATT_CHRC_IFACE, in_signature='aya{sv}')
+    # byte_arrays=True: değer dbus.Byte listesi yerine tek bir bytes nesnesi
+    # (dbus.ByteArray) olarak gelir ve olduğu gibi işlenir
+    @dbus.service.method(GATT_CHRC_IFACE, in_signature='aya{sv}',
+                         byte_arrays=True)
     def WriteValue(self, value, options):
-        print(f'📝 Veri yazıldı: {len(value)} byte')
+        log.debug('📝 Veri yazıldı: %d byte', len(value))
         self.value = value
         # Veriyi işle
-        self.handle_write_value(bytes(value))
+        self.handle_write_value(value, options)
 
-    def handle_write_value(self, data):
+    def read_value(self, options):
+        # Bu fonksiyon alt sınıflarda override edilebilir
+        return self.value
+
+    def handle_write_value(self, data, options):
         # Bu fonksiyon alt sınıflarda override edilecek
         pass
 
     @dbus.service.method(GATT_CHRC_IFACE)
     def StartNotify(self):
-        print('📡 Notification başlatıldı')
+        self.notifying = True
+        log.info('📡 Notification başlatıldı')
 
     @dbus.service.method(GATT_CHRC_IFACE)
     def StopNotify(self):
-        print('🛑 Notification durduruldu')
+        self.notifying = False
+        log.info('🛑 Notification durduruldu')
+
+    def is_subscribed(self):
+        return self.notifying or self.notify_socket is not None
+
+    @dbus.service.method(GATT_CHRC_IFACE,
+                         in_signature='a{sv}',
+                         out_signature='hq')
+    def AcquireWrite(self, options):
+        # Write Without Response yazmaları D-Bus yerine bu soketten gelir
+        options = {str(k): v for k, v in options.items()}
+        mtu = int(options.get('mtu', DEFAULT_MTU))
+        sock, remote = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        sock.setblocking(False)
+        buf = memoryview(bytearray(mtu))
+        watch = GLib.io_add_watch(sock.fileno(), GLib.PRIORITY_DEFAULT,
+                                  GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR,
+                                  self.on_write_socket, sock, buf, options)
+        self.write_sockets[sock] = watch
+        log.info('⚡ AcquireWrite: %s (MTU %d)', options.get('device', ''), mtu)
+        self.acquired_changed('WriteAcquired', True)
+        return self.hand_over(remote), dbus.UInt16(mtu)
+
+    @dbus.service.method(GATT_CHRC_IFACE,
+                         in_signature='a{sv}',
+                         out_signature='hq')
+    def AcquireNotify(self, options):
+        # Bildirimler PropertiesChanged yerine doğrudan bu sokete yazılır
+        mtu = int(options.get('mtu', DEFAULT_MTU))
+        self.release_notify()
+        sock, remote = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        sock.setblocking(False)
+        # İstemci bildirimleri kapattığında BlueZ soketi kapatır
+        self.notify_watch = GLib.io_add_watch(sock.fileno(), GLib.PRIORITY_DEFAULT,
+                                              GLib.IO_HUP | GLib.IO_ERR,
+                                              self.on_notify_hangup)
+        self.notify_socket = sock
+        log.info('⚡ AcquireNotify (MTU %d)', mtu)
+        self.acquired_changed('NotifyAcquired', True)
+        return self.hand_over(remote), dbus.UInt16(mtu)
+
+    def hand_over(self, remote):
+        # UnixFd fd'yi kopyalar; bizdeki uç kapatılır
+        fd = dbus.types.UnixFd(remote)
+        remote.close()
+        return fd
+
+    def on_write_socket(self, fd, condition, sock, buf, options):
+        if condition & GLib.IO_IN:
+            # Bekleyen tüm paketler tek seferde okunur; her paket bir yazmadır
+            while True:
+                try:
+                    n = sock.recv_into(buf)
+                except BlockingIOError:
+                    break
+                except OSError as e:
+                    log.error('❌ Yazma soketi hatası: %s', e)
+                    n = 0
+                if n == 0:
+                    condition |= GLib.IO_HUP
+                    break
+                try:
+                    self.handle_write_value(bytes(buf[:n]), options)
+                except dbus.exceptions.DBusException as e:
+                    # Yanıtsız yazmada hata istemciye iletilemez
+                    log.warning('⚠️ Soket yazması reddedildi: %s', e, extra=RATE_LIMITED)
+        if condition & (GLib.IO_HUP | GLib.IO_ERR):
+            log.info('🔌 AcquireWrite soketi kapandı: %s', options.get('device', ''))
+            self.write_sockets.pop(sock, None)
+            sock.close()
+            self.acquired_changed('WriteAcquired', bool(self.write_sockets))
+            return False
+        return True
+
+    def on_notify_hangup(self, fd, condition):
+        log.info('🔌 AcquireNotify soketi kapandı, D-Bus bildirimlerine dönülüyor')
+        self.notify_watch = None
+        self.release_notify()
+        return False
+
+    def release_notify(self):
+        if self.notify_socket is None:
+            return
+        if self.notify_watch is not None:
+            GLib.source_remove(self.notify_watch)
+            self.notify_watch = None
+        self.notify_socket.close()
+        self.notify_socket = None
+        self.acquired_changed('NotifyAcquired', False)
+
+    def acquired_changed(self, name, value):
+        self.invalidate()
+        self.PropertiesChanged(GATT_CHRC_IFACE, {name: dbus.Boolean(value)}, [])
+
+    def notify_value(self, value):
+        """Değeri bildirir: edinilmiş soket varsa doğrudan, yoksa D-Bus üzerinden"""
+        self.value = value
+        if self.notify_socket is not None:
+            try:
+                self.notify_socket.send(value)
+                return
+            except BlockingIOError:
+                log.warning('⚠️ Bildirim soketi dolu, D-Bus üzerinden gönderiliyor',
+                            extra=RATE_LIMITED)
+            except OSError as e:
+                log.error('❌ Bildirim soketi hatası: %s', e)
+                self.release_notify()
+        self.PropertiesChanged(
+            GATT_CHRC_IFACE,
+            {'Value': dbus.ByteArray(value)},
+            []
+        )
 
     @dbus.service.signal(DBUS_PROP_IFACE,
                          signature='sa{sv}as')
@@ -171,144 +389,111 @@ class Characteristic(dbus.service.Object):
         pass
 
 class JSONCharacteristic(Characteristic):
-    def __init__(self, bus, index, service):
+    # Yükleme motoru için BLE taşıma katmanı (send/schedule)
+    ACQUIRE = True
+
+    def __init__(self, bus, index, service, program_store=None, spool=None,
+                 notify_rate=NOTIFY_RATE, runner=None):
         Characteristic.__init__(
             self, bus, index,
             'abcd1234-ab12-cd34-ef56-abcdef123456',
-            ['read', 'write', 'notify'],
+            ['read', 'write', 'write-without-response', 'notify'],
             service)
         
-        self.chunk_buffer = {}
-        self.session_data = {}
+        # Her cihazın son bildirimi ayrı tutulur (okumalar birbirine karışmaz)
+        self.device_values = OrderedDict()
         self.connected = False
 
-    def handle_write_value(self, data):
-        try:
-            # Byte array'i string'e çevir
-            data_str = data.decode('utf-8')
-            print(f"📝 Veri alındı: {len(data_str)} karakter")
-            
-            # JSON parse et
-            try:
-                json_data = json.loads(data_str)
-                
-                # Parçalı veri kontrolü
-                if "sessionId" in json_data:
-                    self.handle_chunk(json_data)
-                else:
-                    # Tek parça veri
-                    self.process_json_data(json_data)
-                    
-            except json.JSONDecodeError as e:
-                print(f"❌ JSON parse hatası: {e}")
-                print(f"Gelen veri: {data_str[:100]}...")
-                
-        except Exception as e:
-            print(f"❌ Write handler hatası: {e}")
+        # Bildirimler abonelik durumuna göre süzülür, birleştirilir ve
+        # bağlantının taşıyabileceği hızda gönderilir
+        self.notifier = NotificationScheduler(self.notify_value, self.schedule,
+                                              self.is_subscribed, notify_rate)
+        self.engine = UploadEngine(self, program_store, spool=spool, runner=runner)
+        self.engine.start()
+
+    def handle_write_value(self, data, options):
+        started = time.perf_counter()
+        device = str(options.get('device', ''))
+        # BlueZ pazarlık edilen MTU'yu her yazmada bildirir
+        if 'mtu' in options:
+            self.update_mtu(device, options['mtu'])
+        queued = self.engine.submit(device, data)
+        WRITE_VALUE_SECONDS.observe(time.perf_counter() - started)
+        if not queued:
+            log.warning("⚠️ Yazma kuyruğu dolu, yazma reddedildi", extra=RATE_LIMITED)
+            raise FailedException('Yazma kuyruğu dolu')
+
+    def update_mtu(self, device, mtu):
+        if self.service.mtu_tracker.update(device, mtu):
+            log.info("📏 MTU güncellendi: %s -> %d", device, self.service.mtu_tracker.mtu(device))
+
+    def schedule(self, interval, callback):
+        GLib.timeout_add(int(interval * 1000), callback)
+
+    def notify_size(self, device):
+        # ATT bildirim yükü MTU - 3 byte
+        return self.service.mtu_tracker.mtu(device) - ATT_HEADER_SIZE
+
+    def send(self, device, value):
+        # İşçi iş parçacıklarından gelen bildirimler ana döngüde gönderilir
+        if threading.current_thread() is not threading.main_thread():
+            GLib.idle_add(self.send, device, value)
+            return
 
-    def handle_chunk(self, chunk_data):
         try:
-            session_id = chunk_data["sessionId"]
-            chunk_index = chunk_data["chunkIndex"]
-            total_chunks = chunk_data["totalChunks"]
-            data = chunk_data["data"]
-            
-            print(f"📦 Parça alındı: {chunk_index + 1}/{total_chunks} (Session: {session_id})")
-            
-            # Session verilerini başlat
-            if session_id not in self.session_data:
-                self.session_data[session_id] = {
-                    "chunks": {},
-                    "total_chunks": total_chunks,
-                    "received_count": 0
-                }
-            
-            # Parçayı kaydet
-            self.session_data[session_id]["chunks"][chunk_index] = data
-            self.session_data[session_id]["received_count"] += 1
-            
-            # Tüm parçalar alındı mı?
-            if self.session_data[session_id]["received_count"] == total_chunks:
-                print(f"✅ Tüm parçalar alındı: {session_id}")
-                
-                # Parçaları birleştir
-                complete_data = ""
-                for i in range(total_chunks):
-                    if i in self.session_data[session_id]["chunks"]:
-                        complete_data += self.session_data[session_id]["chunks"][i]
-                
-                # Session verilerini temizle
-                del self.session_data[session_id]
-                
-                # Birleştirilmiş veriyi işle
-                try:
-                    final_json = json.loads(complete_data)
-                    self.process_json_data(final_json)
-                    
-                    # Başarı bildirimi gönder
-                    self.send_notification("TAMAM")
-                    
-                except json.JSONDecodeError as e:
-                    print(f"❌ Birleştirilmiş JSON parse hatası: {e}")
-                    self.send_notification("HATA")
-            else:
-                # Parça alındı bildirimi
-                self.send_notification(f"OK_{chunk_index}")
-                
+            # Abone olmayan istemci de son mesajını okuyabilir
+            if device is not None:
+                self.remember_value(device, value)
+            self.notifier.submit(device, value)
         except Exception as e:
-            print(f"❌ Chunk işleme hatası: {e}")
-            self.send_notification("HATA")
+            log.warning("❌ Bildirim gönderme hatası: %s", e, extra=RATE_LIMITED)
 
-    def process_json_data(self, json_data):
-        try:
-            print("🔄 JSON verisi işleniyor...")
-            
-            # Kod varsa dosyaya kaydet
-            if "code" in json_data:
-                code = json_data["code"]
-                
-                # Escape karakterleri düzelt
-                code = code.replace("\\n", "\n")
-                code = code.replace("\\t", "\t")
-                code = code.replace("\\r", "\r")
-                code = code.replace("\\'", "'")
-                code = code.replace('\\"', '"')
-                
-                # Dosyaya kaydet
-                with open("received_code.py", "w", encoding="utf-8") as f:
-                    f.write(code)
-                
-                print("✅ Kod dosyaya kaydedildi: received_code.py")
-            
-            # Diğer verileri işle
-            if "description" in json_data:
-                print(f"📝 Açıklama: {json_data['description']}")
-            
-            if "author" in json_data:
-                print(f"👤 Yazar: {json_data['author']}")
-                
-            print("✅ JSON verisi başarıyla işlendi")
-            
-        except Exception as e:
-            print(f"❌ JSON işleme hatası: {e}")
+    def remember_value(self, device, value):
+        self.device_values[device] = value
+        self.device_values.move_to_end(device)
+        while len(self.device_values) > MAX_TRACKED_DEVICES:
+            self.device_values.popitem(last=False)
 
-    def send_notification(self, message):
-        try:
-            print(f"📤 Bildirim gönderildi: {message}")
-            # Notification gönderme (basitleştirilmiş)
-            self.value = list(message.encode('utf-8'))
-            self.PropertiesChanged(
-                GATT_CHRC_IFACE,
-                {'Value': dbus.Array(self.value, signature=dbus.Signature('y'))},
-                []
-            )
-        except Exception as e:
-            print(f"❌ Bildirim gönderme hatası: {e}")
+    def read_value(self, options):
+        # Okuyan cihaz yalnızca kendisine gönderilen son bildirimi görür
+        device = str(options.get('device', ''))
+        return self.device_values.get(device, b'')
+
+class ConfigCharacteristic(Characteristic):
+    # İstemci bağlandıktan sonra okur ve parça boyutunu buna göre seçer
+    def __init__(self, bus, index, service):
+        Characteristic.__init__(
+            self, bus, index,
+            'abcd1235-ab12-cd34-ef56-abcdef123456',
+            ['read'],
+            service)
+
+    def read_value(self, options):
+        device = str(options.get('device', ''))
+        tracker = self.service.mtu_tracker
+        if 'mtu' in options:
+            tracker.update(device, options['mtu'])
+        config = tracker.chunk_sizes(device)
+        config["compression"] = list(COMPRESSION_WBITS)
+        config["maxChunks"] = MAX_TOTAL_CHUNKS
+        config["resume"] = True
+        config["integrity"] = ["crc32", "sha256"]
+        config["download"] = True
+        config["run"] = self.service.runner is not None
+        value = json.dumps(config, separators=(',', ':')).encode('utf-8')
+        # Uzun okumalarda BlueZ kalan kısmı offset ile ister
+        return value[int(options.get('offset', 0)):]
 
 class JSONService(Service):
-    def __init__(self, bus, index):
+    def __init__(self, bus, index, program_store=None, spool=None,
+                 notify_rate=NOTIFY_RATE, runner=None):
         Service.__init__(self, bus, index, '12345678-1234-1234-1234-123456789abc', True)
-        self.add_characteristic(JSONCharacteristic(bus, 0, self))
+        # Bağlı cihazların MTU'ları tüm characteristic'ler arasında paylaşılır
+        self.mtu_tracker = MtuTracker()
+        self.runner = runner
+        self.add_characteristic(JSONCharacteristic(bus, 0, self, program_store, spool,
+                                                   notify_rate, runner))
+        self.add_characteristic(ConfigCharacteristic(bus, 1, self))
 
 class Advertisement(dbus.service.Object):
     PATH_BASE = '/org/bluez/example/advertisement'
@@ -362,7 +547,7 @@ class Advertisement(dbus.service.Object):
                          in_signature='',
                          out_signature='')
     def Release(self):
-        print('📡 Advertisement serbest bırakıldı')
+        log.info('📡 Advertisement serbest bırakıldı')
 
 class JSONAdvertisement(Advertisement):
     def __init__(self, bus, index):
@@ -379,17 +564,103 @@ class JSONAdvertisement(Advertisement):
     def add_local_name(self, name):
         self.local_name = name
 
-def register_ad_cb():
-    print('✅ Advertisement kaydedildi')
-
-def register_ad_error_cb(error):
-    print(f'❌ Advertisement kayıt hatası: {error}')
-
-def register_app_cb():
-    print('✅ GATT uygulama kaydedildi')
-
-def register_app_error_cb(error):
-    print(f'❌ GATT uygulama kayıt hatası: {error}')
+class StartupTimer:
+    """Başlangıç adımlarının süreleri; toplamlar süreç başlangıcından itibaren"""
+
+    def __init__(self):
+        # Yorumlayıcının açılması ve modüllerin yüklenmesi main()'den önce olur
+        self.process_age = process_age()
+        self.origin = time.perf_counter() - (self.process_age or 0.0)
+        self.last = time.perf_counter()
+        self.steps = []
+        self.events = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.steps.append((name, now - self.last))
+        self.last = now
+
+    def event(self, name):
+        self.events.append((name, time.perf_counter() - self.origin))
+
+    def summary(self):
+        parts = []
+        if self.process_age is not None:
+            parts.append(f"süreç+import {self.process_age * 1000:.0f} ms")
+        parts += [f"{name} {elapsed * 1000:.0f} ms" for name, elapsed in self.steps]
+        events = [f"{name} {at * 1000:.0f} ms" for name, at in self.events]
+        return ", ".join(parts) + " | " + ", ".join(events)
+
+def process_age():
+    """Süreç başlangıcından bu yana geçen süre (Linux, 10 ms çözünürlük)"""
+    try:
+        with open('/proc/self/stat') as f:
+            # Süreç adı boşluk içerebilir; alanlar ')' sonrasından sayılır
+            fields = f.read().rpartition(')')[2].split()
+        started = int(fields[19]) / os.sysconf('SC_CLK_TCK')
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - started
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+class Registration:
+    """Advertisement ve GATT uygulamasını aynı anda kaydeder"""
+
+    def __init__(self, bus, app, adv, mainloop, timer):
+        self.bus = bus
+        self.app = app
+        self.adv = adv
+        self.mainloop = mainloop
+        self.timer = timer
+        self.attempt = 0
+        self.pending = set()
+        self.cached = False
+
+    def start(self, adapter, cached=False):
+        self.attempt += 1
+        self.cached = cached
+        self.pending = {'advertisement', 'app'}
+        adapter_object = self.bus.get_object(BLUEZ_SERVICE_NAME, adapter)
+        # İki çağrı da yanıt beklemeden gönderilir; önce advertisement,
+        # böylece GATT kaydı sürerken cihaz keşfedilebilir olur
+        dbus.Interface(adapter_object, LE_ADVERTISING_MANAGER_IFACE).RegisterAdvertisement(
+            self.adv.get_path(), {},
+            reply_handler=functools.partial(self.on_reply, self.attempt, 'advertisement'),
+            error_handler=functools.partial(self.on_error, self.attempt, 'advertisement'))
+        dbus.Interface(adapter_object, GATT_MANAGER_IFACE).RegisterApplication(
+            self.app.get_path(), {},
+            reply_handler=functools.partial(self.on_reply, self.attempt, 'app'),
+            error_handler=functools.partial(self.on_error, self.attempt, 'app'))
+
+    def on_reply(self, attempt, what):
+        if attempt != self.attempt:
+            return
+        if what == 'advertisement':
+            self.timer.event('keşfedilebilir')
+            log.info('✅ Advertisement kaydedildi')
+        else:
+            self.timer.event('GATT hazır')
+            log.info('✅ GATT uygulama kaydedildi')
+        self.pending.discard(what)
+        if not self.pending:
+            log.info('⏱️ Başlangıç: %s', self.timer.summary())
+
+    def on_error(self, attempt, what, error):
+        if attempt != self.attempt:
+            return
+        if self.cached:
+            # Önbellekteki adapter artık yok (ör. USB adaptör değişti)
+            log.warning('⚠️ Önbellekteki adapter kullanılamadı (%s), yeniden taranıyor', error)
+            forget_cached_adapter()
+            adapter = find_adapter(self.bus)
+            if adapter:
+                write_cached_adapter(adapter)
+                self.start(adapter)
+                return
+        if what == 'advertisement':
+            log.error('❌ Advertisement kayıt hatası: %s', error)
+        else:
+            log.error('❌ GATT uygulama kayıt hatası: %s', error)
+        self.mainloop.quit()
 
 def find_adapter(bus):
     remote_om = dbus.Interface(bus.get_object(BLUEZ_SERVICE_NAME, '/'),
@@ -402,55 +673,132 @@ def find_adapter(bus):
 
     return None
 
-def main():
-    print("🚀 Raspberry Pi BLE JSON Sunucusu başlatılıyor...")
-    
-    # D-Bus bağlantısı
-    bus = dbus.SystemBus()
+def read_cached_adapter():
+    try:
+        with open(ADAPTER_CACHE) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
 
-    # Adapter bul
-    adapter = find_adapter(bus)
-    if not adapter:
-        print('❌ BLE adapter bulunamadı!')
-        return
+def write_cached_adapter(adapter):
+    try:
+        with open(ADAPTER_CACHE, 'w') as f:
+            f.write(str(adapter))
+    except OSError as e:
+        log.warning('⚠️ Adapter önbelleği yazılamadı: %s', e)
 
-    print(f'📡 BLE Adapter bulundu: {adapter}')
+def forget_cached_adapter():
+    try:
+        os.remove(ADAPTER_CACHE)
+    except OSError:
+        pass
 
-    # Servis manager
-    service_manager = dbus.Interface(
-        bus.get_object(BLUEZ_SERVICE_NAME, adapter),
-        GATT_MANAGER_IFACE)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Raspberry Pi BLE JSON Sunucusu')
+    parser.add_argument('--tcp', help='BLE ile birlikte TCP yükleme sunucusu (host:port)')
+    parser.add_argument('--unix', help='BLE ile birlikte Unix soket yükleme sunucusu')
+    parser.add_argument('--resume-dir',
+                        help='yarım yüklemelerin saklanacağı dizin (yeniden başlatmaya dayanır)')
+    parser.add_argument('--runner-pool', type=int, default=0,
+                        help='"run": true yüklemelerini çalıştıran hazır işçi sayısı '
+                             '(0: kapalı; istemciler kimlik doğrulamasız kod çalıştırabilir)')
+    parser.add_argument('--run-as',
+                        help='programların çalışacağı ayrıcalıksız kullanıcı (root için zorunlu)')
+    parser.add_argument('--preload', default='',
+                        help='işçilerde önceden içe aktarılacak ek modüller (virgülle)')
+    parser.add_argument('--metrics',
+                        help='Prometheus ölçüm uç noktası (host:port ya da Unix soket yolu)')
+    parser.add_argument('--notify-rate', type=float, default=NOTIFY_RATE,
+                        help='saniyede en fazla bildirim (0: sınırsız)')
+    parser.add_argument('--fast-start', action='store_true',
+                        help='adapter yolunu önbellekten al, durum kontrolünü arka plana at')
+    parser.add_argument('--debug', action='store_true',
+                        help='parça başına günlük kayıtları ve Bluetooth durum kontrolü')
+    parser.add_argument('--log-format', choices=('text', 'json'), default='text',
+                        help='günlük biçimi (json: satır başına bir kayıt)')
+    args = parser.parse_args(argv)
+
+    timer = StartupTimer()
+    setup_logging(logging.DEBUG if args.debug else logging.INFO, args.log_format)
+    log.info("🚀 Raspberry Pi BLE JSON Sunucusu başlatılıyor...")
+
+    # Hızlı başlatmada durum kontrolü (systemctl, hciconfig) keşfedilebilir
+    # olmayı geciktirmesin diye kayıtla paralel çalışır
+    if args.debug and not args.fast_start:
+        check_bluetooth_status()
+        timer.mark('durum kontrolü')
 
-    # Advertisement manager
-    ad_manager = dbus.Interface(bus.get_object(BLUEZ_SERVICE_NAME, adapter),
-                                LE_ADVERTISING_MANAGER_IFACE)
+    # D-Bus bağlantısı
+    bus = dbus.SystemBus()
+    timer.mark('D-Bus')
+
+    # Adapter bul (hızlı başlatmada önbellekten; BlueZ'nin tüm nesne
+    # ağacını döndüren GetManagedObjects çağrısı atlanır)
+    adapter = read_cached_adapter() if args.fast_start else None
+    cached = adapter is not None
+    if not cached:
+        adapter = find_adapter(bus)
+        if not adapter:
+            log.error('❌ BLE adapter bulunamadı! Bluetooth servisini yeniden başlatmayı '
+                      'deneyin: sudo systemctl restart bluetooth')
+            sys.exit(1)
+        if args.fast_start:
+            write_cached_adapter(adapter)
+    timer.mark('adapter (önbellek)' if cached else 'adapter')
+    log.info('📡 BLE Adapter bulundu: %s', adapter)
+
+    # BLE ve soket sunucusu aynı program deposunu paylaşır
+    program_store = ProgramStore()
+    spool = None
+    if args.resume_dir:
+        from session_spool import SessionSpool
+        spool = SessionSpool(args.resume_dir)
+    # İşçiler kayıttan sonra başlatılır (açılışta CPU için yarışmasınlar)
+    runner = None
+    if args.runner_pool > 0:
+        from program_runner import PRELOAD_MODULES, ProgramRunner
+        preload = PRELOAD_MODULES + tuple(m for m in args.preload.split(',') if m)
+        try:
+            runner = ProgramRunner(args.runner_pool, preload, run_as=args.run_as)
+        except (PermissionError, KeyError) as e:
+            log.error("❌ Program çalıştırıcı kapalı: %s", e)
 
-    # Uygulama oluştur
+    # Uygulama ve advertisement
     app = Application(bus)
-    app.add_service(JSONService(bus, 0))
-
-    # Advertisement oluştur
+    app.add_service(JSONService(bus, 0, program_store, spool, args.notify_rate, runner))
     adv = JSONAdvertisement(bus, 0)
+    timer.mark('nesneler')
+
+    # Kayıt başarısız olursa ana döngü durdurulur
+    mainloop = GLib.MainLoop()
+    Registration(bus, app, adv, mainloop, timer).start(adapter, cached)
+
+    # Kritik olmayan bileşenler kayıt yanıtları beklenirken başlatılır
+    # (asyncio gibi ağır modüller yalnızca gerektiğinde yüklenir)
+    if args.tcp or args.unix:
+        from socket_transport import SocketTransport
+        SocketTransport(program_store, spool, runner).start_in_thread(args.tcp, args.unix)
+
+    if runner is not None:
+        runner.start()
+
+    if args.metrics:
+        from metrics_endpoint import MetricsEndpoint
+        MetricsEndpoint(args.metrics)
 
-    # Servisleri kaydet
-    service_manager.RegisterApplication(app.get_path(), {},
-                                        reply_handler=register_app_cb,
-                                        error_handler=register_app_error_cb)
+    if args.debug and args.fast_start:
+        threading.Thread(target=check_bluetooth_status, daemon=True).start()
 
-    # Advertisement'ı kaydet
-    ad_manager.RegisterAdvertisement(adv.get_path(), {},
-                                     reply_handler=register_ad_cb,
-                                     error_handler=register_ad_error_cb)
+    log.info("✅ BLE sunucu hazır! Android cihazından bağlantı bekleniyor...")
 
-    print("✅ BLE sunucu hazır!")
-    print("📱 Android cihazından bağlantı bekleniyor...")
-    
     try:
         # Ana döngü
-        mainloop = GLib.MainLoop()
         mainloop.run()
     except KeyboardInterrupt:
-        print("\n🛑 Sunucu durduruldu")
+        log.info("🛑 Sunucu durduruldu")
+    finally:
+        if runner is not None:
+            runner.close()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# Program çalıştırıcısının işçi yorumlayıcısı (program_runner.py başlatır)
+#
+# Açılır açılmaz ön yükleme modüllerini içe aktarır ve stdin'den tek bir iş
+# satırı (JSON) bekler; program geldiğinde yorumlayıcının açılışı ve içe
+# aktarmalar çoktan bitmiştir. İş gelince çalışma dizinine geçer, ayrıcalıksız
+# kullanıcıya düşer, kaynak sınırlarını uygular ve programı __main__ olarak
+# çalıştırır. Her işçi tek
+# bir program çalıştırıp çıkar, böylece programlar birbirini etkilemez.
+#
+#   {"path": ..., "cwd": ..., "cpu": saniye, "memory": byte, "fsize": byte,
+#    "nproc": süreç sınırı, "uid": ..., "gid": ...,
+#    "compiled": marshal dosyası ya da null}
+#
+# Derlenmiş kod verilmişse program derlenmez, marshal ile yüklenir.
+#
+# stdin iş satırından sonra kapatılır; stderr sunucu tarafında stdout ile
+# birleştirilir. Sunucu çıkarsa stdin kapanır ve boştaki işçi kendiliğinden
+# sonlanır. Yalnızca standart kütüphane kullanılır.
+
+import importlib
+import json
+import marshal
+import os
+import resource
+import sys
+import traceback
+
+EXIT_MEMORY = 3
+
+
+def set_limit(kind, value):
+    # Sert sınır zaten daha düşükse onu aşamayız
+    _, hard = resource.getrlimit(kind)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    resource.setrlimit(kind, (value, value))
+
+
+def drop_privileges(job):
+    # Sunucu (Pi'de root) yerine ayrılmış kullanıcıyla çalışılır; ek gruplar
+    # bırakılmadan setuid yapılırsa root grupları kalır
+    if job.get("uid") is None:
+        return
+    os.setgroups([])
+    os.setgid(job["gid"])
+    os.setuid(job["uid"])
+
+
+def apply_limits(job):
+    # RLIMIT_CPU sürecin tamamını sayar; açılışta harcanan süre eklenir.
+    # Yumuşak sınırda SIGXCPU, bir saniye sonra SIGKILL gelir.
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = int(usage.ru_utime + usage.ru_stime) + job["cpu"]
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    set_limit(resource.RLIMIT_AS, job["memory"])
+    set_limit(resource.RLIMIT_FSIZE, job["fsize"])
+    # Kullanıcının süreç (ve iş parçacığı) sayısı; fork + setsid ile süreç
+    # grubundan kaçıp süre dolunca öldürülmekten kurtulmayı engeller
+    set_limit(resource.RLIMIT_NPROC, job["nproc"])
+
+
+def load_code(path, compiled):
+    if compiled:
+        try:
+            with open(compiled, 'rb') as f:
+                return marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            # Önbellek dosyası silinmiş ya da bozuk: kaynaktan derlenir
+            pass
+    with open(path, 'rb') as f:
+        return compile(f.read(), path, 'exec')
+
+
+def main(preload):
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+    line = sys.stdin.readline()
+    if not line:
+        # Sunucu kapandı, iş gelmedi
+        return 0
+    job = json.loads(line)
+
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    sys.stdin = open(os.devnull)
+    os.chdir(job["cwd"])
+    # Programın yanındaki modüller sunucunun modüllerini gölgelemesin
+    sys.path[0] = job["cwd"]
+    drop_privileges(job)
+    apply_limits(job)
+
+    path = job["path"]
+    try:
+        code = load_code(path, job.get("compiled"))
+        sys.argv = [path]
+        exec(code, {"__name__": "__main__", "__file__": path,
+                    "__builtins__": __builtins__})
+    except MemoryError:
+        print("MemoryError: bellek sınırı aşıldı", file=sys.stderr)
+        return EXIT_MEMORY
+    except SystemExit:
+        raise
+    except BaseException:
+        # İlk çerçeve bu dosyadır; öğrenci yalnızca kendi kodunu görür
+        exc_type, exc, tb = sys.exc_info()
+        traceback.print_exception(exc_type, exc, tb.tb_next)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
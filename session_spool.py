@@ -0,0 +1,196 @@
+# Yarım kalan yüklemelerin diske yazılması (isteğe bağlı)
+#
+# Her session için bir spool dosyası tutulur. İlk satır session bilgisidir
+# (JSON), ardından gelen her yeni parça bir kayıt olarak eklenir:
+#
+#   index (2) | tür (1) | uzunluk (4) | veri
+#
+# tür: 0 = bytes, 1 = str (UTF-8), 2 = session'ın SHA-256 özeti (parça değil)
+#
+# Session bellekten atıldığında (TTL, LRU) ya da sunucu yeniden başladığında
+# parçalar bu dosyadan okunup birleştiriciye yeniden verilir; istemci devam
+# sorgusuyla yalnızca eksik parçaları gönderir. Session tamamlandığında ya da
+# geçersiz olduğunda dosya silinir, SPOOL_TTL boyunca dokunulmayan dosyalar
+# temizlenir.
+#
+# Dosyalar her parçadan sonra flush edilir ama fsync yapılmaz: süreç
+# yeniden başlatmalarına dayanır, güç kesintisinde son parçalar kaybolabilir
+# (eksik kalan son kayıt okumada yok sayılır).
+
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+SPOOL_DIR = "partial_sessions"
+SPOOL_TTL = 24 * 3600          # saniye, son parçadan sonra
+MAX_OPEN_FILES = 16
+RECORD_HEADER = struct.Struct('>HBI')
+KIND_BYTES = 0
+KIND_STR = 1
+KIND_DIGEST = 2
+
+
+class SpoolEntry:
+    def __init__(self, path, meta, updated_at):
+        self.path = path
+        self.meta = meta
+        self.updated_at = updated_at
+
+
+class SessionSpool:
+    def __init__(self, directory=SPOOL_DIR, ttl=SPOOL_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        # session anahtarı (cihaz, sessionId) -> SpoolEntry
+        self.entries = {}
+        # Açık dosyalar, en eski kullanılan başta (LRU)
+        self.files = OrderedDict()
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.scan()
+
+    def scan(self):
+        # Önceki çalıştırmadan kalan yarım session'lar
+        for name in os.listdir(self.directory):
+            if not name.endswith('.part'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'rb') as f:
+                    meta = json.loads(f.readline())
+                key = (meta["device"], meta["sessionId"])
+            except (OSError, ValueError, KeyError) as e:
+                log.warning("⚠️ Bozuk spool dosyası silindi: %s (%s)", name, e)
+                os.remove(path)
+                continue
+            self.entries[key] = SpoolEntry(path, meta, os.path.getmtime(path))
+        if self.entries:
+            log.info("💾 %d yarım session diskte bulundu", len(self.entries))
+
+    def path_for(self, key):
+        name = hashlib.sha1(json.dumps(list(key)).encode('utf-8')).hexdigest()[:24]
+        return os.path.join(self.directory, name + '.part')
+
+    def has(self, key):
+        return key in self.entries
+
+    def keys(self):
+        with self.lock:
+            return list(self.entries)
+
+    def append(self, key, meta, chunk_index, data):
+        """Parçayı session'ın dosyasına ekler; dosya yoksa meta ile oluşturur"""
+        if isinstance(data, str):
+            self.write_record(key, meta, chunk_index, KIND_STR, data.encode('utf-8'))
+        else:
+            self.write_record(key, meta, chunk_index, KIND_BYTES, data)
+
+    def append_digest(self, key, meta, digest):
+        self.write_record(key, meta, 0, KIND_DIGEST, digest)
+
+    def write_record(self, key, meta, chunk_index, kind, data):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = SpoolEntry(self.path_for(key),
+                                   dict(meta, device=key[0], sessionId=key[1]), 0)
+                with open(entry.path, 'wb') as f:
+                    f.write(json.dumps(entry.meta).encode('utf-8') + b'\n')
+                self.entries[key] = entry
+            f = self.open_file(key, entry)
+            f.write(RECORD_HEADER.pack(chunk_index, kind, len(data)))
+            f.write(data)
+            f.flush()
+            entry.updated_at = time.time()
+
+    def open_file(self, key, entry):
+        f = self.files.get(key)
+        if f is not None:
+            self.files.move_to_end(key)
+            return f
+        f = open(entry.path, 'ab')
+        self.files[key] = f
+        while len(self.files) > MAX_OPEN_FILES:
+            _, oldest = self.files.popitem(last=False)
+            oldest.close()
+        return f
+
+    def load(self, key):
+        """(meta, [(index, veri), ...]) döner; session yoksa None
+
+        Özet kaydı varsa meta["sha256"] olarak eklenir.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            f = self.files.get(key)
+            if f is not None:
+                f.flush()
+            with open(entry.path, 'rb') as f:
+                f.readline()
+                data = f.read()
+            meta = dict(entry.meta)
+        chunks = []
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            chunk_index, kind, length = RECORD_HEADER.unpack_from(data, offset)
+            offset += RECORD_HEADER.size
+            if offset + length > len(data):
+                # Yazılırken kesilen son kayıt
+                break
+            value = data[offset:offset + length]
+            offset += length
+            if kind == KIND_DIGEST:
+                meta["sha256"] = value.hex()
+                continue
+            chunks.append((chunk_index, value.decode('utf-8') if kind == KIND_STR
+                           else value))
+        return meta, chunks
+
+    def rebind(self, old_key, new_key):
+        """Session başka bir cihaz anahtarıyla devam ettiğinde kaydı taşır"""
+        with self.lock:
+            entry = self.entries.pop(old_key, None)
+            if entry is None:
+                return
+            self.entries[new_key] = entry
+            f = self.files.pop(old_key, None)
+            if f is not None:
+                self.files[new_key] = f
+
+    def remove(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            f = self.files.pop(key, None)
+            if f is not None:
+                f.close()
+            if entry is not None:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def expire(self, now=None):
+        """SPOOL_TTL süresini aşan dosyaları siler, silinen sayısını döner"""
+        if now is None:
+            now = time.time()
+        with self.lock:
+            expired = [key for key, entry in self.entries.items()
+                       if now - entry.updated_at > self.ttl]
+        for key in expired:
+            self.remove(key)
+        return len(expired)
+
+    def close(self):
+        with self.lock:
+            for f in self.files.values():
+                f.close()
+            self.files.clear()
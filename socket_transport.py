@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# TCP ve Unix soket üzerinden yükleme sunucusu (asyncio)
+#
+# BLE ile aynı protokolü konuşur ve aynı yükleme motorunu kullanır: her
+# mesaj BLE'deki bir yazma (JSON zarfı ya da ikili çerçeve), sunucudan
+# gelen her mesaj bir bildirimdir (OK_n, ACK_..., TAMAM, HATA). Akış
+# üzerinde mesaj sınırları 2 byte big-endian uzunluk önekiyle belirlenir:
+#
+#   uzunluk (2) | değer
+#
+# İndirme çerçeveleri SOCKET_NOTIFY_SIZE byte'a kadar olabilir.
+#
+# Wi-Fi varken hızlı yükleme yolu ve donanımsız yük testi için kullanılır.
+# Tek başına çalıştırma:
+#
+#   python3 socket_transport.py --tcp 0.0.0.0:8765 --unix /tmp/ble_upload.sock
+
+import argparse
+import asyncio
+import logging
+import os
+import struct
+import threading
+
+from log_setup import setup_logging
+from session_spool import SessionSpool
+from upload_engine import Transport, UploadEngine
+
+log = logging.getLogger(__name__)
+
+FRAME_HEADER = struct.Struct('>H')
+DEFAULT_TCP_PORT = 8765
+# Yazma kuyruğu doluyken okumaya ara verilir, TCP penceresi geri basınç uygular
+BACKPRESSURE_DELAY = 0.005
+SOCKET_NOTIFY_SIZE = 4096
+
+
+def encode_frame(value):
+    return FRAME_HEADER.pack(len(value)) + value
+
+
+async def read_frame(reader):
+    header = await reader.readexactly(FRAME_HEADER.size)
+    (length,) = FRAME_HEADER.unpack(header)
+    return await reader.readexactly(length)
+
+
+def parse_address(address):
+    """"host:port" ya da yalnızca port biçimindeki adresi çözer"""
+    host, _, port = address.rpartition(':')
+    return host or '0.0.0.0', int(port or DEFAULT_TCP_PORT)
+
+
+class SocketTransport(Transport):
+    def __init__(self, program_store=None, spool=None, runner=None):
+        self.loop = None
+        self.loop_thread = None
+        self.clients = {}
+        self.handlers = set()
+        self.client_count = 0
+        self.servers = []
+        self.engine = UploadEngine(self, program_store, spool=spool, runner=runner)
+
+    def schedule(self, interval, callback):
+        def tick():
+            if callback():
+                self.loop.call_later(interval, tick)
+
+        self.loop.call_soon_threadsafe(self.loop.call_later, interval, tick)
+
+    def notify_size(self, device):
+        return SOCKET_NOTIFY_SIZE
+
+    def send(self, device, value):
+        frame = encode_frame(value)
+        # İşçi iş parçacıklarından gelen bildirimler döngüde yazılır
+        if threading.current_thread() is self.loop_thread:
+            self.write_frame(device, frame)
+        else:
+            self.loop.call_soon_threadsafe(self.write_frame, device, frame)
+
+    def write_frame(self, device, frame):
+        writer = self.clients.get(device)
+        if writer is not None and not writer.is_closing():
+            writer.write(frame)
+
+    async def handle_client(self, reader, writer):
+        self.client_count += 1
+        device = f"socket:{self.client_count}"
+        peer = writer.get_extra_info('peername') or 'unix'
+        self.clients[device] = writer
+        self.handlers.add(asyncio.current_task())
+        log.info("🔗 Soket istemcisi bağlandı: %s (%s)", device, peer)
+        try:
+            while True:
+                data = await read_frame(reader)
+                while not self.engine.submit(device, data):
+                    await asyncio.sleep(BACKPRESSURE_DELAY)
+        except asyncio.IncompleteReadError:
+            pass
+        except ConnectionError as e:
+            log.warning("⚠️ Soket bağlantı hatası: %s: %s", device, e)
+        finally:
+            self.clients.pop(device, None)
+            self.handlers.discard(asyncio.current_task())
+            writer.close()
+            log.info("🔌 Soket istemcisi ayrıldı: %s", device)
+
+    async def start(self, tcp=None, unix=None):
+        """Sunucuları açar; döngü çalıştığı sürece istemci kabul edilir"""
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.current_thread()
+        self.engine.start()
+        if tcp is not None:
+            host, port = parse_address(tcp)
+            server = await asyncio.start_server(self.handle_client, host, port)
+            self.servers.append(server)
+            log.info("🌐 TCP yükleme sunucusu: %s:%s", host, port)
+        if unix is not None:
+            # Önceki çalıştırmadan kalan soket dosyası
+            if os.path.exists(unix):
+                os.remove(unix)
+            server = await asyncio.start_unix_server(self.handle_client, unix)
+            self.servers.append(server)
+            log.info("🌐 Unix soket yükleme sunucusu: %s", unix)
+
+    async def serve(self, tcp=None, unix=None):
+        await self.start(tcp, unix)
+        await asyncio.gather(*(server.serve_forever() for server in self.servers))
+
+    def start_in_thread(self, tcp=None, unix=None):
+        """Sunucuyu ayrı bir iş parçacığındaki asyncio döngüsünde çalıştırır"""
+        thread = threading.Thread(target=asyncio.run, args=(self.serve(tcp, unix),),
+                                  name='socket-transport', daemon=True)
+        thread.start()
+        return thread
+
+    async def close(self):
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        self.servers = []
+        for writer in list(self.clients.values()):
+            writer.close()
+        # Bağlantısı kapanan istemcilerin işleyicileri kendiliğinden biter
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TCP/Unix soket yükleme sunucusu')
+    parser.add_argument('--tcp', help='dinlenecek adres (host:port)')
+    parser.add_argument('--unix', help='Unix soket dosyası')
+    parser.add_argument('--resume-dir',
+                        help='yarım yüklemelerin saklanacağı dizin (yeniden başlatmaya dayanır)')
+    parser.add_argument('--runner-pool', type=int, default=0,
+                        help='"run": true yüklemeleri için hazır işçi sayısı (0: kapalı)')
+    parser.add_argument('--run-as',
+                        help='programların çalışacağı ayrıcalıksız kullanıcı (root için zorunlu)')
+    parser.add_argument('--debug', action='store_true', help='parça başına günlük kayıtları')
+    parser.add_argument('--log-format', choices=('text', 'json'), default='text')
+    args = parser.parse_args()
+    setup_logging(logging.DEBUG if args.debug else logging.INFO, args.log_format)
+    if args.tcp is None and args.unix is None:
+        args.tcp = f'0.0.0.0:{DEFAULT_TCP_PORT}'
+
+    runner = None
+    if args.runner_pool > 0:
+        from program_runner import ProgramRunner
+        try:
+            runner = ProgramRunner(args.runner_pool, run_as=args.run_as)
+            runner.start()
+        except (PermissionError, KeyError) as e:
+            log.error("❌ Program çalıştırıcı kapalı: %s", e)
+    transport = SocketTransport(
+        spool=SessionSpool(args.resume_dir) if args.resume_dir else None, runner=runner)
+    try:
+        asyncio.run(transport.serve(args.tcp, args.unix))
+    except KeyboardInterrupt:
+        log.info("🛑 Sunucu durduruldu")
+    finally:
+        transport.engine.stop()
+        if runner is not None:
+            runner.close()
+
+
+if __name__ == '__main__':
+    main()
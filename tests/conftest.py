@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from code_store import ProgramStore  # noqa: E402
+from upload_engine import UploadEngine  # noqa: E402
+
+
+class FakeTransport:
+    """Gönderilen bildirimleri kaydeden taşıma katmanı"""
+
+    def __init__(self, notify_size=20):
+        self.size = notify_size
+        self.sent = []
+        # (cihaz, bildirim) çiftleri
+        self.log = []
+
+    def send(self, device, value):
+        self.sent.append(bytes(value))
+        self.log.append((device, bytes(value)))
+
+    def sent_to(self, device):
+        return [value for d, value in self.log if d == device]
+
+    def schedule(self, interval, callback):
+        pass
+
+    def notify_size(self, device):
+        return self.size
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ProgramStore(root=str(tmp_path / 'programs'),
+                        current_path=str(tmp_path / 'received_code.py'))
+
+
+@pytest.fixture
+def transport():
+    return FakeTransport()
+
+
+@pytest.fixture
+def engine(store, transport):
+    engine = UploadEngine(transport, store, workers=1)
+    yield engine
+    engine.stop()
@@ -0,0 +1,31 @@
+# Testlerde ortak kullanılan çerçeve yardımcıları
+
+import hashlib
+
+from chunk_engine import (CRC_SIZE, FLAG_CHECKSUM, FLAG_DIGEST, build_binary_frame,
+                          chunk_crc)
+
+
+def split(data, count):
+    size = -(-len(data) // count)
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def frames(data, session_id, count, flags=0, integrity=True):
+    """Veriyi ikili çerçevelere böler; integrity ile CRC ve (ilk çerçevede)
+    SHA-256 özeti eklenir"""
+    chunks = split(data, count)
+    digest = hashlib.sha256(data).digest()
+    result = []
+    for i, chunk in enumerate(chunks):
+        chunk_flags = flags
+        payload = chunk
+        if integrity:
+            chunk_flags |= FLAG_CHECKSUM
+            payload = chunk + chunk_crc(chunk).to_bytes(CRC_SIZE, 'big')
+            if i == 0:
+                chunk_flags |= FLAG_DIGEST
+                payload = digest + payload
+        result.append(build_binary_frame(session_id, i, len(chunks), payload,
+                                         chunk_flags))
+    return result
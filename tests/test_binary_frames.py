@@ -0,0 +1,41 @@
+import pytest
+
+from chunk_engine import (BINARY_HEADER, FLAG_WINDOWED_ACK, ChunkError,
+                          build_binary_frame, is_binary_frame, parse_binary_frame)
+from upload_engine import UploadEngine
+
+
+def test_binary_frame_round_trip():
+    frame = build_binary_frame(0xDEADBEEF, 7, 9, b'veri', FLAG_WINDOWED_ACK)
+    assert is_binary_frame(frame)
+    session_id, index, total, flags, payload = parse_binary_frame(frame)
+    assert (session_id, index, total, flags, bytes(payload)) == \
+        (0xDEADBEEF, 7, 9, FLAG_WINDOWED_ACK, b'veri')
+
+
+def test_json_is_not_binary_frame():
+    assert not is_binary_frame(b'{"sessionId": 1}')
+    assert not is_binary_frame(b'')
+
+
+@pytest.mark.parametrize('size', range(BINARY_HEADER.size))
+def test_truncated_frame_header(size):
+    frame = build_binary_frame(1, 0, 1, b'')
+    with pytest.raises(ChunkError):
+        parse_binary_frame(frame[:size])
+
+
+def test_wrong_magic():
+    frame = bytearray(build_binary_frame(1, 0, 1, b'x'))
+    frame[0] = 0xB2
+    with pytest.raises(ChunkError):
+        parse_binary_frame(bytes(frame))
+
+
+def test_truncated_frame_fails_upload(store, transport):
+    engine = UploadEngine(transport, store, workers=1)
+    try:
+        engine.process_write(build_binary_frame(1, 0, 2, b'')[:5], 'dev')
+    finally:
+        engine.stop()
+    assert transport.sent == [b'HATA']
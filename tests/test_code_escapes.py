@@ -0,0 +1,50 @@
+import pytest
+
+from code_store import (_CODE_ESCAPE_RE, CodeUnescaper, _has_non_table_escape,
+                        _replace_escape, unescape_code)
+
+
+def fallback(text):
+    return _CODE_ESCAPE_RE.sub(_replace_escape, text)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('a\\nb', 'a\nb'),
+    ('a\\\\nb', 'a\\nb'),
+    ('re.match("\\d+", s)', 're.match("\\d+", s)'),
+    ('\\\\d', '\\d'),
+    ('x\\', 'x\\'),
+    ('x\\\\', 'x\\'),
+    ("print('çalış ğüşöı')\\n", "print('çalış ğüşöı')\n"),
+    ('yazı("\\u00e7")', 'yazı("\\u00e7")'),
+    ('\\t\\r\\b\\f\\\'\\"', '\t\r\b\f\'"'),
+    ('', ''),
+])
+def test_unescape_code(text, expected):
+    assert unescape_code(text) == expected
+
+
+@pytest.mark.parametrize('text', [
+    'a\\nb\\tc',
+    'a\\\\nb',
+    '\\\\\\\\d',
+    "print('Merhaba dünya 😀')\\nprint(\"ö\\\\n\")",
+    '\\\'\\"\\b\\f\\r',
+])
+def test_fast_path_matches_fallback(text):
+    # Yalnız tablo kaçışları: codecs.escape_decode yolu kullanılır
+    assert not _has_non_table_escape(text)
+    assert unescape_code(text) == fallback(text)
+
+
+@pytest.mark.parametrize('text', ['\\d', 'a\\\\\\d', 'x\\', 'ş\\ü', '\\x41', '\\0'])
+def test_non_table_escape_uses_fallback(text):
+    assert _has_non_table_escape(text)
+    assert unescape_code(text) == fallback(text)
+
+
+@pytest.mark.parametrize('text', ['a\\', 'a\\\\', 'ç\\nğ\\\\', '\\d\\'])
+def test_unescaper_trailing_backslash(text):
+    unescaper = CodeUnescaper()
+    result = unescaper.feed(text) + unescaper.flush()
+    assert result == unescape_code(text)
@@ -0,0 +1,108 @@
+import os
+
+import pytest
+
+import code_store
+from code_store import ProgramStore
+
+CODE = "print('merhaba')\n"
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_same_program_not_rewritten(store, monkeypatch):
+    digest = store.save(CODE)
+    stat = os.stat(store.blob_path(digest))
+
+    def fail(*args):
+        raise AssertionError("program yeniden yazıldı")
+    monkeypatch.setattr(store, 'write_blob', fail)
+    assert store.save(CODE) == digest
+    assert os.stat(store.blob_path(digest)).st_ino == stat.st_ino
+    assert store.counters()["stored_programs"] == 1
+    assert store.counters()["deduplicated_programs"] == 1
+    # Geçici dosya kalmaz
+    assert set(os.listdir(store.root)) == {'__pycache__', f'{digest}.py'}
+
+
+@pytest.mark.parametrize('content', ["", "print('merhabb')\n", CODE * 2])
+def test_corrupt_blob_repaired(store, content):
+    digest = store.save(CODE)
+    path = store.blob_path(digest)
+    os.chmod(path, 0o644)
+    with open(path, 'w') as f:
+        f.write(content)
+    assert not store.blob_intact(digest, len(CODE))
+    assert store.save(CODE) == digest
+    assert read(path) == CODE
+    assert store.blob_intact(digest, len(CODE))
+    assert store.counters()["stored_programs"] == 2
+
+
+def test_scan_removes_broken_files(tmp_path):
+    root = tmp_path / 'programs'
+    root.mkdir()
+    (root / ('ab' * 32 + '.py')).write_text("")
+    (root / '.yarim.part').write_text("x")
+    (root / ('cd' * 32 + '.py')).write_text("x")
+    store = ProgramStore(root=str(root), current_path=str(tmp_path / 'current.py'))
+    assert store.digests == {'cd' * 32}
+    assert set(os.listdir(root)) == {'__pycache__', 'cd' * 32 + '.py'}
+
+
+def test_current_symlink_swapped_atomically(store, monkeypatch):
+    first = store.save(CODE)
+    assert os.path.islink(store.current_path)
+    assert read(store.current_path) == CODE
+    replaced = []
+    real_replace = os.replace
+
+    def replace(src, dst):
+        # Yeni bağ önce geçici adla oluşturulur, sonra tek adımda yerine geçer
+        if dst == store.current_path:
+            assert os.path.islink(src) and read(dst) == CODE
+            replaced.append((src, dst))
+        real_replace(src, dst)
+    monkeypatch.setattr(code_store.os, 'replace', replace)
+    # Önceki çökmeden kalan geçici bağ engel olmaz
+    os.symlink('yok', store.current_path + '.tmp')
+    second = store.save("print(2)\n")
+    assert second != first
+    assert replaced == [(store.current_path + '.tmp', store.current_path)]
+    assert read(store.current_path) == "print(2)\n"
+    assert store.current_digest() == second
+    assert not os.path.lexists(store.current_path + '.tmp')
+    # Bağ görelidir: dizin taşınsa da geçerli kalır
+    assert not os.path.isabs(os.readlink(store.current_path))
+
+
+def test_index_appended_in_batches(tmp_path):
+    store = ProgramStore(root=str(tmp_path / 'programs'),
+                         current_path=str(tmp_path / 'current.py'), index_batch_size=3)
+    digest = store.save(CODE)
+    store.record(digest, 1, "Ayşe", "ilk")
+    store.record(digest, 2)
+    assert not os.path.exists(store.index_path)
+    assert store.has_pending()
+    store.record(digest, 3)
+    assert len(read(store.index_path).splitlines()) == 3
+    store.record(digest, 4, "Ayşe")
+    assert len(read(store.index_path).splitlines()) == 3
+    # lookup bekleyen kayıtları önce dosyaya yazar
+    assert [e["session"] for e in store.lookup(author="Ayşe")] == [1, 4]
+    assert not store.has_pending()
+
+
+def test_always_policy_writes_index_immediately(tmp_path):
+    store = ProgramStore(root=str(tmp_path / 'programs'),
+                         current_path=str(tmp_path / 'current.py'), fsync_policy="always")
+    store.record(store.save(CODE), 1)
+    assert len(read(store.index_path).splitlines()) == 1
+
+
+def test_invalid_fsync_policy(tmp_path):
+    with pytest.raises(ValueError):
+        ProgramStore(root=str(tmp_path), fsync_policy="bazen")
@@ -0,0 +1,91 @@
+import marshal
+
+import pytest
+
+import compile_cache
+from compile_cache import (CACHE_DISK_HITS, CACHE_HITS, COMPILES, CompileCache,
+                           syntax_message)
+
+DIGEST = "ab" * 32
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'program.py'
+    path.write_text("sonuc = [i * i for i in range(4)]\n")
+    return str(path)
+
+
+def test_memory_hit(tmp_path, source):
+    cache = CompileCache(str(tmp_path / 'cache'))
+    compiles, hits = COMPILES.get(), CACHE_HITS.get()
+    first = cache.get(DIGEST, source)
+    assert cache.get(DIGEST, source) is first
+    assert (COMPILES.get() - compiles, CACHE_HITS.get() - hits) == (1, 1)
+
+
+def test_disk_hit(tmp_path, source):
+    directory = str(tmp_path / 'cache')
+    path = CompileCache(directory).get(DIGEST, source).path
+    compiles, disk_hits = COMPILES.get(), CACHE_DISK_HITS.get()
+    # Yeni süreç: bellek boş, marshal dosyası diskte
+    entry = CompileCache(directory).get(DIGEST, source)
+    assert entry.path == path and entry.error is None
+    assert (COMPILES.get() - compiles, CACHE_DISK_HITS.get() - disk_hits) == (0, 1)
+
+
+def test_lru_limit(tmp_path, source):
+    cache = CompileCache(str(tmp_path / 'cache'), max_entries=2)
+    for digest in ("01" * 32, "02" * 32, "03" * 32):
+        cache.get(digest, source)
+    assert list(cache.entries) == ["02" * 32, "03" * 32]
+
+
+def test_marshal_round_trip(tmp_path, source):
+    entry = CompileCache(str(tmp_path / 'cache')).get(DIGEST, source)
+    with open(entry.path, 'rb') as f:
+        code = marshal.load(f)
+    namespace = {}
+    exec(code, namespace)
+    assert namespace["sonuc"] == [0, 1, 4, 9]
+    assert code.co_filename == source
+
+
+def test_syntax_error_cached(tmp_path):
+    path = tmp_path / 'bad.py'
+    path.write_text("x = 1\nif x\n")
+    cache = CompileCache(str(tmp_path / 'cache'))
+    entry = cache.get(DIGEST, str(path))
+    assert entry.path is None and entry.error.lineno == 2
+    compiles = COMPILES.get()
+    assert cache.get(DIGEST, str(path)) is entry
+    assert COMPILES.get() == compiles
+
+
+@pytest.mark.parametrize('error', [MemoryError, RecursionError])
+def test_compiler_limits_reported_as_syntax_error(tmp_path, source, monkeypatch, error):
+    def fail(*args):
+        raise error()
+    monkeypatch.setattr(compile_cache, 'compile', fail, raising=False)
+    entry = CompileCache(str(tmp_path / 'cache')).get(DIGEST, source)
+    assert entry.path is None
+    assert isinstance(entry.error, SyntaxError)
+    assert syntax_message(entry.error, 20).startswith("SYNTAX_0_")
+
+
+def test_syntax_message_sizing():
+    error = SyntaxError("beklenmeyen girinti: çok uzun bir açıklama")
+    error.lineno = 12
+    for limit in range(0, 60):
+        message = syntax_message(error, limit)
+        assert len(message.encode('utf-8')) <= limit
+        assert "SYNTAX_12_beklenmeyen girinti: çok uzun bir açıklama".startswith(message)
+
+
+def test_syntax_notification_fits_tagged_limit(engine, store, transport):
+    digest = store.save("def f(:\n    pass\n")
+    engine.check_program(digest, 'dev', "abcdefghi")
+    assert len(transport.sent) == 1
+    value = transport.sent[0]
+    assert len(value) <= transport.size
+    assert value.startswith(b"abcdefghi:SYNTAX_1_")
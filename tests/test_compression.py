@@ -0,0 +1,83 @@
+import base64
+import json
+import zlib
+
+import pytest
+
+from chunk_engine import (FLAG_COMPRESSED, FLAG_RAW_DEFLATE, MAX_DECOMPRESSED_BYTES,
+                          ChunkError, ChunkReassembler, DecompressingConsumer)
+from helpers import frames, split
+from json_stream import StreamingJSONDecoder
+
+CODE = "print('sıkıştırıldı')\n" * 50
+
+
+def deflate(data):
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def read_current(store):
+    with open(store.blob_path(store.current_digest()), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('flags, compress', [
+    (FLAG_COMPRESSED, zlib.compress),
+    (FLAG_COMPRESSED | FLAG_RAW_DEFLATE, deflate),
+])
+def test_compressed_binary_upload(engine, transport, store, flags, compress):
+    data = compress(json.dumps({"code": CODE}).encode())
+    for frame in frames(data, 7, 3, flags):
+        engine.process_write(frame, 'dev')
+    assert transport.sent[-1] == b'TAMAM'
+    assert read_current(store) == CODE
+
+
+@pytest.mark.parametrize('name, compress', [('zlib', zlib.compress), ('deflate', deflate)])
+def test_compressed_json_upload(engine, transport, store, name, compress):
+    chunks = split(compress(json.dumps({"code": CODE}).encode()), 3)
+    for i, chunk in enumerate(chunks):
+        envelope = {"sessionId": "s", "chunkIndex": i, "totalChunks": len(chunks),
+                    "compression": name, "data": base64.b64encode(chunk).decode()}
+        engine.process_write(json.dumps(envelope).encode(), 'dev')
+    assert transport.sent[-1] == b'TAMAM'
+    assert read_current(store) == CODE
+
+
+def test_unknown_compression():
+    with pytest.raises(ChunkError):
+        DecompressingConsumer(compression="lzma")
+
+
+def test_decompression_bomb():
+    bomb = zlib.compress(bytes(MAX_DECOMPRESSED_BYTES + 1), 9)
+    consumer = DecompressingConsumer()
+    with pytest.raises(ValueError):
+        consumer.feed(bomb)
+    assert consumer.output_bytes <= MAX_DECOMPRESSED_BYTES + 64 * 1024
+
+
+def test_decompression_bomb_discards_session(store):
+    reassembler = ChunkReassembler(
+        consumer_factory=lambda session_id: StreamingJSONDecoder(
+            {"code": store.open_writer}))
+    code = b'a' * (MAX_DECOMPRESSED_BYTES + 1)
+    bomb = zlib.compress(b'{"code": "' + code + b'"}', 9)
+    with pytest.raises(ValueError):
+        reassembler.add_chunk('s', 0, 2, bomb, 'zlib')
+    assert not reassembler.sessions
+    assert reassembler.buffered_bytes == 0
+
+
+def test_trailing_data_after_stream():
+    consumer = DecompressingConsumer()
+    with pytest.raises(ValueError):
+        consumer.feed(zlib.compress(b'veri') + b'fazla')
+
+
+def test_truncated_stream():
+    consumer = DecompressingConsumer()
+    consumer.feed(zlib.compress(b'veri' * 100)[:-6])
+    with pytest.raises(ValueError):
+        consumer.close()
@@ -0,0 +1,111 @@
+import pytest
+
+from download_engine import (DOWNLOAD_FRAME_MAGIC, DOWNLOAD_HEADER, START_OFFSET,
+                             START_PAYLOAD, DownloadEngine)
+
+CODE = "".join(f"print({i})\n" for i in range(40))
+
+
+@pytest.fixture
+def downloads(store, transport):
+    return DownloadEngine(transport, store)
+
+
+def parse(transport):
+    """Gönderilenleri (offset, veri) çerçeveleri ve metin mesajları olarak ayırır"""
+    frames, messages = [], []
+    for value in transport.sent:
+        if value[0] == DOWNLOAD_FRAME_MAGIC:
+            _, _, offset = DOWNLOAD_HEADER.unpack_from(value)
+            frames.append((offset, value[DOWNLOAD_HEADER.size:]))
+        else:
+            messages.append(value.decode())
+    return frames, messages
+
+
+def start(downloads, store, **request):
+    digest = store.save(CODE)
+    downloads.handle_request(dict({"download": f"program:{digest}"}, **request), 'dev')
+    return digest
+
+
+def test_start_frame(downloads, store, transport):
+    digest = start(downloads, store, window=1)
+    start_frame = transport.sent[0]
+    # Başlangıç çerçevesi en küçük bildirime sığar
+    assert len(start_frame) <= transport.size
+    magic, stream_id, offset = DOWNLOAD_HEADER.unpack_from(start_frame)
+    size, etag = START_PAYLOAD.unpack_from(start_frame, DOWNLOAD_HEADER.size)
+    assert (magic, stream_id, offset) == (DOWNLOAD_FRAME_MAGIC, 1, START_OFFSET)
+    assert (size, etag.hex()) == (len(CODE), digest[:16])
+
+
+def test_window_and_ack(downloads, store, transport):
+    start(downloads, store, window=2)
+    chunk_size = transport.size - DOWNLOAD_HEADER.size
+    frames, _ = parse(transport)
+    # Başlangıç çerçevesinden sonra yalnızca pencere kadar çerçeve
+    assert [offset for offset, _ in frames[1:]] == [0, chunk_size]
+    assert all(len(value) <= transport.size for value in transport.sent)
+    downloads.handle_request({"downloadId": 1, "ack": chunk_size}, 'dev')
+    frames, _ = parse(transport)
+    assert frames[-1][0] == 2 * chunk_size
+    # Gönderilmemiş veri onaylanamaz
+    downloads.handle_request({"downloadId": 1, "ack": len(CODE) - 1}, 'dev')
+    assert downloads.streams[1].acked == 3 * chunk_size
+
+
+def test_full_download(downloads, store, transport):
+    start(downloads, store, window=64)
+    frames, messages = parse(transport)
+    assert b"".join(data for _, data in frames[1:]).decode() == CODE
+    assert messages == ["DLEND_1"]
+    downloads.handle_request({"downloadId": 1, "ack": len(CODE)}, 'dev')
+    assert not downloads.streams
+
+
+def test_resend_from_offset(downloads, store, transport):
+    start(downloads, store, window=2)
+    chunk_size = transport.size - DOWNLOAD_HEADER.size
+    transport.sent.clear()
+    downloads.handle_request({"downloadId": 1, "ack": chunk_size, "resend": True}, 'dev')
+    frames, _ = parse(transport)
+    assert [offset for offset, _ in frames] == [chunk_size, 2 * chunk_size]
+    assert frames[0][1] == CODE[chunk_size:2 * chunk_size].encode()
+
+
+def test_resume_with_offset_and_etag(downloads, store, transport):
+    digest = store.save(CODE)
+    downloads.handle_request({"download": f"program:{digest}", "offset": 100,
+                              "etag": digest[:16].upper(), "window": 64}, 'dev')
+    frames, messages = parse(transport)
+    assert frames[1][0] == 100
+    assert b"".join(data for _, data in frames[1:]).decode() == CODE[100:]
+    assert messages == ["DLEND_1"]
+
+
+def test_changed_etag(downloads, store, transport):
+    digest = store.save(CODE)
+    downloads.handle_request({"download": f"program:{digest}", "etag": "0" * 16}, 'dev')
+    assert transport.sent == [b"DLERR_CHANGED"]
+    assert not downloads.streams
+
+
+def test_cancel(downloads, store, transport):
+    start(downloads, store, window=1)
+    downloads.handle_request({"downloadId": 1, "cancel": True}, 'dev')
+    assert not downloads.streams
+    transport.sent.clear()
+    downloads.handle_request({"downloadId": 1, "ack": 13}, 'dev')
+    assert transport.sent == [b"DLERR_UNKNOWN"]
+
+
+@pytest.mark.parametrize('request_data, message', [
+    ({"download": "program:zz"}, b"DLERR_NOTFOUND"),
+    ({"download": "nothing"}, b"DLERR_NOTFOUND"),
+    ({"download": "program", "offset": "x"}, b"DLERR_INVALID"),
+])
+def test_rejected_requests(downloads, store, transport, request_data, message):
+    store.set_current(store.save(CODE))
+    downloads.handle_request(request_data, 'dev')
+    assert transport.sent == [message]
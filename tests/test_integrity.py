@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from chunk_engine import (BINARY_HEADER, CRC_SIZE, FLAG_CHECKSUM, FLAG_DIGEST,
+                          ChunkError, ReassemblySession, build_binary_frame, chunk_crc,
+                          split_integrity)
+from helpers import frames, split
+
+
+@pytest.mark.parametrize('flags, size', [
+    (FLAG_DIGEST, 31),
+    (FLAG_CHECKSUM, 3),
+    (FLAG_DIGEST | FLAG_CHECKSUM, 35),
+])
+def test_truncated_integrity_fields(flags, size):
+    with pytest.raises(ChunkError):
+        split_integrity(memoryview(bytes(size)), flags)
+
+
+def test_split_integrity():
+    digest = bytes(range(32))
+    payload = digest + b'veri' + chunk_crc(b'veri').to_bytes(CRC_SIZE, 'big')
+    data, got_digest, crc = split_integrity(memoryview(payload),
+                                            FLAG_DIGEST | FLAG_CHECKSUM)
+    assert (bytes(data), got_digest, crc) == (b'veri', digest, chunk_crc(b'veri'))
+
+
+def test_crc_covers_utf8_text():
+    assert chunk_crc('ç') == chunk_crc('ç'.encode('utf-8'))
+
+
+def test_crc_mismatch_requests_chunk_again(engine, transport, store):
+    data = json.dumps({"code": "print(1)\n"}).encode()
+    first, second = frames(data, 5, 2)
+    corrupt = bytearray(second)
+    corrupt[BINARY_HEADER.size] ^= 0xFF
+    engine.process_write(first, 'dev')
+    engine.process_write(bytes(corrupt), 'dev')
+    assert transport.sent == [b'OK_0', b'NACK_1']
+    engine.process_write(second, 'dev')
+    assert transport.sent[-1] == b'TAMAM'
+    with open(store.blob_path(store.current_digest())) as f:
+        assert f.read() == "print(1)\n"
+
+
+def test_digest_mismatch_fails_session(engine, transport):
+    data = json.dumps({"code": "print(1)\n"}).encode()
+    first, second = frames(data, 6, 2)
+    other = frames(json.dumps({"code": "print(2)\n"}).encode(), 6, 2)[0]
+    # Özet başka bir belgeden; parçalar CRC'yi geçer ama özet tutmaz
+    first = other[:BINARY_HEADER.size + 32] + first[BINARY_HEADER.size + 32:]
+    engine.process_write(first, 'dev')
+    engine.process_write(second, 'dev')
+    assert transport.sent == [b'OK_0', b'HATA']
+
+
+def test_late_digest_discards_session(engine, transport):
+    # Özet ilk parçadan sonra gelirse HATA'dan önce session atılır
+    data = json.dumps({"code": "print(1)\n"}).encode()
+    first, second = split(data, 2)
+    payload = (bytes(32) + second
+               + chunk_crc(second).to_bytes(CRC_SIZE, 'big'))
+    engine.process_write(frames(data, 8, 2, integrity=False)[0], 'dev')
+    engine.process_write(build_binary_frame(8, 1, 2, payload,
+                                            FLAG_DIGEST | FLAG_CHECKSUM), 'dev')
+    assert transport.sent == [b'OK_0', b'HATA']
+    assert not engine.reassembler.sessions
+    assert engine.reassembler.buffered_bytes == 0
+
+
+def test_digest_must_not_change():
+    session = ReassemblySession('s', 2)
+    session.expect_digest(bytes(32))
+    with pytest.raises(ChunkError):
+        session.expect_digest(bytes([1]) * 32)
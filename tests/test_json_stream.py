@@ -0,0 +1,175 @@
+import json
+
+import pytest
+
+from code_store import SPOOL_LIMIT, CodeUnescaper, unescape_code
+from json_stream import MAX_FIELD_SIZE, StreamingJSONDecoder
+from upload_engine import UploadEngine
+
+DOCUMENT = json.dumps({
+    "author": "Ayşe \"öğretmen\"",
+    "description": "çizgi\\n\tsekme / ç \U0001F600",
+    "count": 3,
+    "tags": ["a,b", {"x": "}"}],
+    "ok": True,
+    "none": None,
+}, ensure_ascii=False)
+
+
+def decode(data, size, field_sinks=None):
+    decoder = StreamingJSONDecoder(field_sinks)
+    for i in range(0, len(data), size):
+        decoder.feed(data[i:i + size])
+    return decoder.close()
+
+
+def decode_split(data, at, field_sinks=None):
+    decoder = StreamingJSONDecoder(field_sinks)
+    decoder.feed(data[:at])
+    decoder.feed(data[at:])
+    return decoder.close()
+
+
+def test_whole_document():
+    assert decode(DOCUMENT.encode('utf-8'), len(DOCUMENT) * 4) == json.loads(DOCUMENT)
+
+
+@pytest.mark.parametrize('ascii_only', [False, True])
+def test_split_at_every_boundary(ascii_only):
+    # Kaçış dizileri (\uXXXX vekil çiftleri dahil) ve çok byte'lı UTF-8
+    # karakterleri her noktada bölünür
+    document = json.dumps(json.loads(DOCUMENT), ensure_ascii=ascii_only)
+    data = document.encode('utf-8')
+    expected = json.loads(document)
+    for at in range(len(data) + 1):
+        assert decode_split(data, at) == expected, at
+
+
+def test_single_byte_chunks():
+    data = json.dumps(json.loads(DOCUMENT)).encode('utf-8')
+    assert decode(data, 1) == json.loads(DOCUMENT)
+
+
+def test_surrogate_pair_split_between_escapes():
+    data = b'{"s": "\\ud83d\\ude00"}'
+    for at in range(len(data) + 1):
+        assert decode_split(data, at) == {"s": "\U0001F600"}, at
+
+
+@pytest.mark.parametrize('data', [b'{"s": "\\ud800x"}', b'{"s": "\\ud800\\u0041"}',
+                                  b'{"s": "\\udc00"}'])
+def test_lone_surrogate(data):
+    for at in range(len(data) + 1):
+        assert decode_split(data, at) == json.loads(data), at
+
+
+def test_str_chunks():
+    assert decode(DOCUMENT, 7) == json.loads(DOCUMENT)
+
+
+@pytest.mark.parametrize('data', [
+    b'{"a": 1',
+    b'{"a": "x',
+    b'{"a": "x\\',
+    b'',
+])
+def test_truncated_document(data):
+    with pytest.raises(json.JSONDecodeError):
+        decode(data, 3)
+
+
+@pytest.mark.parametrize('data', [
+    b'[1, 2]',
+    b'{"a": 1} x',
+    b'{"a" 1}',
+    b'{"a": 1 "b": 2}',
+    b'{"a": "\\q"}',
+    b'{"a": "\\u12g4"}',
+])
+def test_invalid_document(data):
+    with pytest.raises(json.JSONDecodeError):
+        decode(data, 2)
+
+
+def test_field_size_limit():
+    text = "x" * (MAX_FIELD_SIZE - 16)
+    assert decode(json.dumps({"description": text}).encode(), 100) == {"description": text}
+    data = json.dumps({"description": "x" * (MAX_FIELD_SIZE + 1)}).encode()
+    with pytest.raises(json.JSONDecodeError):
+        decode(data, 100)
+
+
+def test_raw_value_size_limit():
+    data = json.dumps({"tags": list(range(MAX_FIELD_SIZE))}).encode()
+    with pytest.raises(json.JSONDecodeError):
+        decode(data, 100)
+
+
+def test_key_size_limit():
+    data = json.dumps({"k" * (MAX_FIELD_SIZE + 1): 1}).encode()
+    with pytest.raises(json.JSONDecodeError):
+        decode(data, 100)
+
+
+def test_code_streams_to_store(store):
+    # Blockly kaçışları ("\\n") parça sınırında bölünse de aynı program
+    code = "print('merhaba')\\nfor i in range(3):\\n\\tprint(i, \"\\\\d\")\n"
+    data = json.dumps({"author": "a", "code": code}).encode('utf-8')
+    digests = set()
+    for at in range(len(data) + 1):
+        fields = decode_split(data, at, {"code": store.open_writer})
+        assert fields["author"] == "a"
+        digests.add(fields["code"])
+    assert len(digests) == 1
+    with open(store.blob_path(digests.pop()), encoding='utf-8') as f:
+        assert f.read() == unescape_code(code)
+
+
+def test_large_code_is_not_limited(store):
+    code = "x = 1\n" * (MAX_FIELD_SIZE * 2)
+    fields = decode(json.dumps({"code": code}).encode(), 512,
+                    {"code": store.open_writer})
+    with open(store.blob_path(fields["code"])) as f:
+        assert f.read() == code
+
+
+@pytest.mark.parametrize('value', [123, 1.5, {"a": 1}, [1], None, True])
+def test_non_string_code_rejected(store, value):
+    data = json.dumps({"code": value}).encode()
+    with pytest.raises(json.JSONDecodeError):
+        decode(data, 4, {"code": store.open_writer})
+
+
+def test_duplicate_code_field_rejected(store):
+    with pytest.raises(json.JSONDecodeError):
+        decode(b'{"code": "a", "code": "b"}', 4, {"code": store.open_writer})
+
+
+def test_buffered_bytes_counts_sink_spool(store):
+    decoder = StreamingJSONDecoder({"code": store.open_writer})
+    decoder.feed(b'{"code": "' + b'a' * 1000)
+    assert decoder.buffered_bytes >= 1000
+    # Bellek sınırından sonra geçici dosyaya geçilir
+    decoder.feed(b'a' * SPOOL_LIMIT)
+    assert decoder.buffered_bytes < 100
+    decoder.abort()
+
+
+def test_code_unescaper_split_escapes():
+    text = "a\\nb\\\\nc\\'d\\\\\\te"
+    for at in range(len(text) + 1):
+        unescaper = CodeUnescaper()
+        result = unescaper.feed(text[:at]) + unescaper.feed(text[at:]) + unescaper.flush()
+        assert result == unescape_code(text), at
+
+
+def test_non_string_code_upload_fails(store, transport):
+    engine = UploadEngine(transport, store, workers=1)
+    try:
+        data = json.dumps({"code": 42}).encode()
+        engine.store_chunk('dev', 1, 0, 2, data[:4])
+        engine.store_chunk('dev', 1, 1, 2, data[4:])
+    finally:
+        engine.stop()
+    assert transport.sent == [b'OK_0', b'HATA']
+    assert not engine.reassembler.sessions
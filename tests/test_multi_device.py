@@ -0,0 +1,73 @@
+import hashlib
+import json
+
+from helpers import split
+
+SESSION = 7
+
+
+def chunks(code, count=3):
+    return split(json.dumps({"code": code}), count)
+
+
+def send(engine, device, parts, index, session_id=SESSION):
+    engine.handle_chunk({"sessionId": session_id, "chunkIndex": index,
+                         "totalChunks": len(parts), "data": parts[index]}, device)
+
+
+def stored(store, code):
+    digest = hashlib.sha256(code.encode()).hexdigest()
+    with open(store.blob_path(digest)) as f:
+        return f.read()
+
+
+def test_same_session_id_isolated(engine, store, transport):
+    # İki tablet aynı sessionId ile aynı anda yükler; parçalar karışmaz
+    code_a = "print('tablet A')\n"
+    code_b = "print('tablet B, daha uzun program')\n"
+    parts_a, parts_b = chunks(code_a), chunks(code_b)
+    for index in range(3):
+        send(engine, 'tabA', parts_a, index)
+        send(engine, 'tabB', parts_b, index)
+    assert transport.sent_to('tabA') == [b'OK_0', b'OK_1', b'TAMAM']
+    assert transport.sent_to('tabB') == [b'OK_0', b'OK_1', b'TAMAM']
+    assert stored(store, code_a) == code_a
+    assert stored(store, code_b) == code_b
+    assert not engine.reassembler.sessions
+
+
+def test_resume_rebinds_single_candidate(engine, store, transport):
+    code = "print('yeniden bağlandı')\n"
+    parts = chunks(code)
+    send(engine, 'tabA', parts, 0)
+    send(engine, 'tabA', parts, 2)
+    # Yeniden bağlanan istemcinin cihaz adı değişti
+    engine.handle_chunk({"sessionId": SESSION, "resume": True}, 'tabA-new')
+    assert transport.sent_to('tabA-new') == [b'HAVE_1_2']
+    assert list(engine.reassembler.sessions) == [('tabA-new', SESSION)]
+    send(engine, 'tabA-new', parts, 1)
+    assert transport.sent_to('tabA-new')[-1] == b'TAMAM'
+    assert stored(store, code) == code
+
+
+def test_resume_ambiguous_does_not_rebind(engine, transport):
+    parts_a = chunks("print('A')\n")
+    parts_b = chunks("print('B')\n")
+    send(engine, 'tabA', parts_a, 0)
+    send(engine, 'tabB', parts_b, 0)
+    # Aynı sessionId'ye sahip iki session: hangisi olduğu bilinemez
+    engine.handle_chunk({"sessionId": SESSION, "resume": True}, 'tabC')
+    assert transport.sent_to('tabC') == [b'HAVE_0']
+    assert set(engine.reassembler.sessions) == {('tabA', SESSION), ('tabB', SESSION)}
+    for device in ('tabA', 'tabB'):
+        session = engine.reassembler.sessions[(device, SESSION)]
+        assert session.received_count == 1
+
+
+def test_resume_on_own_device_ignores_others(engine, transport):
+    parts_a = chunks("print('A')\n")
+    send(engine, 'tabA', parts_a, 0)
+    send(engine, 'tabB', chunks("print('B')\n"), 0)
+    engine.handle_chunk({"sessionId": SESSION, "resume": True}, 'tabA')
+    assert transport.sent_to('tabA')[-1] == b'HAVE_1'
+    assert set(engine.reassembler.sessions) == {('tabA', SESSION), ('tabB', SESSION)}
@@ -0,0 +1,115 @@
+import pytest
+
+import notify_scheduler
+from notify_scheduler import NotificationScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+class Harness:
+    def __init__(self, monkeypatch, rate=1, burst=1):
+        self.clock = FakeClock()
+        monkeypatch.setattr(notify_scheduler, 'time', self.clock)
+        self.sent = []
+        self.timers = []
+        self.subscribed = True
+        self.scheduler = NotificationScheduler(
+            self.sent.append, lambda interval, callback: self.timers.append(callback),
+            lambda: self.subscribed, rate=rate, burst=burst)
+
+    def submit(self, *values, device='dev'):
+        for value in values:
+            self.scheduler.submit(device, value)
+
+    def pending(self):
+        return [p.value for p in self.scheduler.pending]
+
+
+@pytest.fixture
+def harness(monkeypatch):
+    # Kova tek jetonlu ve saat durmuş: ilk bildirimden sonrakiler sırada bekler
+    return Harness(monkeypatch)
+
+
+@pytest.mark.parametrize('kind', ['ACK', 'HAVE'])
+def test_progress_replaces_pending(harness, kind):
+    harness.submit(b'OK_0', f'{kind}_2'.encode(), f'{kind}_4'.encode(),
+                   f'{kind}_6_3'.encode())
+    assert harness.sent == [b'OK_0']
+    assert harness.pending() == [f'{kind}_6_3'.encode()]
+
+
+def test_tags_are_separate_streams(harness):
+    harness.submit(b'OK_0', b'1:ACK_4', b'2:ACK_5', b'1:ACK_8')
+    assert harness.pending() == [b'2:ACK_5', b'1:ACK_8']
+    harness.submit(b'ACK_3', device='other')
+    assert harness.pending() == [b'2:ACK_5', b'1:ACK_8', b'ACK_3']
+
+
+@pytest.mark.parametrize('final', [b'TAMAM', b'HATA'])
+def test_final_message_drops_acks(harness, final):
+    harness.submit(b'NACK_1', b'OK_0', b'OK_1', b'ACK_2', b'5:OK_0', final)
+    assert harness.pending() == [b'5:OK_0', final]
+
+
+def test_same_message_sent_once(harness):
+    harness.submit(b'HATA', b'OK_3', b'OK_4', b'OK_3')
+    assert harness.pending() == [b'OK_4', b'OK_3']
+
+
+def test_binary_frames_never_merged(harness):
+    frame = bytes([0xB2, 0, 1, 0, 0, 0, 0]) + b'ACK_1'
+    harness.submit(b'OK_0', frame, frame, bytes([0xB3]) + b'TAMAM')
+    assert harness.pending() == [frame, frame, bytes([0xB3]) + b'TAMAM']
+
+
+def test_message_with_colon_keeps_tag(harness):
+    harness.submit(b'OK_0', b"7:SYNTAX_1_expected ':'", b"SYNTAX_2_x: y")
+    streams = [(p.stream, p.message) for p in harness.scheduler.pending]
+    assert streams == [(('dev', '7'), "SYNTAX_1_expected ':'"),
+                       (('dev', 'SYNTAX_2_x'), " y")]
+
+
+def test_dropped_while_unsubscribed(harness):
+    harness.subscribed = False
+    harness.submit(b'OK_0', b'TAMAM')
+    assert harness.sent == [] and harness.pending() == []
+    assert harness.timers == []
+
+
+def test_pending_dropped_on_unsubscribe(harness):
+    harness.submit(b'OK_0', b'OK_1', b'OK_2')
+    harness.subscribed = False
+    assert harness.timers[0]() is False
+    assert harness.sent == [b'OK_0'] and harness.pending() == []
+    assert harness.scheduler.timer is False
+
+
+def test_token_bucket_pacing(monkeypatch):
+    harness = Harness(monkeypatch, rate=10, burst=2)
+    harness.submit(*[f'OK_{i}'.encode() for i in range(6)])
+    # Kova doluyken iki bildirim hemen gider, kalanlar zamanlayıcıyı bekler
+    assert harness.sent == [b'OK_0', b'OK_1']
+    assert len(harness.timers) == 1
+    flush = harness.timers[0]
+    assert flush() is True and len(harness.sent) == 2
+    harness.clock.now += 0.15
+    assert flush() is True and harness.sent[2:] == [b'OK_2']
+    # Uzun bekleme kovayı en fazla burst kadar doldurur
+    harness.clock.now += 10
+    assert flush() is True and harness.sent[3:] == [b'OK_3', b'OK_4']
+    harness.clock.now += 0.15
+    assert flush() is False and harness.sent[5:] == [b'OK_5']
+    assert harness.scheduler.timer is False
+
+
+def test_zero_rate_sends_immediately(monkeypatch):
+    harness = Harness(monkeypatch, rate=0)
+    harness.submit(*[f'OK_{i}'.encode() for i in range(20)])
+    assert len(harness.sent) == 20 and harness.timers == []
@@ -0,0 +1,49 @@
+import os
+import pwd
+
+import pytest
+
+from program_runner import ProgramRunner, message_tag
+
+LONG_TAG = "abcdefghi"
+
+
+@pytest.fixture
+def runner(tmp_path):
+    run_as = None
+    if os.geteuid() == 0:
+        try:
+            run_as = pwd.getpwnam('nobody').pw_name
+        except KeyError:
+            pytest.skip("ayrıcalıksız kullanıcı yok")
+    return ProgramRunner(directory=str(tmp_path / 'runs'), run_as=run_as)
+
+
+def test_message_tag():
+    assert message_tag("RUN_1", 7, 20) == 7
+    assert message_tag("RUNERR_DISABLED", LONG_TAG, 20) is None
+    assert message_tag("RUNERR_DISABLED", None, 20) is None
+
+
+@pytest.mark.parametrize('message', ["RUN_65535", "EXIT_65535_TIMEOUT",
+                                     "OUTFULL_65535", "RUNERR_FAILED"])
+def test_runner_messages_fit_notify_size(runner, transport, message):
+    runner.send_message(transport, 'dev', LONG_TAG, message)
+    runner.send_message(transport, 'dev', 7, message)
+    # Sığmayan etiket düşer, durum metni hiç kesilmez
+    assert transport.sent[1] == f"7:{message}".encode()
+    assert transport.sent[0] in (f"{LONG_TAG}:{message}".encode(), message.encode())
+    assert all(len(value) <= transport.size for value in transport.sent)
+
+
+def test_start_run_disabled_fits_notify_size(engine, transport):
+    engine.start_run("x", None, 'dev', LONG_TAG)
+    engine.start_run("x", None, 'dev', 1)
+    assert transport.sent == [b"RUNERR_DISABLED", b"1:RUNERR_DISABLED"]
+
+
+def test_start_run_nocode_fits_notify_size(engine, transport, runner):
+    engine.runner = runner
+    engine.start_run(None, None, 'dev', LONG_TAG)
+    engine.start_run(None, None, 'dev', 1)
+    assert transport.sent == [b"RUNERR_NOCODE", b"1:RUNERR_NOCODE"]
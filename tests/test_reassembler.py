@@ -0,0 +1,113 @@
+import json
+import random
+
+import pytest
+
+from chunk_engine import FLAG_WINDOWED_ACK, ChunkError, ChunkReassembler
+from helpers import frames, split
+from json_stream import StreamingJSONDecoder
+
+
+def test_out_of_order_reassembly():
+    reassembler = ChunkReassembler()
+    data = bytes(range(256)) * 40
+    chunks = split(data, 16)
+    order = list(range(len(chunks)))
+    random.Random(1).shuffle(order)
+    for i in order:
+        session, is_new = reassembler.add_chunk('s', i, len(chunks), chunks[i])
+        assert is_new
+    assert not reassembler.add_chunk('s', order[0], len(chunks), chunks[order[0]])[1]
+    result, stats = reassembler.finish('s')
+    assert result == data
+    assert stats['total_bytes'] == len(data)
+    assert reassembler.buffered_bytes == 0
+
+
+def test_json_chunks_join_as_text():
+    reassembler = ChunkReassembler()
+    reassembler.add_chunk('s', 1, 2, 'dünya"}')
+    reassembler.add_chunk('s', 0, 2, '{"a": "merhaba ')
+    assert reassembler.finish('s')[0] == '{"a": "merhaba dünya"}'
+
+
+def test_expired_sessions_are_dropped():
+    reassembler = ChunkReassembler(session_ttl=10)
+    session, _ = reassembler.add_chunk('s', 0, 2, b'x' * 100)
+    assert reassembler.expire_sessions(now=session.last_chunk_at + 5) == 0
+    assert reassembler.expire_sessions(now=session.last_chunk_at + 11) == 1
+    assert not reassembler.sessions
+    assert reassembler.buffered_bytes == 0
+
+
+def test_least_recently_used_session_is_evicted():
+    reassembler = ChunkReassembler(max_buffered_bytes=250)
+    reassembler.add_chunk('a', 0, 3, b'x' * 100)
+    reassembler.add_chunk('b', 0, 3, b'x' * 100)
+    reassembler.add_chunk('a', 1, 3, b'x' * 100)
+    assert list(reassembler.sessions) == ['a']
+    assert reassembler.buffered_bytes == 200
+    assert reassembler.evicted_count == 1
+
+
+def test_session_over_budget_is_rejected():
+    reassembler = ChunkReassembler(max_buffered_bytes=150)
+    reassembler.add_chunk('s', 0, 3, b'x' * 100)
+    with pytest.raises(ChunkError):
+        reassembler.add_chunk('s', 1, 3, b'x' * 100)
+    assert not reassembler.sessions
+    assert reassembler.buffered_bytes == 0
+
+
+def test_consumer_memory_counts_against_budget(store):
+    reassembler = ChunkReassembler(
+        max_buffered_bytes=1000,
+        consumer_factory=lambda session_id: StreamingJSONDecoder(
+            {"code": store.open_writer}))
+    # Parçalar tüketiciye aktarıldı ama kod hâlâ bellekte (ProgramWriter)
+    reassembler.add_chunk('s', 0, 3, '{"code": "' + 'a' * 590)
+    assert reassembler.buffered_bytes >= 590
+    with pytest.raises(ChunkError):
+        reassembler.add_chunk('s', 1, 3, 'a' * 600)
+    assert not reassembler.sessions
+    assert reassembler.buffered_bytes == 0
+
+
+def upload(engine, session_id, code, count, flags=0, device='dev'):
+    data = json.dumps({"code": code}).encode()
+    chunks = frames(data, session_id, count, flags, integrity=False)
+    for frame in chunks:
+        engine.process_write(frame, device)
+    return chunks
+
+
+def test_late_duplicate_of_completed_session_gets_tamam(engine, transport, store):
+    chunks = upload(engine, 4, "print(1)\n", 2)
+    assert transport.sent == [b'OK_0', b'TAMAM']
+    # İstemci TAMAM'ı kaçırdı ve son parçayı (ya da başka bir parçayı) tekrar gönderdi
+    engine.process_write(chunks[1], 'dev')
+    engine.process_write(chunks[0], 'dev')
+    assert transport.sent[2:] == [b'TAMAM', b'TAMAM']
+    assert not engine.reassembler.sessions
+
+
+def test_late_duplicate_in_windowed_mode(engine, transport):
+    chunks = upload(engine, 4, "print(1)\n", 2, FLAG_WINDOWED_ACK)
+    assert transport.sent[-1] == b'TAMAM'
+    engine.process_write(chunks[1], 'dev')
+    assert transport.sent[-1] == b'ACK_2'
+    assert not engine.reassembler.sessions
+
+
+@pytest.mark.parametrize('code, count', [
+    ("print(2)\n", 1),      # farklı parça sayısı
+    ("x = 2 # print(2)\n", 2),  # aynı parça sayısı, farklı içerik
+])
+def test_reused_session_id_starts_new_upload(engine, transport, store, code, count):
+    upload(engine, 4, "print(1)\n", 2)
+    transport.sent.clear()
+    upload(engine, 4, code, count)
+    assert transport.sent[-1] == b'TAMAM'
+    assert b'HATA' not in transport.sent
+    with open(store.blob_path(store.current_digest())) as f:
+        assert f.read() == code
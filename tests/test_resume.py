@@ -0,0 +1,100 @@
+import json
+import random
+import re
+
+import pytest
+
+from chunk_engine import (FLAG_RESUME_QUERY, FLAG_TAGGED_NOTIFY, ReassemblySession,
+                          build_binary_frame)
+from helpers import frames
+from session_spool import SessionSpool
+from upload_engine import UploadEngine
+
+
+def parse_have(message):
+    """HAVE_<sıradaki>[_<hex>] yanıtından sunucudaki parça indekslerini çıkarır"""
+    match = re.fullmatch(r'HAVE_(\d+)(?:_([0-9a-f]+))?', message)
+    assert match is not None, message
+    start = int(match.group(1))
+    bitmap = int(match.group(2) or '0', 16)
+    return start, {start + i for i in range(bitmap.bit_length()) if bitmap >> i & 1}
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_resume_bitmap_round_trip(seed):
+    rng = random.Random(seed)
+    total = rng.randint(1, 100)
+    received = {i for i in range(total) if rng.random() < 0.6}
+    session = ReassemblySession('s', total)
+    for i in received:
+        session.add_chunk(i, b'x')
+    start, have = parse_have(session.resume_message())
+    # Sıradaki parçaya kadar her şey alınmış, sonrası bit haritasında
+    assert start == min(set(range(total)) - received, default=total)
+    assert set(range(start)) <= received
+    window = {i for i in received if start < i < start + 32}
+    assert have == window
+
+
+def test_resume_unknown_session(engine, transport):
+    engine.process_write(json.dumps({"sessionId": "yok", "resume": True}).encode(), 'dev')
+    assert transport.sent == [b'HAVE_0']
+
+
+def test_resume_after_restart(tmp_path, store, transport):
+    data = json.dumps({"code": "print('devam')\n" * 20}).encode()
+    chunks = frames(data, 9, 6, FLAG_TAGGED_NOTIFY)
+    spool_dir = str(tmp_path / 'spool')
+
+    engine = UploadEngine(transport, store, workers=1, spool=SessionSpool(spool_dir))
+    for i in (0, 1, 3):
+        engine.process_write(chunks[i], 'eski-cihaz')
+    engine.stop()
+
+    # Sunucu yeniden başladı, istemci başka bir adresle bağlandı
+    transport.sent.clear()
+    engine = UploadEngine(transport, store, workers=1, spool=SessionSpool(spool_dir))
+    try:
+        query = build_binary_frame(9, 0, 6, b'', FLAG_RESUME_QUERY | FLAG_TAGGED_NOTIFY)
+        engine.process_write(query, 'yeni-cihaz')
+        tag, _, message = transport.sent[-1].decode().partition(':')
+        assert tag == '9'
+        assert parse_have(message) == (2, {3})
+        for i in (2, 4, 5):
+            engine.process_write(chunks[i], 'yeni-cihaz')
+        assert transport.sent[-1] == b'9:TAMAM'
+        # Tamamlanmış session sorgulanırsa TAMAM
+        engine.process_write(query, 'yeni-cihaz')
+        assert transport.sent[-1] == b'9:TAMAM'
+        assert not engine.reassembler.sessions
+    finally:
+        engine.stop()
+    with open(store.blob_path(store.current_digest())) as f:
+        assert f.read() == "print('devam')\n" * 20
+
+
+def test_resume_bitmap_fits_limit():
+    session = ReassemblySession('s', 200)
+    for i in list(range(100)) + list(range(101, 140)):
+        session.add_chunk(i, b'x')
+    assert session.resume_message(20) == 'HAVE_100_fffffffe'
+    message = session.resume_message(20 - len('abcdefghi:'))
+    assert len(message) <= 10
+    # Kırpılan mesaj da doğru: yalnızca sunucudaki parçalar bildirilir
+    start, have = parse_have(message)
+    assert start == 100 and have <= set(range(101, 140))
+
+
+def test_tagged_resume_fits_notify_size(engine, transport):
+    for i in list(range(100)) + list(range(101, 140)):
+        envelope = {"sessionId": "abcdefghi", "chunkIndex": i, "totalChunks": 200,
+                    "data": '{"code": "' if i == 0 else "x", "notifyTag": True}
+        engine.process_write(json.dumps(envelope).encode(), 'dev')
+    transport.sent.clear()
+    query = {"sessionId": "abcdefghi", "resume": True, "notifyTag": True}
+    engine.process_write(json.dumps(query).encode(), 'dev')
+    [reply] = transport.sent
+    assert len(reply) <= transport.size
+    tag, _, message = reply.decode().partition(':')
+    assert tag == 'abcdefghi'
+    assert parse_have(message)[0] == 100
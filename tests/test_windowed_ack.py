@@ -0,0 +1,66 @@
+from chunk_engine import (ACK_EVERY, FLAG_TAGGED_NOTIFY, FLAG_WINDOWED_ACK,
+                          ReassemblySession, build_binary_frame)
+
+
+def test_windowed_upload_acks_every_few_chunks(engine, transport):
+    data = b'{"code": "' + b'x' * (ACK_EVERY + 2) + b'"}'
+    chunks = [data[:11]] + [data[i:i + 1] for i in range(11, len(data))]
+    for i, chunk in enumerate(chunks[:ACK_EVERY]):
+        engine.process_write(build_binary_frame(3, i, len(chunks), chunk,
+                                                FLAG_WINDOWED_ACK), 'dev')
+    assert transport.sent == [f'ACK_{ACK_EVERY}'.encode()]
+    for i in range(ACK_EVERY, len(chunks)):
+        engine.process_write(build_binary_frame(3, i, len(chunks), chunks[i],
+                                                FLAG_WINDOWED_ACK), 'dev')
+    assert transport.sent[-1] == b'TAMAM'
+
+
+def test_ack_bitmap_marks_missing_chunks():
+    session = ReassemblySession('s', 10)
+    for i in (0, 1, 3, 6):
+        session.add_chunk(i, b'x')
+    # Sıradaki 2; eksikler 2, 4, 5 (bit 0, 2, 3)
+    assert session.ack_message() == 'ACK_2_d'
+
+
+def test_nack_fits_tagged_notification():
+    session = ReassemblySession('s', 5000)
+    for i in [0, 4999] + list(range(100, 4000, 37)):
+        session.add_chunk(i, b'x')
+    messages = session.nack_messages(20 - len('123456:'))
+    assert len(messages) > 1
+    requested = []
+    for message in messages:
+        assert len(message) <= 13
+        assert message.startswith('NACK_')
+        requested += [int(i) for i in message[5:].split(',')]
+    assert requested == list(range(1, 1 + len(requested)))
+
+
+def test_nack_too_long_for_tag():
+    session = ReassemblySession('s', 5000)
+    session.add_chunk(4999, b'x')
+    assert session.nack_messages(5) == []
+
+
+def test_ack_bitmap_fits_limit():
+    session = ReassemblySession('s', 100)
+    for i in [0, 40]:
+        session.add_chunk(i, b'x')
+    assert session.ack_message(20) == 'ACK_1_ffffffff'
+    message = session.ack_message(10)
+    assert len(message) <= 10 and message.startswith('ACK_1_')
+
+
+def test_tagged_nack_fits_notify_size(engine, transport):
+    frame_flags = FLAG_WINDOWED_ACK | FLAG_TAGGED_NOTIFY
+    engine.process_write(build_binary_frame(123456, 0, 3000, b'{', frame_flags), 'dev')
+    engine.process_write(build_binary_frame(123456, 2999, 3000, b'}', frame_flags), 'dev')
+    session = next(iter(engine.reassembler.sessions.values()))
+    session.last_chunk_at -= 10
+    session.last_nack_at -= 10
+    engine.flush_acks()
+    assert transport.sent
+    for value in transport.sent:
+        assert len(value) <= transport.size
+        assert value.startswith(b'123456:')
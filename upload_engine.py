@@ -0,0 +1,608 @@
+# Taşıma katmanından bağımsız yükleme motoru
+#
+# Parça birleştirme, session yönetimi, onaylar ve programların kaydı bu
+# sınıfta toplanır. BLE GATT characteristic'i ve TCP/Unix soket sunucusu
+# aynı motoru kullanır; taşıma katmanı yalnızca gelen yazmaları submit()
+# ile motora verir ve motorun gönderdiği bildirimleri istemciye iletir.
+#
+# Taşıma katmanı şu metotları sağlamalıdır:
+#   send(device, value)           bildirimi (bytes) cihaza gönderir; işçi iş
+#                                 parçacıklarından çağrılabilir
+#   schedule(interval, callback)  callback'i interval saniyede bir, False
+#                                 dönene kadar kendi döngüsünde çağırır
+#   notify_size(device)           bir bildirimin taşıyabileceği byte sayısı
+#                                 (indirme çerçeveleri buna göre bölünür)
+#
+# İndirme istekleri ("download"/"downloadId" alanlı JSON) DownloadEngine'e
+# yönlendirilir (download_engine.py). Motora bir ProgramRunner verilirse
+# "run": true ile yüklenen program TAMAM'dan sonra çalıştırılır ve çıktısı
+# "output:<id>" olarak indirilebilir (program_runner.py).
+
+import base64
+import binascii
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from chunk_engine import (FLAG_RESUME_QUERY, FLAG_TAGGED_NOTIFY, FLAG_WINDOWED_ACK,
+                          ChunkError, ChunkReassembler, chunk_crc, format_stats,
+                          frame_compression, is_binary_frame, parse_binary_frame,
+                          split_integrity)
+from code_store import ProgramStore, unescape_code
+from compile_cache import CompiledProgram, syntax_message
+from download_engine import DownloadEngine, is_download_request
+from json_stream import StreamingJSONDecoder
+from log_setup import RATE_LIMITED
+from program_runner import message_tag
+from metrics import REGISTRY, SLOW_BUCKETS
+from write_pipeline import WORKER_COUNT, WritePipeline
+
+log = logging.getLogger(__name__)
+
+# Aynı süreçteki tüm motorlar (BLE ve soket) aynı ölçümleri paylaşır
+WRITE_SECONDS = REGISTRY.histogram(
+    'upload_write_seconds', 'Bir yazmanın (parça) işlenme süresi')
+CHUNK_INTERARRIVAL_SECONDS = REGISTRY.histogram(
+    'upload_chunk_interarrival_seconds', 'Aynı sessiondaki ardışık parçalar arası süre',
+    SLOW_BUCKETS)
+REASSEMBLY_SECONDS = REGISTRY.histogram(
+    'upload_reassembly_seconds', 'İlk parçadan birleştirilmiş belgeye kadar geçen süre',
+    SLOW_BUCKETS)
+PROCESS_JSON_SECONDS = REGISTRY.histogram(
+    'upload_process_json_seconds', 'process_json_data süresi')
+SESSIONS_STARTED = REGISTRY.counter(
+    'upload_sessions_started_total', 'Başlayan sessionlar')
+SESSIONS_COMPLETED = REGISTRY.counter(
+    'upload_sessions_completed_total', 'TAMAM ile biten sessionlar')
+SESSIONS_FAILED = REGISTRY.counter(
+    'upload_sessions_failed_total', 'HATA ile biten parça ya da sessionlar')
+SESSIONS_EVICTED = REGISTRY.counter(
+    'upload_sessions_evicted_total', 'Bellek sınırı nedeniyle atılan sessionlar')
+SESSIONS_EXPIRED = REGISTRY.counter(
+    'upload_sessions_expired_total', 'Zaman aşımına uğrayan sessionlar')
+NOTIFICATIONS_SENT = REGISTRY.counter(
+    'upload_notifications_sent_total', 'Gönderilen bildirimler')
+JSON_ERRORS = REGISTRY.counter(
+    'upload_json_errors_total', 'Çözülemeyen JSON yazmaları ve belgeleri')
+CRC_ERRORS = REGISTRY.counter(
+    'upload_crc_errors_total', 'CRC32 uymadığı için NACK edilen parçalar')
+DIGEST_ERRORS = REGISTRY.counter(
+    'upload_digest_errors_total', 'SHA-256 özeti uymayan sessionlar')
+LIVE_SESSIONS = REGISTRY.gauge(
+    'upload_live_sessions', 'Bellekteki yarım sessionlar')
+BUFFERED_BYTES = REGISTRY.gauge(
+    'upload_buffered_bytes', 'Sessionlarda bekleyen parça verisi (byte)')
+
+
+class Transport:
+    """Yükleme motorunun bildirim gönderdiği taşıma katmanı"""
+
+    def send(self, device, value):
+        raise NotImplementedError
+
+    def schedule(self, interval, callback):
+        raise NotImplementedError
+
+    def notify_size(self, device):
+        raise NotImplementedError
+
+
+class CompletedUpload:
+    """Tamamlanan yüklemenin geç gelen tekrar parçaları tanımak için özeti"""
+
+    def __init__(self, session):
+        self.completed_at = time.monotonic()
+        self.total_chunks = session.total_chunks
+        self.crcs = session.crcs
+
+    def is_duplicate(self, chunk_index, total_chunks, data, ttl):
+        # Parça sayısı ve parçanın CRC'si aynıysa aynı yüklemenin tekrarıdır
+        if self.crcs is None or time.monotonic() - self.completed_at >= ttl:
+            return False
+        return (total_chunks == self.total_chunks
+                and 0 <= chunk_index < total_chunks
+                and self.crcs[chunk_index] == chunk_crc(data))
+
+    def expire(self, ttl):
+        # Süresi dolunca CRC'ler bırakılır; devam sorgusu yine TAMAM alır
+        if self.crcs is not None and time.monotonic() - self.completed_at >= ttl:
+            self.crcs = None
+
+
+class UploadEngine:
+    SESSION_SWEEP_INTERVAL = 10     # saniye
+    ACK_TIMER_INTERVAL = 0.025      # saniye
+    MAX_COMPLETED = 64              # devam sorgusunda TAMAM dönecek son session'lar
+    COMPLETED_TTL = 30              # saniye, geç gelen tekrar parçalar yeni session açmaz
+
+    def __init__(self, transport, program_store=None, workers=WORKER_COUNT,
+                 spool=None, runner=None):
+        self.transport = transport
+        self.program_store = program_store or ProgramStore()
+        # Verilirse (SessionSpool) yarım session'lar diske yazılır ve
+        # bellekten atılsalar da devam sorgusuyla geri yüklenir
+        self.spool = spool
+        # Tamamlanan session anahtarı -> tamamlanma zamanı; TAMAM bildirimini
+        # kaçıran istemci devam sorgusunda TAMAM alır
+        self.completed = OrderedDict()
+        self.reassembler = ChunkReassembler(
+            consumer_factory=self.create_upload_stream)
+        reassembler = self.reassembler
+        SESSIONS_STARTED.track(lambda: reassembler.started_count)
+        SESSIONS_EVICTED.track(lambda: reassembler.evicted_count)
+        SESSIONS_EXPIRED.track(lambda: reassembler.expired_count)
+        LIVE_SESSIONS.track(lambda: len(reassembler.sessions))
+        BUFFERED_BYTES.track(lambda: reassembler.buffered_bytes)
+        self.downloads = DownloadEngine(transport, self.program_store)
+        # Verilirse (ProgramRunner) yüklenen programlar istek üzerine çalıştırılır
+        self.runner = runner
+        if runner is not None:
+            self.downloads.register("output", runner.open_output)
+
+        # Yazmalar taşıma katmanının döngüsünü bloklamadan işçi iş
+        # parçacıklarında işlenir
+        self.pipeline = WritePipeline(self.process_write, workers)
+        self.pipeline_processed = 0
+        self.ack_timer = False
+        self.ack_timer_lock = threading.Lock()
+
+    def start(self):
+        # Yarım kalan session'ları taşıma katmanının döngüsü üzerinden
+        # periyodik olarak temizle
+        self.transport.schedule(self.SESSION_SWEEP_INTERVAL, self.expire_sessions)
+
+    def submit(self, device, data):
+        """Yazmayı sıraya koyar; kuyruk doluysa False döner"""
+        # Aynı cihazın yazmaları aynı işçiye gider, böylece sıra korunur
+        return self.pipeline.submit(device, data, device)
+
+    def process_write(self, data, device=''):
+        started = time.perf_counter()
+        try:
+            # İkili çerçeve mi? (mod ilk byte'tan anlaşılır)
+            if is_binary_frame(data):
+                self.handle_binary_chunk(data, device)
+                return
+
+            log.debug("📝 Veri alındı: %d byte", len(data))
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("📄 İçerik: %s...", data[:100].decode('utf-8', 'replace'))
+
+            # JSON parse et (json.loads bytes'ı doğrudan UTF-8 olarak çözer)
+            try:
+                json_data = json.loads(data)
+
+                # Parçalı veri kontrolü
+                if "sessionId" in json_data:
+                    self.handle_chunk(json_data, device)
+                elif is_download_request(json_data):
+                    self.downloads.handle_request(json_data, device)
+                elif "runStop" in json_data:
+                    self.stop_run(json_data["runStop"], device)
+                else:
+                    # Tek parça veri
+                    digest = self.process_json_data(json_data)
+                    program = self.check_program(digest, device)
+                    if json_data.get("run"):
+                        self.start_run(digest, program, device)
+
+            except json.JSONDecodeError as e:
+                JSON_ERRORS.inc()
+                log.warning("❌ JSON parse hatası: %s (gelen veri: %s...)", e,
+                            data[:100].decode('utf-8', 'replace'), extra=RATE_LIMITED)
+
+        except Exception:
+            log.exception("❌ Write handler hatası")
+        finally:
+            WRITE_SECONDS.observe(time.perf_counter() - started)
+
+    def handle_chunk(self, chunk_data, device=''):
+        if chunk_data.get("resume"):
+            session_id = chunk_data["sessionId"]
+            self.handle_resume(device, session_id,
+                               session_id if chunk_data.get("notifyTag") else None)
+            return
+        try:
+            session_id = chunk_data["sessionId"]
+            chunk_index = chunk_data["chunkIndex"]
+            total_chunks = chunk_data["totalChunks"]
+            data = chunk_data["data"]
+            windowed = chunk_data.get("ackMode") == "window"
+            compression = chunk_data.get("compression")
+            tag = session_id if chunk_data.get("notifyTag") else None
+            crc = chunk_data.get("crc32")
+            digest = chunk_data.get("sha256")
+            if digest is not None:
+                digest = bytes.fromhex(digest)
+        except KeyError as e:
+            log.warning("❌ Chunk işleme hatası: eksik alan %s", e, extra=RATE_LIMITED)
+            JSON_ERRORS.inc()
+            SESSIONS_FAILED.inc()
+            self.send_notification("HATA", device)
+            return
+        except (ValueError, TypeError) as e:
+            log.warning("❌ Chunk işleme hatası: geçersiz SHA-256 özeti (%s)", e,
+                        extra=RATE_LIMITED)
+            SESSIONS_FAILED.inc()
+            self.send_notification("HATA", device, tag)
+            return
+
+        if compression is not None:
+            # Sıkıştırılmış parçalar base64 olarak gelir
+            try:
+                data = base64.b64decode(data, validate=True)
+            except (binascii.Error, TypeError) as e:
+                log.warning("❌ Chunk işleme hatası: geçersiz base64 (%s)", e,
+                            extra=RATE_LIMITED)
+                if crc is not None:
+                    # Bozulmuş parça: yalnızca bu parça tekrar istenir
+                    CRC_ERRORS.inc()
+                    self.send_notification(f"NACK_{chunk_index}", device, tag)
+                    return
+                SESSIONS_FAILED.inc()
+                self.send_notification("HATA", device, tag)
+                return
+
+        self.store_chunk(device, session_id, chunk_index, total_chunks, data,
+                         windowed, compression, tag, crc, digest)
+
+    def handle_binary_chunk(self, frame, device=''):
+        try:
+            session_id, chunk_index, total_chunks, flags, payload = \
+                parse_binary_frame(frame)
+            payload, digest, crc = split_integrity(payload, flags)
+        except ChunkError as e:
+            log.warning("❌ İkili çerçeve hatası: %s", e, extra=RATE_LIMITED)
+            SESSIONS_FAILED.inc()
+            self.send_notification("HATA", device)
+            return
+
+        if flags & FLAG_RESUME_QUERY:
+            self.handle_resume(device, session_id,
+                               str(session_id) if flags & FLAG_TAGGED_NOTIFY else None)
+            return
+
+        self.store_chunk(device, session_id, chunk_index, total_chunks, payload,
+                         bool(flags & FLAG_WINDOWED_ACK),
+                         frame_compression(flags),
+                         str(session_id) if flags & FLAG_TAGGED_NOTIFY else None,
+                         crc, digest)
+
+    def store_chunk(self, device, session_id, chunk_index, total_chunks, data,
+                    windowed=False, compression=None, tag=None, crc=None, digest=None):
+        # Session'lar cihaz bazında ayrılır: iki tablet aynı sessionId'yi
+        # seçse bile parçaları birbirine karışmaz
+        key = (device, session_id)
+        try:
+            log.debug("📦 Parça alındı: %d/%d (Session: %s)",
+                      chunk_index + 1, total_chunks, session_id)
+
+            if crc is not None and chunk_crc(data) != crc:
+                # Bozuk parça saklanmaz; istemci yalnızca bu parçayı tekrar gönderir
+                CRC_ERRORS.inc()
+                log.warning("❌ CRC hatası: parça %d/%d (Session: %s)",
+                            chunk_index + 1, total_chunks, session_id, extra=RATE_LIMITED)
+                self.send_notification(f"NACK_{chunk_index}", device, tag)
+                return
+
+            # Tamamlanan session'a geç gelen tekrar parça (TAMAM kaybolmuş
+            # olabilir): session yeniden açılmaz, tamamlandı bilgisi tekrarlanır
+            completed = self.completed.get(key)
+            if completed is not None and key not in self.reassembler.sessions:
+                if completed.is_duplicate(chunk_index, total_chunks, data,
+                                          self.COMPLETED_TTL):
+                    log.info("♻️ Tamamlanan session'a tekrar gelen parça: %d/%d",
+                             chunk_index + 1, total_chunks, extra=RATE_LIMITED)
+                    self.send_notification(
+                        f"ACK_{total_chunks}" if windowed else "TAMAM", device, tag)
+                    return
+                # Aynı sessionId ile yeni bir yükleme başladı
+                with self.reassembler.lock:
+                    self.completed.pop(key, None)
+
+            # Bellekten atılmış ya da önceki çalıştırmadan kalan session
+            if self.spool is not None:
+                self.restore_session(key)
+
+            # Parçayı kaydet (tekrar gelen parçalar sayılmaz)
+            session, is_new = self.reassembler.add_chunk(
+                key, chunk_index, total_chunks, data, compression, digest)
+            if not is_new:
+                log.info("♻️ Tekrar gelen parça yok sayıldı: %d/%d",
+                         chunk_index + 1, total_chunks, extra=RATE_LIMITED)
+            else:
+                if session.received_count > 1:
+                    CHUNK_INTERARRIVAL_SECONDS.observe(session.last_gap)
+                if self.spool is not None:
+                    meta = {"total": total_chunks, "compression": compression,
+                            "windowed": windowed, "tag": tag}
+                    if digest is not None:
+                        self.spool.append_digest(key, meta, digest)
+                    self.spool.append(key, meta, chunk_index, data)
+            if windowed:
+                session.windowed = True
+            session.tag = tag
+
+            # Tüm parçalar alındı mı?
+            if session.is_complete():
+                self.finish_session(key, tag)
+            elif windowed:
+                # Pencereli onay: birkaç parçada bir ACK, eksikler için NACK
+                message = self.reassembler.note_unacked(
+                    session, self.notify_limit(device, tag))
+                if message is not None:
+                    self.send_notification(message, device, tag)
+                self.start_ack_timer()
+            else:
+                # Parça alındı bildirimi
+                self.send_notification(f"OK_{chunk_index}", device, tag)
+
+        except Exception as e:
+            log.warning("❌ Chunk işleme hatası: %s", e, extra=RATE_LIMITED)
+            SESSIONS_FAILED.inc()
+            # Geçersiz kılınan session'ın parçaları diskte tutulmaz
+            if self.spool is not None and key not in self.reassembler.sessions:
+                self.spool.remove(key)
+            self.send_notification("HATA", device, tag)
+
+    def finish_session(self, key, tag=None):
+        device, session_id = key
+        log.info("✅ Tüm parçalar alındı: %s", session_id,
+                 extra={"session": session_id, "device": device})
+
+        # Veri parçalar geldikçe çözüldü ve kod dosyaya akıtıldı;
+        # burada yalnızca belgenin tamamlandığı doğrulanır
+        try:
+            session = self.reassembler.sessions[key]
+            final_json, stats = self.reassembler.finish(key)
+            REASSEMBLY_SECONDS.observe(stats["transfer_time"]
+                                       + stats["reassembly_latency"])
+            log.info("📊 Session %s: %s", session_id, format_stats(stats),
+                     extra={"session": session_id, "device": device,
+                            "stats": stats})
+            # Akış modunda "code" alanı kaydedilen programın özetidir
+            digest = final_json.pop("code", None)
+            self.process_json_data(final_json, session_id, digest)
+
+            with self.reassembler.lock:
+                self.completed[key] = CompletedUpload(session)
+                self.completed.move_to_end(key)
+                while len(self.completed) > self.MAX_COMPLETED:
+                    self.completed.popitem(last=False)
+
+            # Başarı bildirimi gönder
+            SESSIONS_COMPLETED.inc()
+            self.send_notification("TAMAM", device, tag)
+            # Sözdizimi hatası çalıştırmayı beklemeden bildirilir
+            program = self.check_program(digest, device, tag)
+            if final_json.get("run"):
+                self.start_run(digest, program, device, tag)
+
+        except ValueError as e:
+            JSON_ERRORS.inc()
+            SESSIONS_FAILED.inc()
+            log.error("❌ Birleştirilmiş JSON parse hatası: %s", e,
+                      extra={"session": session_id, "device": device})
+            self.send_notification("HATA", device, tag)
+        except ChunkError as e:
+            DIGEST_ERRORS.inc()
+            SESSIONS_FAILED.inc()
+            log.error("❌ Bütünlük hatası: %s", e,
+                      extra={"session": session_id, "device": device})
+            self.send_notification("HATA", device, tag)
+        finally:
+            if self.spool is not None:
+                self.spool.remove(key)
+
+    def handle_resume(self, device, session_id, tag=None):
+        """Devam sorgusu: sunucudaki parçaları HAVE_... ya da TAMAM ile bildirir"""
+        key = self.find_session(device, session_id)
+        if key in self.completed:
+            message = "TAMAM"
+        else:
+            message = (self.reassembler.resume_message(
+                key, self.notify_limit(device, tag)) or "HAVE_0")
+        log.info("⏯️ Devam sorgusu: %s -> %s", session_id, message,
+                 extra={"session": session_id, "device": device})
+        self.send_notification(message, device, tag)
+        # Parçaların tamamı diskteydi (tamamlanmadan önce sunucu kapandı)
+        session = self.reassembler.sessions.get(key)
+        if session is not None and session.is_complete():
+            self.finish_session(key, tag)
+
+    def find_session(self, device, session_id):
+        """Devam edilecek session'ın bu cihazdaki anahtarını döner"""
+        key = (device, session_id)
+        if key in self.completed or self.restore_session(key):
+            return key
+        # Yeniden bağlanan istemcinin cihaz adı değişmiş olabilir (rastgele
+        # BLE adresi, yeni soket bağlantısı): aynı sessionId'ye sahip tek bir
+        # session varsa ona devam edilir
+        with self.reassembler.lock:
+            candidates = {k for k in self.reassembler.sessions if k[1] == session_id}
+            candidates.update(k for k in self.completed if k[1] == session_id)
+        if self.spool is not None:
+            candidates.update(k for k in self.spool.keys() if k[1] == session_id)
+        if len(candidates) != 1:
+            return key
+        old_key = candidates.pop()
+        if old_key in self.completed:
+            return old_key
+        if self.restore_session(old_key):
+            self.reassembler.rebind(old_key, key)
+            if self.spool is not None:
+                self.spool.rebind(old_key, key)
+        return key
+
+    def restore_session(self, key):
+        """Session bellekte yoksa diskten geri yükler; session bellekteyse True"""
+        if key in self.reassembler.sessions:
+            return True
+        if self.spool is None or not self.spool.has(key):
+            return False
+        meta, chunks = self.spool.load(key)
+        digest = bytes.fromhex(meta["sha256"]) if "sha256" in meta else None
+        session = None
+        try:
+            for chunk_index, data in chunks:
+                session, _ = self.reassembler.add_chunk(
+                    key, chunk_index, meta["total"], data, meta.get("compression"),
+                    digest)
+        except Exception as e:
+            log.warning("⚠️ Session diskten geri yüklenemedi: %s (%s)", key[1], e)
+            self.reassembler.discard(key)
+            session = None
+        if session is None:
+            self.spool.remove(key)
+            return False
+        session.windowed = meta.get("windowed", False)
+        session.tag = meta.get("tag")
+        log.info("💾 Session diskten geri yüklendi: %s (%d parça)", key[1], len(chunks))
+        return True
+
+    def start_ack_timer(self):
+        with self.ack_timer_lock:
+            if not self.ack_timer:
+                self.ack_timer = True
+                self.transport.schedule(self.ACK_TIMER_INTERVAL, self.flush_acks)
+
+    def flush_acks(self):
+        # Bekleyen ACK'ler ve uzun süre dolmayan boşluklar için NACK
+        def limit(session):
+            device, _ = session.session_id
+            return self.notify_limit(device, session.tag)
+
+        for session, message in self.reassembler.due_acks(notify_limit=limit):
+            device, _ = session.session_id
+            self.send_notification(message, device, session.tag)
+        with self.ack_timer_lock:
+            if not self.reassembler.has_windowed_sessions():
+                self.ack_timer = False
+                return False
+        return True
+
+    def create_upload_stream(self, session_id):
+        # "code" alanı bellekte tutulmadan doğrudan program deposuna akıtılır
+        return StreamingJSONDecoder({"code": self.program_store.open_writer})
+
+    def expire_sessions(self):
+        if self.spool is not None and self.spool.expire():
+            log.info("💾 Süresi dolan yarım session dosyaları silindi")
+        if self.reassembler.expire_sessions():
+            log.info("📊 Session sayaçları: %s", self.reassembler.counters())
+        with self.reassembler.lock:
+            for completed in self.completed.values():
+                completed.expire(self.COMPLETED_TTL)
+        self.downloads.expire_streams()
+        # Bekleyen index kayıtları diske yazılır (fsync döngüyü bloklamasın)
+        if self.program_store.has_pending():
+            threading.Thread(target=self.program_store.flush_index,
+                             daemon=True).start()
+        stats = self.pipeline.stats()
+        if stats["processed"] != self.pipeline_processed:
+            self.pipeline_processed = stats["processed"]
+            log.info("📊 Yazma kuyruğu: %s", stats)
+        # Zamanlayıcının devam etmesi için True
+        return True
+
+    def process_json_data(self, json_data, session_id=None, digest=None):
+        started = time.perf_counter()
+        try:
+            log.debug("🔄 JSON verisi işleniyor...")
+
+            # Kod varsa dosyaya kaydet
+            if "code" in json_data:
+                if not isinstance(json_data["code"], str):
+                    log.warning("❌ 'code' alanı string değil", extra=RATE_LIMITED)
+                    return None
+                # Escape karakterleri tek geçişte düzelt
+                code = unescape_code(json_data["code"])
+
+                # Program deposuna kaydet (aynı kod tekrar yazılmaz)
+                digest = self.program_store.save(code)
+
+            # Programı yazar/açıklama bilgileriyle index'e ekle
+            if digest is not None:
+                self.program_store.record(digest, session_id,
+                                          json_data.get("author"),
+                                          json_data.get("description"))
+
+            # Diğer verileri işle
+            if "description" in json_data:
+                log.info("📝 Açıklama: %s", json_data['description'])
+
+            if "author" in json_data:
+                log.info("👤 Yazar: %s", json_data['author'])
+
+            log.info("✅ JSON verisi başarıyla işlendi", extra={"session": session_id})
+
+        except Exception:
+            log.exception("❌ JSON işleme hatası")
+        finally:
+            PROCESS_JSON_SECONDS.observe(time.perf_counter() - started)
+        return digest
+
+    def check_program(self, digest, device, tag=None):
+        """Programı derler (önbellekten); sözdizimi hatasını bildirir"""
+        if digest is None:
+            return None
+        try:
+            program = self.program_store.compile(digest)
+        except OSError as e:
+            # Derlenmiş kod yazılamadı; işçi kaynaktan derler
+            log.warning("⚠️ Derleme önbelleği kullanılamadı: %s", e, extra=RATE_LIMITED)
+            return CompiledProgram()
+        if program.error is not None:
+            limit = self.notify_limit(device, tag)
+            self.send_notification(syntax_message(program.error, limit), device, tag)
+        return program
+
+    def start_run(self, digest, program, device, tag=None):
+        if self.runner is None:
+            log.warning("⚠️ Çalıştırma isteği yok sayıldı: çalıştırıcı kapalı",
+                        extra=RATE_LIMITED)
+            self.send_runner_error("RUNERR_DISABLED", device, tag)
+        elif digest is None:
+            self.send_runner_error("RUNERR_NOCODE", device, tag)
+        elif program.error is None:
+            # Sözdizimi hatalı program çalıştırılmaz (SYNTAX_ gönderildi)
+            self.runner.run(self.program_store.blob_path(digest), device,
+                            self.transport, tag, program.path)
+
+    def stop_run(self, run_id, device):
+        try:
+            stopped = self.runner is not None and self.runner.stop(int(run_id))
+        except (TypeError, ValueError):
+            stopped = False
+        if not stopped:
+            self.send_notification("RUNERR_UNKNOWN", device)
+
+    def send_runner_error(self, message, device, tag=None):
+        # Etiketle sığmayan RUNERR_ mesajı etiketsiz gönderilir (program_runner.py)
+        self.send_notification(
+            message, device, message_tag(message, tag, self.transport.notify_size(device)))
+
+    def notify_limit(self, device, tag=None):
+        """Bir bildirime sığan mesaj boyutu (MTU - 3, etiket öneki hariç)"""
+        limit = self.transport.notify_size(device)
+        if tag is not None:
+            limit -= len(f"{tag}:".encode('utf-8'))
+        return limit
+
+    def send_notification(self, message, device=None, tag=None):
+        try:
+            if tag is not None:
+                message = f"{tag}:{message}"
+            log.debug("📤 Bildirim gönderildi: %s", message)
+            self.transport.send(device, message.encode('utf-8'))
+            NOTIFICATIONS_SENT.inc()
+        except Exception as e:
+            log.warning("❌ Bildirim gönderme hatası: %s", e, extra=RATE_LIMITED)
+
+    def stop(self):
+        self.pipeline.stop()
+        self.program_store.flush_index()
+        if self.spool is not None:
+            self.spool.close()
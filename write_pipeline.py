@@ -0,0 +1,91 @@
+# Yazma işlemlerini D-Bus ana döngüsünün dışında işleyen iş hattı
+#
+# Her anahtar (bağlı cihaz) her zaman aynı işçi iş parçacığına gider, böylece
+# bir cihazın (ve dolayısıyla session'ın) yazmaları geliş sırasıyla işlenir.
+# Kuyruklar sınırlıdır: kuyruk doluysa submit() False döner ve çağıran
+# istemciye hata dönerek geri basınç uygular.
+
+import logging
+import queue
+import threading
+import time
+import zlib
+
+log = logging.getLogger(__name__)
+
+WORKER_COUNT = 2
+QUEUE_SIZE = 256
+
+
+class WritePipeline:
+    def __init__(self, handler, workers=WORKER_COUNT, queue_size=QUEUE_SIZE):
+        self.handler = handler
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+        self.stats_lock = threading.Lock()
+        self.submitted = 0
+        self.processed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.threads = []
+        for i, q in enumerate(self.queues):
+            thread = threading.Thread(target=self._worker, args=(q,),
+                                      name=f'write-worker-{i}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, key, *args):
+        """İşi anahtarın işçisine sıraya koyar; kuyruk doluysa False döner"""
+        q = self.queues[zlib.crc32(key.encode('utf-8')) % len(self.queues)]
+        try:
+            q.put_nowait((time.monotonic(), args))
+        except queue.Full:
+            with self.stats_lock:
+                self.rejected += 1
+            return False
+        depth = q.qsize()
+        with self.stats_lock:
+            self.submitted += 1
+            if depth > self.max_depth:
+                self.max_depth = depth
+        return True
+
+    def _worker(self, q):
+        while True:
+            queued_at, args = q.get()
+            if args is None:
+                break
+            wait = time.monotonic() - queued_at
+            try:
+                self.handler(*args)
+            except Exception:
+                log.exception("❌ İş hattı işleme hatası")
+                with self.stats_lock:
+                    self.failed += 1
+            with self.stats_lock:
+                self.processed += 1
+                self.total_wait += wait
+                if wait > self.max_wait:
+                    self.max_wait = wait
+
+    def stop(self):
+        for q in self.queues:
+            q.put((time.monotonic(), None))
+        for thread in self.threads:
+            thread.join()
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                "queued": sum(q.qsize() for q in self.queues),
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "max_depth": self.max_depth,
+                "avg_wait_ms": (self.total_wait / self.processed * 1000
+                                if self.processed else 0.0),
+                "max_wait_ms": self.max_wait * 1000,
+            }